@@ -12,4 +12,4 @@ if [ -f .env ]; then
 fi
 
 # Run the research bot
-python -m src.main 
\ No newline at end of file
+python -m src.main "$@"
\ No newline at end of file
@@ -1,42 +1,86 @@
-from typing import Dict, Any, List, Tuple
-from agents import SQLiteSession
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+from agents import RunContextWrapper, SQLiteSession
+
+from src.research_index import ResearchIndex, ResearchSnippet
+from src.research_store import ResearchStore, get_research_store
+from src.usage import USAGE_LEDGER, TokenUsage
+
+DEFAULT_SESSION_ID = "deep_research_session"
+
+# Workflow state flags, persisted with the session
+STATE_FLAGS = ("has_enough_context", "plan_generated", "plan_finalized", "report_generated")
 
 class AgentMemory:
     """
-    Centralized memory management for agent state and tool outputs.
-    Uses SQLiteSession for conversation history and singleton pattern for global access.
+    Memory of one research session: agent state and tool outputs.
+    Uses SQLiteSession for conversation history. Get the memory of a session with
+    get_agent_memory(session_id); agents reach it through their run context.
+    With a ResearchStore, the plan, research dump, report and state are written
+    through to its database (which also holds the conversation history) and
+    restored when the session's memory is created again, e.g. after a restart.
+    The session's model usage is kept in the usage ledger and read through get_usage.
     """
     
-    _instance = None
-    
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance._initialized = False
-        return cls._instance
-    
-    def __init__(self):
-        if not self._initialized:
-            # Session for conversation history
-            self.session = SQLiteSession("deep_research_session")
-            
-            # Research plan: String containing the research plan
-            self._research_plan: str = ""
-            
-            # Research dump: Dictionary with [research question, list of ((title, url), summary) tuples]
-            self._research_dump: Dict[str, List[Tuple[Tuple[str, str], str]]] = {}
-            
-            # Report: String containing the report
-            self._research_report: str = ""
-            
-            # Agent state flags
-            self.has_enough_context: bool = False
-            self.plan_generated: bool = False
-            self.plan_finalized: bool = False
-            self.report_generated: bool = False
-            
-            self._initialized = True
-    
+    def __init__(self, session_id: str = DEFAULT_SESSION_ID, store: Optional[ResearchStore] = None):
+        self.session_id = session_id
+        self._store = store
+        
+        # Session for conversation history
+        self.session = SQLiteSession(session_id, str(store.path)) if store else SQLiteSession(session_id)
+        
+        # Research plan: String containing the research plan
+        self._research_plan: str = ""
+        
+        # Research dump: Dictionary with [research question, list of ((title, url), summary) tuples]
+        self._research_dump: Dict[str, List[Tuple[Tuple[str, str], str]]] = {}
+        
+        # Retrieval index over the research dump, kept in sync as entries are added
+        self._research_index = ResearchIndex()
+        
+        # Checkpoints of unfinished research questions: their queries, and the sources summarized for each (query, url)
+        self._checkpoint_queries: Dict[str, List[str]] = {}
+        self._checkpoint_sources: Dict[str, Dict[Tuple[str, str], Tuple[Tuple[str, str], str]]] = {}
+        
+        # Report: String containing the report, and the file it was saved to
+        self._research_report: str = ""
+        self._research_report_path: str = ""
+        
+        # File new reports of the session are written to (a timestamped file in REPORTS_DIR if None)
+        self.report_file: Optional[Path] = None
+        
+        # Agent state flags
+        self.has_enough_context: bool = False
+        self.plan_generated: bool = False
+        self.plan_finalized: bool = False
+        self.report_generated: bool = False
+        
+        if store:
+            self._restore(store)
+
+    def _restore(self, store: ResearchStore) -> None:
+        """Load the research state previously stored for this session."""
+        stored = store.load(self.session_id)
+        if stored is None:
+            return
+        self._research_plan = stored.research_plan
+        for research_question, research_data in stored.research_dump.items():
+            self._research_dump[research_question] = list(research_data)
+            self._research_index.add(research_question, research_data)
+        self._checkpoint_queries = stored.checkpoint_queries
+        self._checkpoint_sources = stored.checkpoint_sources
+        self._research_report = stored.report
+        self._research_report_path = stored.report_path
+        for state, value in stored.state.items():
+            if state in STATE_FLAGS:
+                setattr(self, state, value)
+        USAGE_LEDGER.load_session(self.session_id, store.load_usage(self.session_id))
+
+    @property
+    def is_persistent(self) -> bool:
+        """Whether the research state survives restarts."""
+        return self._store is not None
+
     # Session conversation history management methods
 
     async def add_items(self, items: List[Dict[str, str]]) -> None:
@@ -49,13 +93,15 @@ class AgentMemory:
 
     async def clear_session(self) -> None:
         """Clear the session."""
-        await self.session.clear()
+        await self.session.clear_session()
 
     # Research plan management methods
 
     async def store_research_plan(self, research_plan: str) -> None:
         """Store the research plan."""
         self._research_plan = research_plan
+        if self._store:
+            await self._store.asave_plan(self.session_id, research_plan)
 
     async def get_research_plan(self) -> str:
         """Get the stored research plan."""
@@ -64,6 +110,8 @@ class AgentMemory:
     async def clear_research_plan(self) -> None:
         """Clear the research plan."""
         self._research_plan = ""
+        if self._store:
+            await self._store.asave_plan(self.session_id, "")
 
     # Research dump management methods
 
@@ -72,6 +120,12 @@ class AgentMemory:
         if research_question not in self._research_dump:
             self._research_dump[research_question] = []
         self._research_dump[research_question].extend(research_data)
+        self._research_index.add(research_question, research_data)
+        # The question is complete, so its checkpoint is no longer needed
+        self._checkpoint_queries.pop(research_question, None)
+        self._checkpoint_sources.pop(research_question, None)
+        if self._store:
+            await self._store.aadd_to_dump(self.session_id, research_question, list(research_data))
 
     async def get_from_research_dump_by_question(self, research_question: str) -> List[Tuple[Tuple[str, str], str]]:
         """Get all entries from the research dump for a given research question."""
@@ -81,23 +135,83 @@ class AgentMemory:
         """Get the research dump."""
         return self._research_dump
     
+    async def search_research_dump(self, query: str, k: int = 5) -> List[ResearchSnippet]:
+        """Get the k research dump entries most relevant to a query."""
+        return self._research_index.search(query, k)
+    
     async def clear_research_dump(self) -> None:
         """Clear the research dump."""
         self._research_dump.clear()
+        self._research_index.clear()
+        self._checkpoint_queries.clear()
+        self._checkpoint_sources.clear()
+        if self._store:
+            await self._store.aclear_dump(self.session_id)
+
+    # Research checkpoint methods: progress of questions not yet in the research dump, to resume interrupted runs
+
+    async def is_question_researched(self, research_question: str) -> bool:
+        """Check if a research question's results are already in the research dump (a question without results isn't)."""
+        return bool(self._research_dump.get(research_question))
+
+    async def checkpoint_queries(self, research_question: str, queries: List[str]) -> None:
+        """Checkpoint the search queries written for a research question."""
+        self._checkpoint_queries[research_question] = list(queries)
+        if self._store:
+            await self._store.asave_checkpoint_queries(self.session_id, research_question, list(queries))
+
+    async def get_checkpointed_queries(self, research_question: str) -> List[str]:
+        """Get the checkpointed search queries of a research question (empty if none)."""
+        return self._checkpoint_queries.get(research_question, [])
+
+    async def checkpoint_source(self, research_question: str, query: str, entry: Tuple[Tuple[str, str], str]) -> None:
+        """Checkpoint a ((title, url), summary) source summarized for a query of a research question."""
+        (_, url), _ = entry
+        self._checkpoint_sources.setdefault(research_question, {})[(query, url)] = entry
+        if self._store:
+            await self._store.asave_checkpoint_source(self.session_id, research_question, query, entry)
+
+    async def get_checkpointed_source(self, research_question: str, query: str, url: str) -> Optional[Tuple[Tuple[str, str], str]]:
+        """Get the checkpointed source of a URL found by a query of a research question, if any."""
+        return self._checkpoint_sources.get(research_question, {}).get((query, url))
 
     # Report management methods
 
-    async def store_report(self, report: str) -> None:
-        """Store the report."""
+    async def store_report(self, report: str, path: str = "") -> None:
+        """Store the report and the file it was saved to."""
         self._research_report = report
+        self._research_report_path = path
+        if self._store:
+            await self._store.asave_report(self.session_id, report, path)
 
     async def get_report(self) -> str:
         """Get the report."""
         return self._research_report
 
+    async def get_report_path(self) -> str:
+        """Get the file the report was saved to."""
+        return self._research_report_path
+
     async def clear_report(self) -> None:
         """Clear the report."""
         self._research_report = ""
+        self._research_report_path = ""
+        if self._store:
+            await self._store.asave_report(self.session_id, "", "")
+
+    # Usage accounting methods
+
+    async def get_usage(self, by: Sequence[str] = ()) -> Dict[Tuple[str, ...], TokenUsage]:
+        """
+        Get the model usage and estimated cost of the session.
+
+        Args:
+            by: Dimensions to group by: "question", "agent" and/or "model" (nothing for a single total)
+
+        Returns:
+            Usage per group, keyed by the group's values of the `by` dimensions
+        """
+        return USAGE_LEDGER.summarize(by, self.session_id)
 
     # State management methods
 
@@ -114,10 +228,35 @@ class AgentMemory:
         """Set any state dynamically."""
         if hasattr(self, state):
             setattr(self, state, value)
+            if self._store and state in STATE_FLAGS:
+                # Queued on the store's writer thread, so this stays usable from sync tools
+                self._store.submit(self._store.save_state, self.session_id, {flag: getattr(self, flag) for flag in STATE_FLAGS})
         else:
             # Log the missing state but don't raise an error
             print(f"Warning: Unknown state '{state}' cannot be set. State may not be defined in AgentMemory.")
     
 
-# Global instance for easy import
-AGENT_MEMORY = AgentMemory()
\ No newline at end of file
+# Memories of the sessions served by this process, by session id
+_memories: Dict[str, AgentMemory] = {}
+
+def get_agent_memory(session_id: str = DEFAULT_SESSION_ID) -> AgentMemory:
+    """Get the memory of a session, creating it (or restoring it from the research store) on first use."""
+    if session_id not in _memories:
+        _memories[session_id] = AgentMemory(session_id, get_research_store())
+    return _memories[session_id]
+
+def close_agent_memory(session_id: str) -> None:
+    """Forget a session's memory and close its conversation history."""
+    memory = _memories.pop(session_id, None)
+    if memory is not None:
+        memory.session.close()
+
+def agent_memory_from(ctx: RunContextWrapper[Any]) -> AgentMemory:
+    """Get the memory of the session a tool is running in (the default session for runs without one)."""
+    return ctx.context if isinstance(ctx.context, AgentMemory) else get_agent_memory()
+
+def __getattr__(name: str) -> Any:
+    """AGENT_MEMORY: memory of the default session, for scripts; created on first use, not on import."""
+    if name == "AGENT_MEMORY":
+        return get_agent_memory(DEFAULT_SESSION_ID)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -0,0 +1,262 @@
+"""
+Headless batch mode: research many briefs unattended and write a report for each.
+
+A brief is a JSON object describing the business or product idea, in the shape of
+example_user_context/phone_case_drop-shipping.json. Briefs are read from a JSON
+file, a directory of JSON files or a JSONL file (one brief per line).
+
+Usage:
+    python -m src.batch briefs/ --output-dir reports/nightly --workers 8
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, TextIO, Tuple
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+from src.agent_memory import AgentMemory, close_agent_memory, get_agent_memory
+from src.globals import BATCH_MAX_WORKERS, REPORTS_DIR
+from src.research_store import get_research_store
+from src.tool_agents.planner.plan_writer_tool import write_plan
+from src.tool_agents.research.report_writer_tool import generate_report
+from src.tool_agents.research.research_tool import conduct_research
+from src.tools.web_scraper.fetch_engine import close_fetch_engine
+from src.tracing import export_trace
+from src.usage import USAGE_LEDGER, format_usage, usage_scope
+
+
+class BatchResult(NamedTuple):
+    """Outcome of one brief of a batch."""
+
+    brief_id: str
+    report_path: Optional[Path]
+    error: Optional[str]
+    seconds: float
+
+
+def _brief_id(name: str) -> str:
+    """Make a brief name safe to use as a session id and file name."""
+    return re.sub(r"[^A-Za-z0-9_.-]+", "-", name).strip("-") or "brief"
+
+
+def _brief_hash(brief: Dict[str, Any]) -> str:
+    """Hash of a brief's content, to tell when a brief changed since its session was started."""
+    return hashlib.sha256(json.dumps(brief, sort_keys=True).encode()).hexdigest()
+
+
+async def _open_brief_session(session_id: str, brief: Dict[str, Any], fresh: bool) -> AgentMemory:
+    """
+    Get the memory of a brief's session, starting it over if the brief changed since it was stored.
+
+    Args:
+        session_id: The session id of the brief
+        brief: The research brief
+        fresh: Start over even if the brief is unchanged
+
+    Returns:
+        The memory of the session
+    """
+    memory = get_agent_memory(session_id)
+    store = get_research_store()
+    if store is None:
+        return memory
+
+    brief_hash = _brief_hash(brief)
+    if await store.aload_brief_hash(session_id) != brief_hash or fresh:
+        if store.has_session(session_id):
+            print(f"🔄 Batch: Starting {session_id} over ({'--fresh' if fresh else 'the brief changed'})")
+            await memory.clear_session()
+            close_agent_memory(session_id)
+            await store.adelete_session(session_id)
+            memory = get_agent_memory(session_id)
+        await store.asave_brief_hash(session_id, brief_hash)
+    return memory
+
+
+def load_briefs(path: Path) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Load research briefs.
+
+    Args:
+        path: A JSON file, a directory of JSON files, or a JSONL file with one brief per line
+
+    Returns:
+        (brief id, brief) pairs; ids come from the brief's "id" field, else the file name (and line number)
+    """
+    path = Path(path)
+    if path.is_dir():
+        sources = [(file.stem, json.loads(file.read_text(encoding="utf-8"))) for file in sorted(path.glob("*.json"))]
+    elif path.suffix == ".jsonl":
+        lines = path.read_text(encoding="utf-8").splitlines()
+        sources = [(f"{path.stem}-{number}", json.loads(line)) for number, line in enumerate(lines, 1) if line.strip()]
+    else:
+        sources = [(path.stem, json.loads(path.read_text(encoding="utf-8")))]
+
+    briefs = []
+    seen = set()
+    for name, brief in sources:
+        brief_id = _brief_id(str(brief.get("id", name)))
+        if brief_id in seen:
+            raise ValueError(f"Duplicate brief id: {brief_id}")
+        seen.add(brief_id)
+        briefs.append((brief_id, brief))
+    return briefs
+
+
+async def research_brief(
+    memory: AgentMemory,
+    brief: Dict[str, Any],
+    report_path: Path,
+    console: Optional[TextIO] = None,
+) -> Path:
+    """
+    Research a brief in a session and write its report, without any conversational turns.
+
+    The brief is given to the Plan Writer as the conversation, the plan is taken as
+    final, and the research and report steps run as the Research Agent would run
+    them. Steps the session already completed (e.g. before an interruption) are
+    skipped, and research resumes from its checkpoints.
+
+    Args:
+        memory: Memory of the session to research the brief in
+        brief: The research brief
+        report_path: File to write the report to
+        console: Where to stream the report besides the file (stdout by default)
+
+    Returns:
+        The file the report was saved to
+
+    Raises:
+        RuntimeError: If the research collected nothing to report on
+    """
+    with usage_scope(session_id=memory.session_id):
+        if not memory.plan_generated:
+            print(f"📋 Batch: Writing the research plan for {memory.session_id}")
+            await memory.add_items([{"role": "user", "content": f"Research brief:\n{json.dumps(brief, indent=2)}"}])
+            memory.set_state("has_enough_context", True)
+            await write_plan(memory)
+        memory.set_state("plan_finalized", True)
+
+        print(f"🔍 Batch: Researching {memory.session_id}")
+        outcome = await conduct_research(memory)
+        if outcome is not True:
+            print(f"⚠️ Batch: {memory.session_id}: {outcome}")
+            if not await memory.get_research_dump():
+                raise RuntimeError(str(outcome))
+
+        print(f"📝 Batch: Writing the report for {memory.session_id}")
+        _, report_path = await generate_report(memory, report_path, console)
+        return report_path
+
+
+async def run_brief(brief_id: str, brief: Dict[str, Any], output_dir: Path, fresh: bool = False) -> BatchResult:
+    """
+    Research one brief of a batch in its own session and write its report.
+
+    The brief's session is checkpointed like any other, so a brief that was
+    interrupted resumes where it stopped and a finished one is not redone. A brief
+    whose content changed since its session was stored starts over.
+
+    Args:
+        brief_id: Id of the brief (also its session id and report file name)
+        brief: The research brief
+        output_dir: Directory to write the report to
+        fresh: Start over even if the brief was already (partly) researched
+
+    Returns:
+        The outcome of the brief
+    """
+    start = time.monotonic()
+    session_id = f"batch-{brief_id}"
+    report_path = Path(output_dir) / f"{brief_id}.md"
+    try:
+        memory = await _open_brief_session(session_id, brief, fresh)
+        if memory.report_generated and report_path.exists():
+            print(f"⏭️ Batch: {brief_id} already has a report, skipping")
+            return BatchResult(brief_id, report_path, None, time.monotonic() - start)
+
+        # Concurrent briefs would interleave their reports on the console, so only write the files
+        with open(os.devnull, "w") as quiet:
+            report_path = await research_brief(memory, brief, report_path, quiet)
+        return BatchResult(brief_id, report_path, None, time.monotonic() - start)
+    except Exception as e:
+        print(f"❌ Batch: {brief_id} failed: {e}")
+        return BatchResult(brief_id, None, str(e), time.monotonic() - start)
+    finally:
+        close_agent_memory(session_id)
+
+
+async def run_batch(
+    briefs: List[Tuple[str, Dict[str, Any]]],
+    output_dir: Path,
+    max_workers: int = BATCH_MAX_WORKERS,
+    fresh: bool = False,
+) -> List[BatchResult]:
+    """
+    Research briefs concurrently, at most max_workers at a time.
+
+    Model calls, searches and scrapes of all briefs share the process-wide schedulers,
+    so their rate limits hold across the whole batch. The shared fetch engine's
+    connections are closed when the batch ends.
+
+    Args:
+        briefs: (brief id, brief) pairs
+        output_dir: Directory to write the reports to
+        max_workers: Maximum number of briefs researched at once
+        fresh: Start every brief over instead of resuming its stored session
+
+    Returns:
+        The outcome of each brief, in input order
+    """
+    workers = asyncio.Semaphore(max(1, max_workers))
+
+    async def run(brief_id: str, brief: Dict[str, Any]) -> BatchResult:
+        async with workers:
+            return await run_brief(brief_id, brief, output_dir, fresh)
+
+    try:
+        return list(await asyncio.gather(*(run(brief_id, brief) for brief_id, brief in briefs)))
+    finally:
+        await close_fetch_engine()
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    """Run a batch from the command line; returns the exit code."""
+    parser = argparse.ArgumentParser(prog="python -m src.batch", description="Research many briefs unattended.")
+    parser.add_argument("briefs", type=Path, help="JSON brief, directory of JSON briefs, or JSONL file of briefs")
+    parser.add_argument("--output-dir", type=Path, default=Path(REPORTS_DIR) / "batch", help="directory for the reports")
+    parser.add_argument("--workers", type=int, default=BATCH_MAX_WORKERS, help="briefs researched at once")
+    parser.add_argument("--fresh", action="store_true", help="start every brief over instead of resuming its last run")
+    args = parser.parse_args(argv)
+
+    briefs = load_briefs(args.briefs)
+    print(f"🚀 Batch: Researching {len(briefs)} briefs with {args.workers} workers into {args.output_dir}")
+    start = time.monotonic()
+    results = await run_batch(briefs, args.output_dir, args.workers, args.fresh)
+
+    failed = [result for result in results if result.error]
+    print(f"\n✅ Batch: {len(results) - len(failed)}/{len(results)} reports written in {time.monotonic() - start:.0f}s")
+    for result in results:
+        status = f"❌ {result.error}" if result.error else f"✅ {result.report_path}"
+        print(f"  {result.brief_id} ({result.seconds:.0f}s): {status}")
+
+    total = USAGE_LEDGER.total()
+    print(f"\n💰 Batch: {total.total_tokens} tokens in {total.requests} model requests, estimated ${total.cost:.2f}")
+    print(format_usage(USAGE_LEDGER.summarize(("session_id", "agent")), ("session_id", "agent")))
+    export_trace()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,3 @@
+"""
+Offline end-to-end benchmark: the full research flow against a fake model provider and a fixture web.
+"""
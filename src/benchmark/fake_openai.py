@@ -0,0 +1,325 @@
+"""
+Fake OpenAI-compatible model server for offline benchmarks.
+
+Serves POST /v1/responses (plain and streamed) like the OpenAI Responses API,
+answering each request with a scripted reply for the agent that sent it, at a
+configurable latency and output token rate:
+
+- Tool-calling agents call their tools in the order the real workflow expects
+  (Coordinator: hand off; Planner: set_state, plan_writer_tool, plan_summarizer_tool;
+  Research Agent: research_tool, report_writer_tool), one per response, then reply.
+- The Plan Writer writes a plan with a configurable number of research areas and
+  questions, the query writer writes comma-separated queries, section writers cite
+  the sources they were given, and every other agent writes filler text.
+
+Agents are told apart by their tools, or by their instructions when they have none.
+"""
+
+import asyncio
+import hashlib
+import itertools
+import json
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from src.router import is_plan_approval
+
+# Research areas of the plans the fake Plan Writer writes (numbered areas beyond these)
+PLAN_AREAS = ["Market Analysis", "Business Model & Financial Research", "Marketing Research", "Technical & Legal Research"]
+
+# Words of the filler text, and the phrases search queries are made of
+WORDS = (
+    "market demand growth customers pricing revenue margin channel competitors retail online segment "
+    "adoption survey share trend supply cost brand subscription regulation compliance partners launch "
+    "region forecast strategy premium retention acquisition analysis industry consumers product"
+).split()
+QUERY_ASPECTS = ["market size", "statistics", "case studies", "pricing", "competitors", "regulations"]
+
+# Words streamed per text delta event
+STREAM_CHUNK_WORDS = 4
+
+
+@dataclass
+class LLMProfile:
+    """How the fake model behaves: its speed, reply lengths and the shape of the plans it writes."""
+
+    latency: float = 0.05  # Seconds before the first output token
+    tokens_per_second: float = 500.0  # Output token rate (<= 0 for instant output)
+    output_tokens: int = 150  # Length of text replies (summaries, sections, ...)
+    research_areas: int = 4
+    questions_per_area: int = 2
+    queries_per_question: int = 3
+
+
+@dataclass
+class Reply:
+    """A scripted model reply: a function call, or a text message."""
+
+    text: str = ""
+    tool: Optional[str] = None
+    arguments: Optional[Dict[str, Any]] = None
+
+
+def _text_of(content: Any) -> str:
+    """Text of an input message's content (a string or a list of content parts)."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return ""
+
+
+def _current_turn(items: List[Dict[str, Any]]) -> Tuple[str, List[Dict[str, Any]]]:
+    """The latest user message of a request's input, and the items that followed it."""
+    for index in range(len(items) - 1, -1, -1):
+        item = items[index]
+        if item.get("role") == "user" and item.get("type", "message") == "message":
+            return _text_of(item.get("content")), items[index + 1:]
+    return "", items
+
+
+def request_digest(instructions: str, items: List[Dict[str, Any]]) -> str:
+    """Digest of a request, which seeds its reply and ids so that identical runs get identical replies."""
+    return hashlib.sha256(f"{instructions}\x1f{json.dumps(items, sort_keys=True, default=str)}".encode()).hexdigest()
+
+
+def count_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)."""
+    return max(1, len(text) // 4)
+
+
+def filler_text(rng: random.Random, tokens: int, citations: int = 0) -> str:
+    """Filler prose of about the given number of tokens, citing sources 1..citations."""
+    sentences = []
+    # The words average about two tokens
+    remaining = max(1, tokens // 2)
+    while remaining > 0:
+        length = min(remaining, rng.randint(10, 18))
+        words = [rng.choice(WORDS) for _ in range(length - 3)]
+        sentence = f"{' '.join(words).capitalize()} rose {rng.randint(2, 60)}% in {rng.randint(2019, 2025)}"
+        if citations:
+            sentence += f" [{rng.randint(1, citations)}]"
+        sentences.append(sentence + ".")
+        remaining -= length
+    return " ".join(sentences)
+
+
+class ScriptedAgents:
+    """Decides the reply of each request from the agent that sent it."""
+
+    def __init__(self, profile: LLMProfile):
+        self.profile = profile
+
+    def reply(self, instructions: str, items: List[Dict[str, Any]], tools: List[str]) -> Reply:
+        """
+        Script the reply to a request.
+
+        Args:
+            instructions: The request's system instructions
+            items: The request's input items
+            tools: Names of the request's function tools (handoffs included)
+
+        Returns:
+            The reply
+        """
+        user_message, turn = _current_turn(items)
+        called: Set[str] = {item["name"] for item in turn if item.get("type") == "function_call"}
+        rng = random.Random(request_digest(instructions, items))
+
+        if "transfer_to_research_agent" in tools:
+            # Coordinator Agent: finalize an approved plan and hand off to research, otherwise to planning
+            if is_plan_approval(user_message):
+                script = [
+                    ("set_state", {"state": "plan_finalized", "value": True}),
+                    ("clear_session", {}),
+                    ("transfer_to_research_agent", {}),
+                ]
+            else:
+                script = [("transfer_to_planner_agent", {})]
+            return self._next_call(script, called, "How would you like to continue?")
+        if "plan_writer_tool" in tools:
+            script = [
+                ("set_state", {"state": "has_enough_context", "value": True}),
+                ("plan_writer_tool", {}),
+                ("plan_summarizer_tool", {}),
+            ]
+            return self._next_call(script, called, "Here is the research plan. " + filler_text(rng, self.profile.output_tokens))
+        if "research_tool" in tools:
+            script = [("research_tool", {}), ("report_writer_tool", {})]
+            return self._next_call(script, called, "Here's the research report, let me know if you have any questions!")
+
+        if "You are the Plan Writer" in instructions:
+            return Reply(self._plan(rng))
+        if "search term generator" in instructions:
+            return Reply(self._queries(user_message))
+        if "Report Section Writer" in instructions:
+            area = re.search(r"Research area: (.+)", instructions)
+            sources = len(re.findall(r"^\[\d+\]", user_message, re.MULTILINE))
+            heading = f"### {area.group(1).strip()}\n\n" if area else ""
+            return Reply(heading + filler_text(rng, self.profile.output_tokens, sources))
+        return Reply(filler_text(rng, self.profile.output_tokens))
+
+    @staticmethod
+    def _next_call(script: List[Tuple[str, Dict[str, Any]]], called: Set[str], final_text: str) -> Reply:
+        """The first call of a script not made yet this turn, or the final message once all were made."""
+        for tool, arguments in script:
+            if tool not in called:
+                return Reply(tool=tool, arguments=arguments)
+        return Reply(final_text)
+
+    def _plan(self, rng: random.Random) -> str:
+        """A research plan in the Plan Writer's format."""
+        lines = [
+            "1. **Information**",
+            "- Product Name: Benchmark Product",
+            f"- Description: {filler_text(rng, 40)}",
+            "- Features & Scope: TBD",
+            "",
+            "2. **Research Areas**",
+        ]
+        for number in range(self.profile.research_areas):
+            area = PLAN_AREAS[number] if number < len(PLAN_AREAS) else f"Research Area {number + 1}"
+            lines += [
+                f"    - **{area}**",
+                f"        - Sub-topics: {', '.join(rng.sample(WORDS, 3))}",
+                f"        - Summary: {filler_text(rng, 25)}",
+                "        - Research Questions:",
+            ]
+            for question in range(self.profile.questions_per_area):
+                topic = " ".join(rng.sample(WORDS, 4))
+                lines.append(f"            - What does {area.lower()} show about {topic} (question {question + 1})?")
+        return "\n".join(lines)
+
+    def _queries(self, research_question: str) -> str:
+        """Comma-separated search queries for a research question."""
+        keywords = " ".join(word for word in re.findall(r"[a-z]+", research_question.lower()) if word in WORDS)
+        return ", ".join(
+            f"{keywords} {QUERY_ASPECTS[number % len(QUERY_ASPECTS)]} {number // len(QUERY_ASPECTS) or ''}".strip()
+            for number in range(self.profile.queries_per_question)
+        )
+
+
+class FakeResponses:
+    """The Responses API endpoint: builds response objects and paces them like a real model."""
+
+    def __init__(self, profile: LLMProfile):
+        self.profile = profile
+        self.agents = ScriptedAgents(profile)
+
+    @staticmethod
+    def _output_item(reply: Reply, item_id: str) -> Dict[str, Any]:
+        """The output item of a reply."""
+        if reply.tool:
+            return {
+                "type": "function_call",
+                "id": f"fc_{item_id}",
+                "call_id": f"call_{item_id}",
+                "name": reply.tool,
+                "arguments": json.dumps(reply.arguments or {}),
+                "status": "completed",
+            }
+        return {
+            "type": "message",
+            "id": f"msg_{item_id}",
+            "role": "assistant",
+            "status": "completed",
+            "content": [{"type": "output_text", "text": reply.text, "annotations": []}],
+        }
+
+    @staticmethod
+    def _response(response_id: str, body: Dict[str, Any], output: List[Dict[str, Any]], usage: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "id": response_id,
+            "object": "response",
+            "created_at": time.time(),
+            "model": body.get("model", "gpt-4.1"),
+            "status": "completed" if usage else "in_progress",
+            "output": output,
+            "parallel_tool_calls": False,
+            "tool_choice": "auto",
+            "tools": [],
+            "usage": usage,
+        }
+
+    def _generation_time(self, output_tokens: int) -> float:
+        """Seconds to generate a number of output tokens."""
+        return output_tokens / self.profile.tokens_per_second if self.profile.tokens_per_second > 0 else 0.0
+
+    async def handle(self, request: Request) -> Response:
+        body = await request.json()
+        items = body.get("input") or []
+        if isinstance(items, str):
+            items = [{"role": "user", "content": items}]
+        instructions = body.get("instructions") or ""
+        tools = [tool.get("name", "") for tool in body.get("tools") or [] if tool.get("type") == "function"]
+
+        reply = self.agents.reply(instructions, items, tools)
+        digest = request_digest(instructions, items)[:24]
+        item = self._output_item(reply, digest)
+        input_tokens = count_tokens(instructions + json.dumps(items, default=str))
+        output_tokens = count_tokens(reply.text or item.get("arguments", ""))
+        usage = {
+            "input_tokens": input_tokens,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens": output_tokens,
+            "output_tokens_details": {"reasoning_tokens": 0},
+            "total_tokens": input_tokens + output_tokens,
+        }
+        response_id = f"resp_{digest}"
+
+        if body.get("stream"):
+            events = self._stream(response_id, body, item, reply, usage)
+            return StreamingResponse(events, media_type="text/event-stream")
+        await asyncio.sleep(self.profile.latency + self._generation_time(output_tokens))
+        return JSONResponse(self._response(response_id, body, [item], usage))
+
+    async def _stream(
+        self, response_id: str, body: Dict[str, Any], item: Dict[str, Any], reply: Reply, usage: Dict[str, Any]
+    ) -> AsyncIterator[str]:
+        """Server-sent events of a streamed response, with text deltas paced at the output token rate."""
+        sequence = itertools.count()
+
+        def event(data: Dict[str, Any]) -> str:
+            data["sequence_number"] = next(sequence)
+            return f"event: {data['type']}\ndata: {json.dumps(data)}\n\n"
+
+        yield event({"type": "response.created", "response": self._response(response_id, body, [], None)})
+        await asyncio.sleep(self.profile.latency)
+
+        pending = dict(item, status="in_progress")
+        if reply.tool:
+            pending["arguments"] = ""
+            yield event({"type": "response.output_item.added", "output_index": 0, "item": pending})
+            yield event({"type": "response.function_call_arguments.delta", "item_id": item["id"], "output_index": 0, "delta": item["arguments"]})
+            yield event({"type": "response.function_call_arguments.done", "item_id": item["id"], "output_index": 0, "arguments": item["arguments"]})
+        else:
+            part = {"type": "output_text", "text": "", "annotations": []}
+            pending["content"] = []
+            yield event({"type": "response.output_item.added", "output_index": 0, "item": pending})
+            yield event({"type": "response.content_part.added", "item_id": item["id"], "output_index": 0, "content_index": 0, "part": part})
+            words = re.findall(r"\S+\s*", reply.text)
+            for start in range(0, len(words), STREAM_CHUNK_WORDS):
+                chunk = "".join(words[start:start + STREAM_CHUNK_WORDS])
+                await asyncio.sleep(self._generation_time(count_tokens(chunk)))
+                yield event({
+                    "type": "response.output_text.delta", "item_id": item["id"], "output_index": 0,
+                    "content_index": 0, "delta": chunk, "logprobs": [],
+                })
+            yield event({"type": "response.output_text.done", "item_id": item["id"], "output_index": 0, "content_index": 0, "text": reply.text, "logprobs": []})
+            yield event({"type": "response.content_part.done", "item_id": item["id"], "output_index": 0, "content_index": 0, "part": dict(part, text=reply.text)})
+        yield event({"type": "response.output_item.done", "output_index": 0, "item": item})
+        yield event({"type": "response.completed", "response": self._response(response_id, body, [item], usage)})
+
+
+def create_app(profile: Optional[LLMProfile] = None) -> Starlette:
+    """Create the fake model server's app (base URL for clients: <server>/v1)."""
+    responses = FakeResponses(profile or LLMProfile())
+    return Starlette(routes=[Route("/v1/responses", responses.handle, methods=["POST"])])
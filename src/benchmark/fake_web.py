@@ -0,0 +1,95 @@
+"""
+Fixture web for offline benchmarks: generated pages served locally, and a search backend that finds them.
+
+Pages are generated deterministically from their site and page number, so every
+run of a benchmark scrapes the same content. Each site is served on its own
+port (at /sites/<site>/pages/<page>), so the fetch engine's per-host connection
+limits apply as they would on the real web. The search backend maps every query
+to a stable set of pages.
+"""
+
+import asyncio
+import hashlib
+import random
+from dataclasses import dataclass
+from typing import List
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import HTMLResponse, Response
+from starlette.routing import Route
+
+from src.benchmark.fake_openai import WORDS, filler_text
+from src.tools.search_backend import SearchBackend, SearchResult
+
+
+@dataclass
+class WebProfile:
+    """How the fixture web behaves: its size, page length and response time."""
+
+    sites: int = 8
+    pages_per_site: int = 50
+    paragraphs: int = 12  # Paragraphs of main content per page
+    paragraph_tokens: int = 80
+    latency: float = 0.02  # Seconds to serve a page
+    search_latency: float = 0.1  # Seconds to answer a search
+
+
+def page_title(site: int, page: int) -> str:
+    """Title of a fixture page."""
+    topic = " ".join(random.Random(f"{site}/{page}/title").sample(WORDS, 3)).title()
+    return f"{topic} Report {page} - Site {site}"
+
+
+def render_page(site: int, page: int, profile: WebProfile) -> str:
+    """The HTML of a fixture page, with navigation and footer boilerplate around the main content."""
+    rng = random.Random(f"{site}/{page}")
+    title = page_title(site, page)
+    paragraphs = "\n".join(f"<p>{filler_text(rng, profile.paragraph_tokens)}</p>" for _ in range(profile.paragraphs))
+    return (
+        f"<!DOCTYPE html><html><head><title>{title}</title>"
+        "<script>window.analytics = [];</script><style>body { margin: 0 }</style></head><body>"
+        f"<nav><a href='/sites/{site}'>Home</a> <a href='/sites/{site}/pages/{page + 1}'>Next</a></nav>"
+        f"<main><article><h1>{title}</h1>\n{paragraphs}\n</article></main>"
+        f"<aside>Subscribe to our newsletter</aside><footer>Copyright Site {site}</footer></body></html>"
+    )
+
+
+def create_app(profile: WebProfile) -> Starlette:
+    """Create the fixture web's app, serving GET /sites/{site}/pages/{page}."""
+
+    async def page(request: Request) -> Response:
+        site, number = request.path_params["site"], request.path_params["page"]
+        if site >= profile.sites or number >= profile.pages_per_site:
+            return HTMLResponse("<html><body>Not found</body></html>", status_code=404)
+        await asyncio.sleep(profile.latency)
+        return HTMLResponse(render_page(site, number, profile), headers={"Cache-Control": "max-age=3600"})
+
+    return Starlette(routes=[Route("/sites/{site:int}/pages/{page:int}", page)])
+
+
+class FixtureWebSearch(SearchBackend):
+    """Search backend over the fixture web: every query finds a stable, query-dependent set of its pages."""
+
+    name = "fixture-web"
+
+    def __init__(self, site_urls: List[str], profile: WebProfile):
+        """
+        Initialize the backend.
+
+        Args:
+            site_urls: Base URLs of the fixture sites (http://<host>:<port>/sites/<site>), in site order
+            profile: The fixture web's profile
+        """
+        self.site_urls = site_urls
+        self.profile = profile
+
+    async def search(self, query: str, max_results: int) -> List[SearchResult]:
+        await asyncio.sleep(self.profile.search_latency)
+        rng = random.Random(hashlib.sha256(" ".join(query.casefold().split()).encode("utf-8")).digest())
+        total = len(self.site_urls) * self.profile.pages_per_site
+        results = []
+        for number in rng.sample(range(total), min(max_results, total)):
+            site, page = divmod(number, self.profile.pages_per_site)
+            results.append(SearchResult(url=f"{self.site_urls[site]}/pages/{page}", title=page_title(site, page)))
+        return results
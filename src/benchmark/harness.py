@@ -0,0 +1,266 @@
+"""
+Offline end-to-end benchmark of the research flow.
+
+Runs research sessions concurrently through the Manager, two turns each: the
+brief, which the Planner Agent turns into a research plan, and the plan's
+approval, after which the Research Agent researches the plan and writes the
+report. Model calls go to a fake OpenAI-compatible server and searches and
+scrapes to a fixture web (see src.benchmark.servers), so no network is used and
+runs are reproducible. Set DEEP_RESEARCH_ROUTER_ENABLED=false to route every
+turn through the Coordinator Agent as well.
+
+Reports the wall time, the calls and p50/p95 latencies of every stage (from the
+tracing spans), the model requests and tokens of every agent and the peak RSS,
+and compares them with a baseline results file: the exit code is 1 if a session
+failed or a metric regressed beyond --max-regression (wall time, peak RSS) or
+--max-stage-regression (stage p50 latencies), so CI can gate on it.
+
+The benchmark configures the process it runs in, so run it on its own:
+    python -m src.benchmark --sessions 4 --output benchmark.json
+    python -m src.benchmark --sessions 4 --baseline benchmark.json --max-regression 0.25
+"""
+
+import argparse
+import asyncio
+import atexit
+import contextlib
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Dict, List, Optional
+
+# Keep the benchmark's caches and reports out of the user's, and start every run cold:
+# settings are read when the modules below are imported, so this comes first
+SCRATCH_DIR = Path(tempfile.mkdtemp(prefix="deep-research-benchmark-"))
+atexit.register(shutil.rmtree, SCRATCH_DIR, ignore_errors=True)
+os.environ["DEEP_RESEARCH_CACHE_DIR"] = str(SCRATCH_DIR / "cache")
+os.environ["DEEP_RESEARCH_REPORTS_DIR"] = str(SCRATCH_DIR / "reports")
+os.environ["DEEP_RESEARCH_RESEARCH_STORE_ENABLED"] = "false"
+
+from agents import set_default_openai_client, set_tracing_disabled
+from openai import AsyncOpenAI
+
+from src.agent_memory import close_agent_memory
+from src.benchmark.fake_openai import LLMProfile
+from src.benchmark.fake_web import FixtureWebSearch, WebProfile
+from src.benchmark.servers import benchmark_servers
+from src.globals import SEARCH_CACHE_ENABLED
+from src.llm_scheduler import LLM_SCHEDULER
+from src.manager import Manager
+from src.tools.search_backend import CachedSearchBackend, set_search_backend
+from src.tracing import TRACER, format_stage_stats, stage_stats
+from src.usage import USAGE_LEDGER, format_usage
+
+resource: Optional[ModuleType]
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# The turns of every session: a brief with all the context the Planner Agent asks for, then the plan's approval
+BRIEF = (
+    "I want to research {product}: an eco-friendly phone case brand sold online through drop-shipping. "
+    "Target audience: environmentally conscious smartphone owners aged 18-35. "
+    "Research focuses: pricing, competitors and marketing channels. Business goal: reach $500k revenue in two years. "
+    "That's all the context, please write the research plan."
+)
+APPROVAL = "Yes, looks good"
+
+# Stages with fewer calls, or faster at p50, in the baseline are too noisy to gate on:
+# the latency of short CPU-bound stages (parse, prefilter) is mostly thread scheduling
+MIN_GATED_CALLS = 20
+MIN_GATED_SECONDS = 0.1
+
+
+async def run_session(number: int) -> Optional[str]:
+    """
+    Run one research session from brief to report.
+
+    Args:
+        number: Number of the session (its session id is benchmark-<number>)
+
+    Returns:
+        None if the session produced a report, otherwise the error
+    """
+    manager = Manager(f"benchmark-{number}")
+    try:
+        await manager.handle_turn(BRIEF.format(product=f"Benchmark Case {number}"))
+        await manager.handle_turn(APPROVAL)
+        if not manager.memory.report_generated:
+            return "No report was generated"
+        return None
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+    finally:
+        close_agent_memory(manager.memory.session_id)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB (None where it can't be measured)."""
+    if resource is None:
+        return None
+    peak: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def run_benchmark(sessions: int, llm_profile: LLMProfile, web_profile: WebProfile, urls: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run research sessions concurrently against running benchmark servers.
+
+    Args:
+        sessions: Number of sessions
+        llm_profile: Behavior of the fake model server
+        web_profile: Behavior of the fixture web
+        urls: The servers' URLs (from benchmark_servers)
+
+    Returns:
+        The results: configuration, wall time, failures, peak RSS, stats per stage and usage per agent
+    """
+    set_tracing_disabled(True)
+    client = AsyncOpenAI(base_url=urls["llm"], api_key="benchmark")
+    set_default_openai_client(client, use_for_tracing=False)
+    LLM_SCHEDULER.use_openai_client(client)
+    search = FixtureWebSearch(urls["sites"], web_profile)
+    set_search_backend(CachedSearchBackend(search) if SEARCH_CACHE_ENABLED else search)
+    TRACER.enabled = True
+    TRACER.clear()
+    USAGE_LEDGER.clear()
+
+    start = time.monotonic()
+    errors = await asyncio.gather(*(run_session(number) for number in range(sessions)))
+    wall_time = time.monotonic() - start
+
+    return {
+        "config": {"sessions": sessions, "llm": asdict(llm_profile), "web": asdict(web_profile)},
+        "wall_time": wall_time,
+        "sessions_per_minute": sessions * 60 / wall_time,
+        "failed": [f"benchmark-{number}: {error}" for number, error in enumerate(errors) if error],
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": stage_stats(TRACER.to_records()),
+        "agents": {agent: usage.to_dict() for (agent,), usage in USAGE_LEDGER.summarize(("agent",)).items()},
+    }
+
+
+def compare(
+    results: Dict[str, Any],
+    baseline: Dict[str, Any],
+    max_regression: float,
+    max_stage_regression: float,
+) -> List[str]:
+    """
+    Find the metrics that regressed beyond a threshold against a baseline.
+
+    Gated metrics: wall time and peak RSS, and the p50 latency of every stage the
+    baseline also has (unless it had too few calls or was too fast in the baseline
+    to measure reliably). Stage latencies vary more between runs, so they have
+    their own threshold, and are gated at p50 since p95 is a handful of calls.
+
+    Args:
+        results: Results of this run
+        baseline: Results of the baseline run
+        max_regression: Largest allowed relative increase of the wall time and peak RSS (0.25 = 25% slower or bigger)
+        max_stage_regression: Largest allowed relative increase of a stage's p50 latency
+
+    Returns:
+        A description of every regression
+    """
+    metrics = [("wall time", results["wall_time"], baseline["wall_time"], "s", max_regression)]
+    if results.get("peak_rss_mb") and baseline.get("peak_rss_mb"):
+        metrics.append(("peak RSS", results["peak_rss_mb"], baseline["peak_rss_mb"], " MB", max_regression))
+    for name, stage in sorted(results["stages"].items()):
+        before = baseline["stages"].get(name)
+        if before and before["count"] >= MIN_GATED_CALLS and before["p50"] >= MIN_GATED_SECONDS:
+            metrics.append((f"{name} p50", stage["p50"], before["p50"], "s", max_stage_regression))
+
+    return [
+        f"{name} regressed {(value - before) / before:+.0%} ({value:.3f}{unit} vs {before:.3f}{unit})"
+        for name, value, before, unit, threshold in metrics
+        if before > 0 and value > before * (1 + threshold)
+    ]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmark from the command line; returns the exit code."""
+    llm_defaults, web_defaults = LLMProfile(), WebProfile()
+    parser = argparse.ArgumentParser(prog="python -m src.benchmark", description="Benchmark the research flow offline.")
+    parser.add_argument("--sessions", type=int, default=2, help="research sessions run concurrently")
+    parser.add_argument("--latency", type=float, default=llm_defaults.latency, help="model seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=llm_defaults.tokens_per_second, help="model output token rate (0 = instant)")
+    parser.add_argument("--output-tokens", type=int, default=llm_defaults.output_tokens, help="length of model text replies")
+    parser.add_argument("--areas", type=int, default=llm_defaults.research_areas, help="research areas per plan")
+    parser.add_argument("--questions", type=int, default=llm_defaults.questions_per_area, help="research questions per area")
+    parser.add_argument("--queries", type=int, default=llm_defaults.queries_per_question, help="search queries per question")
+    parser.add_argument("--sites", type=int, default=web_defaults.sites, help="fixture web sites (one port each)")
+    parser.add_argument("--pages", type=int, default=web_defaults.pages_per_site, help="pages per fixture site")
+    parser.add_argument("--paragraphs", type=int, default=web_defaults.paragraphs, help="paragraphs per page")
+    parser.add_argument("--page-latency", type=float, default=web_defaults.latency, help="seconds to serve a page")
+    parser.add_argument("--search-latency", type=float, default=web_defaults.search_latency, help="seconds to answer a search")
+    parser.add_argument("--output", type=Path, help="write the results to this JSON file")
+    parser.add_argument("--baseline", type=Path, help="results JSON file to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="largest allowed wall time and peak RSS regression")
+    parser.add_argument("--max-stage-regression", type=float, default=0.5, help="largest allowed stage p50 regression")
+    parser.add_argument("--trace-dir", type=Path, help="also export the run's trace to this directory")
+    parser.add_argument("--verbose", action="store_true", help="show the agents' output")
+    args = parser.parse_args(argv)
+
+    llm_profile = LLMProfile(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        output_tokens=args.output_tokens,
+        research_areas=args.areas,
+        questions_per_area=args.questions,
+        queries_per_question=args.queries,
+    )
+    web_profile = WebProfile(
+        sites=args.sites,
+        pages_per_site=args.pages,
+        paragraphs=args.paragraphs,
+        latency=args.page_latency,
+        search_latency=args.search_latency,
+    )
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline else None
+
+    print(f"🚀 Benchmark: Running {args.sessions} sessions against the fake model server and fixture web")
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+    with benchmark_servers(llm_profile, web_profile) as urls:
+        with open(os.devnull, "w") as quiet, contextlib.redirect_stdout(sys.stdout if args.verbose else quiet):
+            results = asyncio.run(run_benchmark(args.sessions, llm_profile, web_profile, urls))
+
+    rss = f"{results['peak_rss_mb']:.0f} MB" if results["peak_rss_mb"] else "n/a"
+    print(
+        f"\n🏁 Benchmark: {args.sessions} sessions in {results['wall_time']:.2f}s "
+        f"({results['sessions_per_minute']:.1f}/min), {len(results['failed'])} failed, peak RSS {rss}\n"
+    )
+    print(format_stage_stats(results["stages"], baseline["stages"] if baseline else None))
+    print()
+    print(format_usage(USAGE_LEDGER.summarize(("agent",)), ("agent",)))
+    for failure in results["failed"]:
+        print(f"❌ Benchmark: {failure}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"\n💾 Benchmark: Wrote the results to {args.output}")
+    if args.trace_dir:
+        jsonl_path, chrome_path = TRACER.export(args.trace_dir)
+        print(f"📊 Benchmark: Wrote the trace to {jsonl_path} and {chrome_path}")
+
+    regressions = []
+    if baseline:
+        if baseline.get("config") != results["config"]:
+            print("⚠️ Benchmark: The baseline was run with a different configuration")
+        regressions = compare(results, baseline, args.max_regression, args.max_stage_regression)
+        for regression in regressions:
+            print(f"📉 Benchmark: {regression}")
+        if not regressions:
+            print(f"✅ Benchmark: No regressions against {args.baseline}")
+    return 1 if results["failed"] or regressions else 0
@@ -0,0 +1,109 @@
+"""
+Process serving the fake model server and the fixture web of a benchmark.
+
+The servers run in their own process, so their work never shows up in the
+benchmark's timings or memory. The model server and every fixture site listen
+on their own port of 127.0.0.1; once they are listening, the process prints
+their URLs as one JSON line: {"llm": <OpenAI base URL>, "sites": [<site URL>, ...]}.
+
+Usage:
+    python -m src.benchmark.servers --llm '{"latency": 0.1}' --web '{"sites": 4}'
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import subprocess
+import sys
+from contextlib import contextmanager
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import uvicorn
+from starlette.applications import Starlette
+
+from src.benchmark import fake_openai, fake_web
+from src.benchmark.fake_openai import LLMProfile
+from src.benchmark.fake_web import WebProfile
+
+# Directory python -m must run from for the src package to be importable
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _listen() -> socket.socket:
+    """Open a listening socket on a free port of 127.0.0.1."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(2048)
+    return sock
+
+
+async def serve(llm_profile: LLMProfile, web_profile: WebProfile) -> None:
+    """Serve the fake model server and the fixture sites until the process is stopped."""
+    sockets = [_listen() for _ in range(1 + web_profile.sites)]
+    base_urls = [f"http://127.0.0.1:{sock.getsockname()[1]}" for sock in sockets]
+    app = Starlette(routes=[*fake_openai.create_app(llm_profile).routes, *fake_web.create_app(web_profile).routes])
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning", access_log=False, lifespan="off"))
+
+    print(json.dumps({
+        "llm": f"{base_urls[0]}/v1",
+        "sites": [f"{base_url}/sites/{site}" for site, base_url in enumerate(base_urls[1:])],
+    }), flush=True)
+    await server.serve(sockets=sockets)
+
+
+@contextmanager
+def benchmark_servers(llm_profile: LLMProfile, web_profile: WebProfile, timeout: float = 30) -> Iterator[Dict[str, Any]]:
+    """
+    Run the benchmark servers in a child process for the duration of the block.
+
+    Args:
+        llm_profile: Behavior of the fake model server
+        web_profile: Behavior of the fixture web
+        timeout: Seconds to wait for the servers to stop
+
+    Yields:
+        The servers' URLs: {"llm": <OpenAI base URL>, "sites": [<site URL>, ...]}
+
+    Raises:
+        RuntimeError: If the servers could not be started
+    """
+    command = [
+        sys.executable, "-m", "src.benchmark.servers",
+        "--llm", json.dumps(asdict(llm_profile)),
+        "--web", json.dumps(asdict(web_profile)),
+    ]
+    process = subprocess.Popen(command, cwd=PROJECT_ROOT, stdout=subprocess.PIPE, text=True)
+    assert process.stdout is not None  # stdout=PIPE
+    stdout = process.stdout
+    try:
+        line = stdout.readline()
+        if not line:
+            raise RuntimeError(f"The benchmark servers exited before listening (exit code {process.wait()})")
+        yield json.loads(line)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        stdout.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Serve the benchmark servers from the command line."""
+    parser = argparse.ArgumentParser(prog="python -m src.benchmark.servers", description="Serve a benchmark's fake model server and fixture web.")
+    parser.add_argument("--llm", type=json.loads, default={}, help="LLMProfile fields as JSON")
+    parser.add_argument("--web", type=json.loads, default={}, help="WebProfile fields as JSON")
+    args = parser.parse_args(argv)
+
+    asyncio.run(serve(LLMProfile(**args.llm), WebProfile(**args.web)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:['-][a-z0-9]+)*")
+
+# Very common English words that carry no relevance signal
+STOPWORDS = frozenset(
+    """
+    a an and are as at be but by for from has have how in is it its of on or
+    that the their there these this to was were what when where which who why
+    will with would can do does did about into than then them they we you your
+    our i me my not no so if also any all more most other some such
+    """.split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split a text into lowercase terms for lexical scoring, dropping stopwords.
+
+    Args:
+        text: str - the text to tokenize
+
+    Returns:
+        List of terms
+    """
+    return [term for term in _TOKEN_RE.findall(text.lower()) if term not in STOPWORDS and len(term) > 1]
+
+
+class BM25Index:
+    """
+    Incremental Okapi BM25 index over short documents (passages, summaries).
+
+    Documents are identified by the order they were added in. Statistics are
+    updated on every add, so the index can grow while it is being queried.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize an empty index.
+
+        Args:
+            k1: Term frequency saturation
+            b: Document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self._doc_lengths: List[int] = []
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def add_document(self, text: str) -> int:
+        """
+        Add a document to the index.
+
+        Args:
+            text: str - the document text
+
+        Returns:
+            The document id
+        """
+        doc_id = len(self._doc_lengths)
+        terms = tokenize(text)
+        for term, frequency in Counter(terms).items():
+            self._postings[term][doc_id] = frequency
+        self._doc_lengths.append(len(terms))
+        self._total_length += len(terms)
+        return doc_id
+
+    def scores(self, query: str) -> List[float]:
+        """
+        Score every document against a query.
+
+        Args:
+            query: str - the query text
+
+        Returns:
+            BM25 score of each document, indexed by document id
+        """
+        scores = [0.0] * len(self._doc_lengths)
+        if not self._doc_lengths:
+            return scores
+
+        doc_count = len(self._doc_lengths)
+        average_length = self._total_length / doc_count or 1.0
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, frequency in postings.items():
+                length_norm = 1 - self.b + self.b * self._doc_lengths[doc_id] / average_length
+                scores[doc_id] += idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+        return scores
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """
+        Get the k best-matching documents for a query.
+
+        Args:
+            query: str - the query text
+            k: int - the number of results
+
+        Returns:
+            (document id, score) pairs for documents with a positive score, best first
+        """
+        scores = self.scores(query)
+        ranked = sorted((doc_id for doc_id, score in enumerate(scores) if score > 0), key=lambda doc_id: -scores[doc_id])
+        return [(doc_id, scores[doc_id]) for doc_id in ranked[:k]]
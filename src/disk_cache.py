@@ -0,0 +1,222 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional
+
+
+class CacheEntry(NamedTuple):
+    """A value read from a DiskCache."""
+
+    key: str
+    value: bytes
+    tag: Optional[str]
+    created_at: float
+    expires_at: Optional[float]
+
+    @property
+    def is_fresh(self) -> bool:
+        """Whether the entry is still within its TTL."""
+        return self.expires_at is None or self.expires_at > time.time()
+
+
+class DiskCache:
+    """
+    Persistent key-value cache stored in a SQLite file.
+
+    Entries expire after a TTL and the cache is bounded in size: once the stored
+    values exceed max_bytes, the least recently used entries are evicted. Entries
+    can carry a tag (e.g. a prompt version) so a whole generation can be invalidated
+    at once. Access is thread-safe; the a* methods run the same operations in a
+    worker thread so callers on the event loop never block on disk I/O.
+    """
+
+    def __init__(self, path: Path, max_bytes: int, default_ttl: Optional[float] = None):
+        """
+        Initialize the cache, creating the database file if needed.
+
+        Args:
+            path: Path of the SQLite database file
+            max_bytes: Maximum total size of the stored values before LRU eviction
+            default_ttl: Default time-to-live in seconds (None = never expires)
+        """
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+
+        # Counters for cache effectiveness
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                tag TEXT,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                expires_at REAL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_tag ON entries (tag)")
+
+    def get(self, key: str, allow_stale: bool = False) -> Optional[CacheEntry]:
+        """
+        Get an entry and mark it as recently used.
+
+        Args:
+            key: The cache key
+            allow_stale: Return expired entries too (e.g. for HTTP revalidation)
+
+        Returns:
+            The entry, or None on a miss
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, tag, created_at, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            entry = CacheEntry(key, row[0], row[1], row[2], row[3])
+            if not entry.is_fresh:
+                if not allow_stale:
+                    self.misses += 1
+                    return None
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            return entry
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None, tag: Optional[str] = None) -> None:
+        """
+        Store a value, evicting least recently used entries if the cache is full.
+
+        Args:
+            key: The cache key
+            value: The value to store
+            ttl: Time-to-live in seconds (defaults to default_ttl)
+            tag: Optional tag for bulk invalidation
+        """
+        now = time.time()
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = now + ttl if ttl is not None else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, tag, size, created_at, accessed_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, value, tag, len(value), now, now, expires_at),
+            )
+            self._evict()
+
+    def touch(self, key: str, ttl: Optional[float] = None) -> None:
+        """
+        Renew the TTL of an entry (e.g. after a successful revalidation).
+
+        Args:
+            key: The cache key
+            ttl: New time-to-live in seconds (defaults to default_ttl)
+        """
+        now = time.time()
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = now + ttl if ttl is not None else None
+        with self._lock:
+            self._conn.execute(
+                "UPDATE entries SET accessed_at = ?, expires_at = ? WHERE key = ?", (now, expires_at, key)
+            )
+
+    def delete(self, key: str) -> None:
+        """Delete an entry."""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def invalidate_tag(self, tag: Optional[str] = None, keep_tag: Optional[str] = None) -> int:
+        """
+        Delete every entry with a given tag, or every entry without a given tag.
+
+        Args:
+            tag: Delete entries with this tag
+            keep_tag: Delete entries whose tag differs from this one
+
+        Returns:
+            Number of deleted entries
+        """
+        with self._lock:
+            if keep_tag is not None:
+                cursor = self._conn.execute(
+                    "DELETE FROM entries WHERE tag IS NULL OR tag != ?", (keep_tag,)
+                )
+            else:
+                cursor = self._conn.execute("DELETE FROM entries WHERE tag IS ?", (tag,))
+            return cursor.rowcount
+
+    def clear(self) -> None:
+        """Delete every entry."""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and the current size of the cache."""
+        with self._lock:
+            count, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "evictions": self.evictions,
+            "entries": count,
+            "bytes": total_bytes,
+        }
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _evict(self) -> None:
+        """Evict least recently used entries until the cache fits in max_bytes. Caller holds the lock."""
+        (total_bytes,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if total_bytes <= self.max_bytes:
+            return
+
+        excess = total_bytes - self.max_bytes
+        evicted = []
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY accessed_at ASC"):
+            evicted.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+        self.evictions += len(evicted)
+
+    # Async wrappers that keep disk I/O off the event loop
+
+    async def aget(self, key: str, allow_stale: bool = False) -> Optional[CacheEntry]:
+        """Async version of get."""
+        return await asyncio.to_thread(self.get, key, allow_stale)
+
+    async def aset(self, key: str, value: bytes, ttl: Optional[float] = None, tag: Optional[str] = None) -> None:
+        """Async version of set."""
+        await asyncio.to_thread(self.set, key, value, ttl, tag)
+
+    async def atouch(self, key: str, ttl: Optional[float] = None) -> None:
+        """Async version of touch."""
+        await asyncio.to_thread(self.touch, key, ttl)
@@ -0,0 +1,104 @@
+"""
+Global configuration for the deep research agent.
+
+Every setting can be overridden with an environment variable of the same name
+prefixed with DEEP_RESEARCH_ (see .env.example).
+"""
+
+import os
+from pathlib import Path
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment."""
+    value = os.getenv(f"DEEP_RESEARCH_{name}")
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float setting from the environment."""
+    value = os.getenv(f"DEEP_RESEARCH_{name}")
+    return float(value) if value else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Read a boolean setting from the environment."""
+    value = os.getenv(f"DEEP_RESEARCH_{name}")
+    if not value:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Routing: pick the agent of a turn from the workflow state, calling the Coordinator Agent only when it's ambiguous
+ROUTER_ENABLED = _env_bool("ROUTER_ENABLED", True)
+
+# Web fetching
+FETCH_TIMEOUT = _env_float("FETCH_TIMEOUT", 10.0)
+FETCH_MAX_CONNECTIONS = _env_int("FETCH_MAX_CONNECTIONS", 100)
+FETCH_MAX_CONNECTIONS_PER_HOST = _env_int("FETCH_MAX_CONNECTIONS_PER_HOST", 6)
+FETCH_HTTP2 = _env_bool("FETCH_HTTP2", True)
+
+# Web search
+SEARCH_BACKEND = os.getenv("DEEP_RESEARCH_SEARCH_BACKEND", "ddgs")
+SEARCH_FIXTURES_PATH = os.getenv("DEEP_RESEARCH_SEARCH_FIXTURES_PATH")
+SEARCH_MAX_RESULTS = _env_int("SEARCH_MAX_RESULTS", 3)
+WEB_SEARCH_MAX_CONCURRENCY = _env_int("WEB_SEARCH_MAX_CONCURRENCY", 5)
+SEARCH_MAX_CONCURRENCY = _env_int("SEARCH_MAX_CONCURRENCY", 8)
+NEAR_DUPLICATE_MAX_DISTANCE = _env_int("NEAR_DUPLICATE_MAX_DISTANCE", 3)
+
+# Research
+QUESTION_MAX_CONCURRENCY = _env_int("QUESTION_MAX_CONCURRENCY", 8)
+BATCH_MAX_WORKERS = _env_int("BATCH_MAX_WORKERS", 4)
+
+# Model calls
+LLM_MAX_CONCURRENCY = _env_int("LLM_MAX_CONCURRENCY", 16)
+LLM_REQUESTS_PER_MINUTE = _env_float("LLM_REQUESTS_PER_MINUTE", 500)
+LLM_TOKENS_PER_MINUTE = _env_float("LLM_TOKENS_PER_MINUTE", 200_000)
+LLM_OUTPUT_TOKENS_ESTIMATE = _env_int("LLM_OUTPUT_TOKENS_ESTIMATE", 1000)
+LLM_MAX_RETRIES = _env_int("LLM_MAX_RETRIES", 5)
+LLM_BACKOFF_BASE = _env_float("LLM_BACKOFF_BASE", 1.0)
+LLM_BACKOFF_MAX = _env_float("LLM_BACKOFF_MAX", 60.0)
+
+# Summarization. Pages are cut to PREFILTER_TOKEN_BUDGET before they are summarized, and what is left is summarized
+# in chunks of SUMMARY_CHUNK_TOKENS, so the budget is twice the chunk size: short pages take one summary call and
+# long pages are cut to two chunks, summarized in parallel and combined
+SUMMARY_CHUNK_TOKENS = _env_int("SUMMARY_CHUNK_TOKENS", 3000)
+PREFILTER_ENABLED = _env_bool("PREFILTER_ENABLED", True)
+PREFILTER_TOKEN_BUDGET = _env_int("PREFILTER_TOKEN_BUDGET", 2 * SUMMARY_CHUNK_TOKENS)
+PREFILTER_PASSAGE_TOKENS = _env_int("PREFILTER_PASSAGE_TOKENS", 200)
+
+# Research store: plan, research dump, report, state and conversation history of sessions
+RESEARCH_STORE_ENABLED = _env_bool("RESEARCH_STORE_ENABLED", True)
+RESEARCH_DB_PATH = Path(os.getenv("DEEP_RESEARCH_RESEARCH_DB_PATH", "data/research.sqlite3"))
+
+# HTTP service: address, concurrently running jobs, progress events kept per session for reconnecting clients,
+# finished jobs kept for status requests, and seconds after which an idle session is unloaded
+SERVICE_HOST = os.getenv("DEEP_RESEARCH_SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = _env_int("SERVICE_PORT", 8000)
+SERVICE_MAX_WORKERS = _env_int("SERVICE_MAX_WORKERS", 4)
+SERVICE_EVENT_HISTORY = _env_int("SERVICE_EVENT_HISTORY", 1000)
+SERVICE_JOB_HISTORY = _env_int("SERVICE_JOB_HISTORY", 1000)
+SERVICE_SESSION_IDLE_SECONDS = _env_float("SERVICE_SESSION_IDLE_SECONDS", 60 * 60)
+
+# Usage accounting: JSON file of model prices overriding the built-in ones ({model: [input, cached input, output] USD per 1M tokens})
+MODEL_PRICES_PATH = os.getenv("DEEP_RESEARCH_MODEL_PRICES_PATH")
+
+# Tracing: timed spans of every stage, exported as JSON lines and Chrome trace files
+TRACING_ENABLED = _env_bool("TRACING_ENABLED", False)
+TRACE_DIR = Path(os.getenv("DEEP_RESEARCH_TRACE_DIR", "traces"))
+TRACE_MAX_SPANS = _env_int("TRACE_MAX_SPANS", 200_000)
+
+# Reports
+REPORTS_DIR = Path(os.getenv("DEEP_RESEARCH_REPORTS_DIR", "reports"))
+
+# On-disk caches
+CACHE_DIR = Path(os.getenv("DEEP_RESEARCH_CACHE_DIR", ".cache"))
+PAGE_CACHE_ENABLED = _env_bool("PAGE_CACHE_ENABLED", True)
+PAGE_CACHE_TTL = _env_float("PAGE_CACHE_TTL", 24 * 60 * 60)
+PAGE_CACHE_MAX_BYTES = _env_int("PAGE_CACHE_MAX_BYTES", 512 * 1024 * 1024)
+SUMMARY_CACHE_ENABLED = _env_bool("SUMMARY_CACHE_ENABLED", True)
+SUMMARY_CACHE_TTL = _env_float("SUMMARY_CACHE_TTL", 30 * 24 * 60 * 60)
+SUMMARY_CACHE_MAX_BYTES = _env_int("SUMMARY_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+SEARCH_CACHE_ENABLED = _env_bool("SEARCH_CACHE_ENABLED", True)
+SEARCH_CACHE_TTL = _env_float("SEARCH_CACHE_TTL", 24 * 60 * 60)
+SEARCH_CACHE_MAX_BYTES = _env_int("SEARCH_CACHE_MAX_BYTES", 16 * 1024 * 1024)
@@ -0,0 +1,499 @@
+import asyncio
+import dataclasses
+import heapq
+import itertools
+import logging
+import random
+import time
+from enum import IntEnum
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+import openai
+from agents import Agent, RunConfig, Runner
+from agents.models.interface import Model, ModelProvider
+from agents.models.multi_provider import MultiProvider
+from agents.result import RunResult, RunResultStreaming
+
+from src.globals import (
+    LLM_BACKOFF_BASE,
+    LLM_BACKOFF_MAX,
+    LLM_MAX_CONCURRENCY,
+    LLM_MAX_RETRIES,
+    LLM_OUTPUT_TOKENS_ESTIMATE,
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_TOKENS_PER_MINUTE,
+)
+from src.text_chunker import count_tokens
+from src.tracing import TRACER
+from src.usage import USAGE_HOOKS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Errors worth retrying without pausing other calls: timeouts, dropped connections and 5xx responses
+TRANSIENT_ERRORS = (openai.APIConnectionError, openai.InternalServerError)
+
+
+class Priority(IntEnum):
+    """Scheduling priority of a model call; lower values are admitted first."""
+
+    INTERACTIVE = 0  # User-facing agent turns
+    DEFAULT = 1  # Planning, query writing and report writing
+    BACKGROUND = 2  # Source summarization
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at a per-minute rate.
+
+    The level may go negative when a call used more than it reserved, which
+    delays the following calls until the debt is refilled.
+    """
+
+    def __init__(self, per_minute: float):
+        """
+        Initialize a full bucket.
+
+        Args:
+            per_minute: Refill rate and capacity (<= 0 disables the limit)
+        """
+        self.capacity = float(per_minute)
+        self._level = self.capacity
+        self._updated = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def _refill(self) -> None:
+        """Add the tokens earned since the last update."""
+        now = time.monotonic()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.capacity / 60)
+        self._updated = now
+
+    def delay(self, amount: float) -> float:
+        """Seconds until amount tokens are available (requests larger than the capacity wait for a full bucket)."""
+        if not self.enabled:
+            return 0.0
+        self._refill()
+        missing = min(amount, self.capacity) - self._level
+        return max(0.0, missing * 60 / self.capacity)
+
+    def consume(self, amount: float) -> None:
+        """Take tokens out of the bucket (a negative amount gives them back)."""
+        if not self.enabled:
+            return
+        self._refill()
+        self._level = min(self.capacity, self._level - amount)
+
+
+class _LoopState:
+    """Admission state bound to one event loop."""
+
+    def __init__(self):
+        self.condition = asyncio.Condition()
+        self.waiters: List[Tuple[int, int]] = []
+        self.active = 0
+
+
+class LLMScheduler:
+    """
+    Process-wide scheduler that every model call goes through.
+
+    Calls wait in a priority queue and are admitted one at a time, highest
+    priority first, once a concurrency slot is free and the requests-per-minute
+    and tokens-per-minute buckets can cover them. Token use is estimated up front
+    and corrected with the usage the provider reports. A 429 pauses admission
+    for every caller (honouring Retry-After when present) and the call is retried
+    with exponential backoff, so a rate limit doesn't turn into a retry storm.
+    Transient errors (timeouts, connection errors, 5xx) are retried with backoff
+    too, without the pause. The scheduler does all the retrying: the OpenAI
+    client of the default provider is created with max_retries=0.
+
+    Scheduling happens per model request rather than per agent run, so an agent
+    whose tools call other agents never holds a slot while its tools run.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        requests_per_minute: float = LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute: float = LLM_TOKENS_PER_MINUTE,
+        max_retries: int = LLM_MAX_RETRIES,
+        backoff_base: float = LLM_BACKOFF_BASE,
+        backoff_max: float = LLM_BACKOFF_MAX,
+        provider: Optional[ModelProvider] = None,
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_concurrency: Maximum number of model requests in flight
+            requests_per_minute: Request rate limit (<= 0 disables it)
+            tokens_per_minute: Token rate limit (<= 0 disables it)
+            max_retries: Retries of a call that keeps getting rate limited or failing transiently
+            backoff_base: First backoff delay in seconds, doubled on every retry
+            backoff_max: Longest backoff delay in seconds
+            provider: Model provider to wrap (defaults to the SDK's MultiProvider, with an OpenAI client that doesn't retry)
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._paused_until = 0.0
+        self._sequence = itertools.count()
+        self._state: Optional[_LoopState] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._provider = provider
+        self._providers: Dict[Priority, ScheduledModelProvider] = {}
+
+    @property
+    def provider(self) -> ModelProvider:
+        """The wrapped model provider, created on first use so the OpenAI client is only built when needed."""
+        if self._provider is None:
+            self.use_openai_client(openai.AsyncOpenAI())
+        assert self._provider is not None
+        return self._provider
+
+    def use_openai_client(self, client: openai.AsyncOpenAI) -> None:
+        """
+        Send model calls through an OpenAI client, with its own retries turned off.
+
+        Args:
+            client: The client (configured like the SDK's default client)
+        """
+        self._provider = MultiProvider(openai_client=client.with_options(max_retries=0))
+
+    def _get_state(self) -> _LoopState:
+        """Get the admission state for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._state is None or self._loop is not loop:
+            self._state = _LoopState()
+            self._loop = loop
+        return self._state
+
+    def _admission_delay(self, tokens: float) -> float:
+        """Seconds until a call of the given size can be admitted."""
+        return max(
+            self._paused_until - time.monotonic(),
+            self._requests.delay(1),
+            self._tokens.delay(tokens),
+        )
+
+    async def _acquire(self, priority: Priority, tokens: float) -> None:
+        """Wait for a concurrency slot and rate-limit budget, in priority order."""
+        state = self._get_state()
+        entry = (int(priority), next(self._sequence))
+        async with state.condition:
+            heapq.heappush(state.waiters, entry)
+            try:
+                while True:
+                    if state.waiters[0] == entry and state.active < self.max_concurrency:
+                        delay = self._admission_delay(tokens)
+                        if delay <= 0:
+                            break
+                        try:
+                            await asyncio.wait_for(state.condition.wait(), delay)
+                        except asyncio.TimeoutError:
+                            pass
+                    else:
+                        await state.condition.wait()
+            finally:
+                state.waiters.remove(entry)
+                heapq.heapify(state.waiters)
+                state.condition.notify_all()
+
+            self._requests.consume(1)
+            self._tokens.consume(tokens)
+            state.active += 1
+
+    async def _release(self) -> None:
+        """Free a concurrency slot and wake the waiting calls."""
+        state = self._get_state()
+        async with state.condition:
+            state.active -= 1
+            state.condition.notify_all()
+
+    def _reconcile(self, estimated_tokens: float, actual_tokens: Optional[int]) -> None:
+        """Correct the token bucket with the usage the provider reported."""
+        if actual_tokens:
+            self._tokens.consume(actual_tokens - estimated_tokens)
+
+    def _retry_delay(self, attempt: int) -> float:
+        """Exponential backoff with jitter before the given retry."""
+        return min(self.backoff_max, self.backoff_base * 2.0 ** attempt) * random.uniform(0.5, 1.0)
+
+    def _back_off(self, attempt: int, error: openai.RateLimitError) -> float:
+        """Pause admission after a 429 and return the pause in seconds."""
+        delay = None
+        response = getattr(error, "response", None)
+        if response is not None:
+            try:
+                delay = float(response.headers.get("retry-after", ""))
+            except ValueError:
+                delay = None
+        if delay is None:
+            delay = self._retry_delay(attempt)
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        logger.warning(f"Rate limited by the model provider, pausing model calls for {delay:.1f}s (attempt {attempt + 1})")
+        return delay
+
+    async def submit(
+        self,
+        call: Callable[[], Awaitable[T]],
+        priority: Priority = Priority.DEFAULT,
+        estimated_tokens: float = 0,
+        usage_of: Optional[Callable[[T], Optional[int]]] = None,
+    ) -> T:
+        """
+        Run a model call once it is admitted, retrying it on 429 and transient errors.
+
+        Args:
+            call: Factory for the call (invoked again on every retry)
+            priority: Scheduling priority of the call
+            estimated_tokens: Tokens reserved before the call
+            usage_of: Extracts the tokens actually used from the result
+
+        Returns:
+            The call's result
+        """
+        attempt = 0
+        retry_delay = 0.0
+        while True:
+            if retry_delay:
+                await asyncio.sleep(retry_delay)
+            waiting = time.monotonic()
+            await self._acquire(priority, estimated_tokens)
+            TRACER.current().add("queued", time.monotonic() - waiting)
+            try:
+                result = await call()
+            except openai.RateLimitError as e:
+                self._back_off(attempt, e)
+                TRACER.current().add("rate_limited", 1)
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                retry_delay = 0.0
+                continue
+            except TRANSIENT_ERRORS as e:
+                if attempt >= self.max_retries:
+                    raise
+                retry_delay = self._retry_delay(attempt)
+                logger.warning(f"Model call failed ({e}), retrying in {retry_delay:.1f}s (attempt {attempt + 1})")
+                attempt += 1
+                continue
+            finally:
+                await self._release()
+            self._reconcile(estimated_tokens, usage_of(result) if usage_of else None)
+            return result
+
+    async def stream(
+        self,
+        open_stream: Callable[[], AsyncIterator[T]],
+        priority: Priority = Priority.DEFAULT,
+        estimated_tokens: float = 0,
+        usage_of: Optional[Callable[[T], Optional[int]]] = None,
+    ) -> AsyncIterator[T]:
+        """
+        Stream a model call once it is admitted, holding its slot until the stream ends.
+
+        A 429 or transient error is retried only if it happens before the first event.
+
+        Args:
+            open_stream: Factory for the event stream (invoked again on every retry)
+            priority: Scheduling priority of the call
+            estimated_tokens: Tokens reserved before the call
+            usage_of: Extracts the tokens actually used from an event, if it reports them
+
+        Yields:
+            The stream's events
+        """
+        attempt = 0
+        retry_delay = 0.0
+        while True:
+            if retry_delay:
+                await asyncio.sleep(retry_delay)
+            await self._acquire(priority, estimated_tokens)
+            started = False
+            actual_tokens = None
+            try:
+                async for event in open_stream():
+                    started = True
+                    actual_tokens = (usage_of(event) if usage_of else None) or actual_tokens
+                    yield event
+            except openai.RateLimitError as e:
+                self._back_off(attempt, e)
+                if started or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                retry_delay = 0.0
+                continue
+            except TRANSIENT_ERRORS as e:
+                if started or attempt >= self.max_retries:
+                    raise
+                retry_delay = self._retry_delay(attempt)
+                logger.warning(f"Model stream failed ({e}), retrying in {retry_delay:.1f}s (attempt {attempt + 1})")
+                attempt += 1
+                continue
+            finally:
+                await self._release()
+            self._reconcile(estimated_tokens, actual_tokens)
+            return
+
+    def model_provider(self, priority: Priority = Priority.DEFAULT) -> "ScheduledModelProvider":
+        """Get a model provider whose models are scheduled at the given priority."""
+        if priority not in self._providers:
+            self._providers[priority] = ScheduledModelProvider(self, priority)
+        return self._providers[priority]
+
+    def _run_config(self, priority: Priority, run_config: Optional[RunConfig]) -> RunConfig:
+        """Route a run's model calls through the scheduler."""
+        return dataclasses.replace(run_config or RunConfig(), model_provider=self.model_provider(priority))
+
+    async def run(
+        self,
+        agent: Agent[Any],
+        input: Any,
+        priority: Priority = Priority.DEFAULT,
+        run_config: Optional[RunConfig] = None,
+        **kwargs: Any,
+    ) -> RunResult:
+        """
+        Runner.run with every model call of the run going through the scheduler.
+
+        The usage of the run's model responses is recorded in the usage ledger,
+        unless other run hooks are given.
+
+        Args:
+            agent: The agent to run
+            input: The agent input
+            priority: Scheduling priority of the run's model calls
+            run_config: Run configuration (its model provider is wrapped)
+            **kwargs: Passed on to Runner.run
+
+        Returns:
+            The run result
+        """
+        kwargs.setdefault("hooks", USAGE_HOOKS)
+        return await Runner.run(agent, input, run_config=self._run_config(priority, run_config), **kwargs)
+
+    def run_streamed(
+        self,
+        agent: Agent[Any],
+        input: Any,
+        priority: Priority = Priority.INTERACTIVE,
+        run_config: Optional[RunConfig] = None,
+        **kwargs: Any,
+    ) -> RunResultStreaming:
+        """
+        Runner.run_streamed with every model call of the run going through the scheduler.
+
+        The usage of the run's model responses is recorded in the usage ledger,
+        unless other run hooks are given.
+
+        Args:
+            agent: The agent to run
+            input: The agent input
+            priority: Scheduling priority of the run's model calls
+            run_config: Run configuration (its model provider is wrapped)
+            **kwargs: Passed on to Runner.run_streamed
+
+        Returns:
+            The streaming run result
+        """
+        kwargs.setdefault("hooks", USAGE_HOOKS)
+        return Runner.run_streamed(agent, input, run_config=self._run_config(priority, run_config), **kwargs)
+
+
+def _estimate_tokens(system_instructions: Optional[str], input: Any) -> int:
+    """Tokens to reserve for a model request: its prompt plus an output allowance."""
+    return count_tokens(f"{system_instructions or ''}\n{input}") + LLM_OUTPUT_TOKENS_ESTIMATE
+
+
+def _response_tokens(response: Any) -> Optional[int]:
+    """Total tokens of a ModelResponse."""
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", None)
+
+
+def _usage_attributes(response: Any) -> Dict[str, int]:
+    """Input and output tokens of a ModelResponse or Response, as span attributes."""
+    usage = getattr(response, "usage", None)
+    return {
+        "input_tokens": getattr(usage, "input_tokens", 0) or 0,
+        "output_tokens": getattr(usage, "output_tokens", 0) or 0,
+    }
+
+
+def _stream_event_tokens(event: Any) -> Optional[int]:
+    """Total tokens reported by the completed event of a response stream."""
+    if getattr(event, "type", None) != "response.completed":
+        return None
+    return _response_tokens(getattr(event, "response", None))
+
+
+class ScheduledModel(Model):
+    """Model wrapper that submits every request to an LLMScheduler."""
+
+    def __init__(self, model: Model, scheduler: LLMScheduler, priority: Priority, name: Optional[str] = None):
+        self._model = model
+        self._scheduler = scheduler
+        self._priority = priority
+        self._name = name
+
+    async def get_response(self, system_instructions, input, *args, **kwargs):
+        with TRACER.span("llm", model=self._name, priority=self._priority.name) as span:
+            response = await self._scheduler.submit(
+                lambda: self._model.get_response(system_instructions, input, *args, **kwargs),
+                self._priority,
+                _estimate_tokens(system_instructions, input),
+                _response_tokens,
+            )
+            span.set(**_usage_attributes(response))
+            return response
+
+    async def stream_response(self, system_instructions, input, *args, **kwargs):
+        # A generator can't hold the current span across its yields, so the span is ended explicitly
+        span = TRACER.start_span("llm.stream", model=self._name, priority=self._priority.name)
+        started = time.monotonic()
+        first_token = True
+        try:
+            async for event in self._scheduler.stream(
+                lambda: self._model.stream_response(system_instructions, input, *args, **kwargs),
+                self._priority,
+                _estimate_tokens(system_instructions, input),
+                _stream_event_tokens,
+            ):
+                event_type = getattr(event, "type", None)
+                if event_type == "response.output_text.delta" and first_token:
+                    span.set(first_token=time.monotonic() - started)
+                    first_token = False
+                elif event_type == "response.completed":
+                    span.set(**_usage_attributes(getattr(event, "response", None)))
+                yield event
+        except GeneratorExit:
+            raise
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            TRACER.end_span(span)
+
+
+class ScheduledModelProvider(ModelProvider):
+    """Model provider whose models are scheduled at a fixed priority."""
+
+    def __init__(self, scheduler: LLMScheduler, priority: Priority):
+        self._scheduler = scheduler
+        self._priority = priority
+
+    def get_model(self, model_name: Optional[str]) -> Model:
+        model = self._scheduler.provider.get_model(model_name)
+        return ScheduledModel(model, self._scheduler, self._priority, model_name)
+
+
+# Shared scheduler for every model call in the process
+LLM_SCHEDULER = LLMScheduler()
@@ -1,3 +1,4 @@
+import argparse
 import asyncio
 import os
 from pathlib import Path
@@ -7,10 +8,17 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from src.manager import Manager
+from src.tools.web_scraper.fetch_engine import close_fetch_engine
 
 
 async def main() -> None:
-    await Manager().run()
+    parser = argparse.ArgumentParser(prog="python -m src.main", description="Chat with the deep research assistant.")
+    parser.add_argument("--session", help="id of a session saved in the research store to resume (a new session by default)")
+    args = parser.parse_args()
+    try:
+        await Manager(args.session).run()
+    finally:
+        await close_fetch_engine()
 
 
 if __name__ == "__main__":
@@ -1,9 +1,9 @@
-from agents import Agent, function_tool
+from agents import Agent, RunContextWrapper, function_tool
 
 from src.main_agents.planner_agent import planner_agent
 from src.main_agents.research_agent import research_agent
 
-from src.agent_memory import AGENT_MEMORY
+from src.agent_memory import AgentMemory, agent_memory_from
 
 COORDINATOR_AGENT_PROMPT = """
     You are the Coordinator Agent, the top-level orchestrator, in a multi-agent deep research assistant.
@@ -55,28 +55,28 @@ COORDINATOR_AGENT_PROMPT = """
     """
 
 @function_tool
-def get_state(state: str) -> bool:
+def get_state(ctx: RunContextWrapper[AgentMemory], state: str) -> bool:
     """Get the state from the session.
     
     Args:
         state: str - the state to get (has_enough_context, plan_generated, plan_finalized, report_generated)
     """
-    return AGENT_MEMORY.get_state(state)
+    return agent_memory_from(ctx).get_state(state)
 
 @function_tool
-def set_state(state: str, value: bool) -> None:
+def set_state(ctx: RunContextWrapper[AgentMemory], state: str, value: bool) -> None:
     """Set the state in the session.
     
     Args:
         state: str - the state to set (plan_finalized)
         value: bool - the value to set the state to
     """
-    AGENT_MEMORY.set_state(state, value)
+    agent_memory_from(ctx).set_state(state, value)
 
 @function_tool
-async def clear_session() -> None:
+async def clear_session(ctx: RunContextWrapper[AgentMemory]) -> None:
     """Clear the session."""
-    await AGENT_MEMORY.clear_session()
+    await agent_memory_from(ctx).clear_session()
 
 coordinator_agent = Agent(
     name="Coordinator Agent",
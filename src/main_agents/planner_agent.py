@@ -1,9 +1,9 @@
-from agents import Agent, function_tool
+from agents import Agent, RunContextWrapper, function_tool
 
 from src.tool_agents.planner.plan_writer_tool import plan_writer_tool
 from src.tool_agents.planner.plan_summarizer_tool import plan_summarizer_tool
 
-from src.agent_memory import AGENT_MEMORY
+from src.agent_memory import AgentMemory, agent_memory_from
 
 PLANNER_AGENT_PROMPT = """
     You are the Planner Agent in a multi-agent deep research assistant.
@@ -38,23 +38,23 @@ PLANNER_AGENT_PROMPT = """
     """
 
 @function_tool
-def get_state(state: str) -> bool:
+def get_state(ctx: RunContextWrapper[AgentMemory], state: str) -> bool:
     """Get the state from the session.
     
     Args:
         state: str - the state to get (has_enough_context, plan_generated, plan_finalized, report_generated)
     """
-    return AGENT_MEMORY.get_state(state)
+    return agent_memory_from(ctx).get_state(state)
 
 @function_tool
-def set_state(state: str, value: bool) -> None:
+def set_state(ctx: RunContextWrapper[AgentMemory], state: str, value: bool) -> None:
     """Set the state in the session.
     
     Args:
         state: str - the state to set (has_enough_context)
         value: bool - the value to set the state to
     """
-    AGENT_MEMORY.set_state(state, value)
+    agent_memory_from(ctx).set_state(state, value)
 
 planner_agent = Agent(
     name="Planner Agent",
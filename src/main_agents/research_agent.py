@@ -2,7 +2,6 @@ from agents import Agent, function_tool
 
 from src.tool_agents.research.research_tool import research_tool
 from src.tool_agents.research.report_writer_tool import report_writer_tool
-from src.agent_memory import AGENT_MEMORY
 
 RESEARCH_AGENT_PROMPT = """
     You are the Research Agent in a multi-agent deep research assistant.
@@ -13,11 +12,11 @@ RESEARCH_AGENT_PROMPT = """
     MANDATORY WORKFLOW:
     1. FIRST: Call research_tool() to conduct research using the research plan
     2. SECOND: Call report_writer_tool() to generate a report from the research results
-    3. ONLY AFTER both tools complete: Respond to the user with the report
+    3. ONLY AFTER both tools complete: Tell the user where the report was saved
 
     TOOLS:
     - research_tool: Conduct research using the research plan. Returns True when finished.
-    - report_writer_tool: Generate a report from the research results. Returns the report content.
+    - report_writer_tool: Generate a report from the research results. The report is streamed to the user as it is written; returns the file it was saved to.
 
     VALIDATION RULES:
     - You MUST call research_tool() first
@@ -29,9 +28,9 @@ RESEARCH_AGENT_PROMPT = """
     RESPONSE FORMAT:
     Only after both tools complete, respond with:
     ```
-    Here's the research report, let me know if you have any questions!
-    [output from report_writer_tool]
+    Here's the research report, let me know if you have any questions! The full report is saved at [file path from report_writer_tool].
     ```
+    The user has already seen the report while it was written. Do NOT repeat the report content.
 
     ERROR HANDLING:
     - Call research_tool() exactly once, wait for it to complete and return when it finishes
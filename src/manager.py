@@ -1,14 +1,29 @@
 import asyncio
 import sys
-from typing import Any
+import uuid
+from typing import Any, Optional
 
-from agents import Runner
+from agents import Agent
 
 from src.main_agents.coordinator_agent import coordinator_agent
-from src.agent_memory import AGENT_MEMORY
+from src.main_agents.planner_agent import planner_agent
+from src.main_agents.research_agent import research_agent
+from src.agent_memory import STATE_FLAGS, get_agent_memory
+from src.globals import ROUTER_ENABLED
+from src.llm_scheduler import LLM_SCHEDULER, Priority
+from src.router import Route, route_turn
+from src.tracing import TRACER, export_trace
+from src.usage import format_usage, usage_scope
 
 class Manager:
 
+    def __init__(self, session_id: Optional[str] = None):
+        """Serve one research session.
+        
+        Args:
+            session_id: Id of the session whose memory the agents use (a new session by default)
+        """
+        self.memory = get_agent_memory(session_id or uuid.uuid4().hex)
     
     def _get_tool_name(self, event_item: Any) -> str:
         """Extract tool name from event item using concrete type checks."""
@@ -158,13 +173,173 @@ class Manager:
         
         return source_agent, target_agent
 
+    async def _select_agent(self, user_input: str) -> Agent:
+        """Pick the agent for a user turn, routing locally when the workflow stage is unambiguous.
+        
+        Args:
+            user_input: The user's message
+        """
+        if not ROUTER_ENABLED:
+            return coordinator_agent
+        
+        route = route_turn(user_input, self.memory)
+        if route is Route.RESEARCH and not self.memory.plan_finalized:
+            # Same transition the Coordinator Agent makes before handing off to the Research Agent
+            self.memory.set_state("plan_finalized", True)
+            await self.memory.clear_session()
+        
+        agent = {
+            Route.PLANNER: planner_agent,
+            Route.RESEARCH: research_agent,
+            Route.COORDINATOR: coordinator_agent,
+        }[route]
+        print(f"🧭 Router: {agent.name}")
+        return agent
+
+    async def handle_turn(self, user_input: str, timeout: float = 1800) -> str:
+        """Run one user turn through the agents, printing their progress as it streams.
+        
+        Args:
+            user_input: The user's message
+            timeout: Seconds before the turn is abandoned (asyncio.TimeoutError); research progress is checkpointed
+            
+        Returns:
+            The final output of the turn
+        """
+        # Use streaming to capture tool outputs and agent responses
+        print(f"\n🔄 Starting agent processing...")
+        agent = await self._select_agent(user_input)
+        with TRACER.span("turn", session_id=self.memory.session_id, agent=agent.name), usage_scope(session_id=self.memory.session_id):
+            result = LLM_SCHEDULER.run_streamed(agent, user_input, priority=Priority.INTERACTIVE, session=self.memory.session, context=self.memory)
+            current_agent = agent.name
+            print(f"🤖 Current Agent: {current_agent}")
+
+            tool_call_map = {}  # Map call_id to tool_name
+
+            # Add timeout to prevent hanging
+            async with asyncio.timeout(timeout):
+                async for event in result.stream_events():
+                    # Skip raw response events to reduce console noise
+                    if event.type == "raw_response_event":
+                        continue
+
+                    # Debug: Log all events to understand the structure (verbose)
+                    # print(f"🔍 DEBUG: Event type='{event.type}', name='{getattr(event, 'name', 'N/A')}', item_type='{type(getattr(event, 'item', None)).__name__}'")
+
+                    # Only show essential events
+                    if event.type == "run_item_stream_event":
+                        if event.name == "tool_called":
+
+                            # Debug: Show the full event item content (verbose)
+                            # print(f"🔍 DEBUG: tool_called event item: {getattr(event, 'item', 'NO_ITEM')}")
+
+                            # Extract tool name and arguments using concrete type checking
+                            try:
+                                tool_name = self._get_tool_name(event.item)
+                                tool_args = self._get_tool_arguments(event.item)
+                                print(f"🔧 Tool Called: {tool_name} (args: {tool_args})")
+
+                                # Extract call_id to map with output
+                                tool_item = getattr(event, 'item', None)
+                                if tool_item and hasattr(tool_item, 'raw_item'):
+                                    raw_item = tool_item.raw_item
+                                    if hasattr(raw_item, 'call_id'):
+                                        call_id = raw_item.call_id
+                                        tool_call_map[call_id] = tool_name
+                                        print(f"🔗 Mapped call_id {call_id} to tool {tool_name}")
+                            except ValueError as e:
+                                print(f"❌ Error extracting tool name: {e}")
+                        elif event.name == "tool_output":
+                            # Tool output events contain the output data, not the tool name
+                            # We can extract the call_id to match with the tool call
+                            output_item = getattr(event, 'item', None)
+                            if output_item and hasattr(output_item, 'raw_item'):
+                                raw_item = output_item.raw_item
+                                if isinstance(raw_item, dict) and 'call_id' in raw_item:
+                                    call_id = raw_item['call_id']
+                                    tool_name = tool_call_map.get(call_id, "unknown_tool")
+                                    print(f"📤 Tool Output for {tool_name} (call_id: {call_id})")
+                                else:
+                                    print(f"📤 Tool Output received (no call_id found)")
+                            else:
+                                print(f"📤 Tool Output received")
+                        elif event.name == "message_output_created":
+                            print(f"💬 Message Output Event Detected!")
+                        elif event.name == "handoff_occured":
+                            # Track agent handoffs using concrete type checking
+                            try:
+                                source_agent, target_agent = self._get_agent_names(event.item)
+                                print(f"🤝 Agent Handoff: {source_agent} → {target_agent}")
+                                current_agent = target_agent
+                                print(f"🤖 Current Agent: {current_agent}")
+                            except ValueError as e:
+                                print(f"❌ Error extracting agent names: {e}")
+                        elif event.name == "handoff_requested":
+                            # Show when handoff is requested
+                            print(f"❓ Handoff Requested: {current_agent}")
+                        elif event.name == "function_call":
+                            # Handle function call events (which might be tool calls)
+                            try:
+                                if hasattr(event, 'item') and event.item:
+                                    # Try to extract function name from the event
+                                    if hasattr(event.item, 'name'):
+                                        func_name = event.item.name
+                                        print(f"🔧 Function Called: {func_name}")
+                                    elif hasattr(event.item, 'raw_item') and hasattr(event.item.raw_item, 'name'):
+                                        func_name = event.item.raw_item.name
+                                        print(f"🔧 Function Called: {func_name}")
+                            except Exception as e:
+                                print(f"❌ Error extracting function name: {e}")
+                    # Also check for other event types that might contain tool calls
+                    elif event.type == "function_call":
+                        try:
+                            if hasattr(event, 'name'):
+                                print(f"🔧 Function Call: {event.name}")
+                            elif hasattr(event, 'item') and hasattr(event.item, 'name'):
+                                print(f"🔧 Function Call: {event.item.name}")
+                        except Exception as e:
+                            print(f"❌ Error extracting function call: {e}")
+                    elif event.type == "tool_call":
+                        try:
+                            if hasattr(event, 'name'):
+                                print(f"🔧 Tool Call: {event.name}")
+                            elif hasattr(event, 'item') and hasattr(event.item, 'name'):
+                                print(f"🔧 Tool Call: {event.item.name}")
+                        except Exception as e:
+                            print(f"❌ Error extracting tool call: {e}")
+                    # Log any other event types we might be missing
+                    elif event.type not in ["raw_response_event"]:
+                        print(f"🔍 Other event: {event.type} - {getattr(event, 'name', 'N/A')}")
+
+            return str(result.final_output)
+
+    async def _print_usage(self) -> None:
+        """Print the session's model usage and estimated cost per agent and model, and per research question."""
+        usage = await self.memory.get_usage(("agent", "model"))
+        if not usage:
+            return
+        total = sum(part.cost for part in usage.values())
+        print(f"\n💰 Session Usage (estimated ${total:.2f}):")
+        print(format_usage(usage, ("agent", "model")))
+        by_question = {group: part for group, part in (await self.memory.get_usage(("question",))).items() if group != ("",)}
+        if by_question:
+            print(f"\n💰 Usage per Research Question:")
+            print(format_usage(by_question, ("question",)))
+
     async def run(self) -> None:
         """Main agent loop."""
 
-        print("Welcome to the Deep Research Assistant for business development. What business or product idea do you have in mind?")
+        # Resume a session restored from the research store instead of starting over
+        if self.memory.is_persistent and await self.memory.get_items():
+            stage = next((state for state in reversed(STATE_FLAGS) if self.memory.get_state(state)), "starting")
+            print(f"🔁 Resuming session {self.memory.session_id} (last completed stage: {stage}). Where would you like to continue?")
+        else:
+            if self.memory.is_persistent:
+                print(f"🆔 Session {self.memory.session_id} (resume it later with --session {self.memory.session_id})")
+            print("Welcome to the Deep Research Assistant for business development. What business or product idea do you have in mind?")
 
-        # Add initial message to the session
-        await AGENT_MEMORY.add_items([{"role": "system", "content": "Welcome to the Deep Research Assistant for business development. What business or product idea do you have in mind?"}])
+            # Add initial message to the session
+            await self.memory.add_items([{"role": "system", "content": "Welcome to the Deep Research Assistant for business development. What business or product idea do you have in mind?"}])
         
         # User-agent loop
         while True:
@@ -172,154 +347,63 @@ class Manager:
                 user_input = input("\n👤 User: ").strip()
 
                 if user_input.lower() in ("exit"):
+                    await self._print_usage()
                     print("\nGoodbye!")
                     sys.exit()
                 
                 if not user_input:
                     continue
 
-                # Use streaming to capture tool outputs and agent responses with timeout
-                print(f"\n🔄 Starting agent processing...")
-                result = Runner.run_streamed(coordinator_agent, user_input, session=AGENT_MEMORY.session)
-                current_agent = "Coordinator Agent"
-                print(f"🤖 Current Agent: {current_agent}")
-
-                # Add timeout to prevent hanging
+                # Run the turn, giving up after 30 minutes
                 try:
-                    tool_call_map = {}  # Map call_id to tool_name
-                    
-                    async with asyncio.timeout(1800):  # 30 minute timeout for research process
-                        async for event in result.stream_events():
-                            # Skip raw response events to reduce console noise
-                            if event.type == "raw_response_event":
-                                continue
-                            
-                            # Debug: Log all events to understand the structure (verbose)
-                            # print(f"🔍 DEBUG: Event type='{event.type}', name='{getattr(event, 'name', 'N/A')}', item_type='{type(getattr(event, 'item', None)).__name__}'")
-                            
-                            # Only show essential events
-                            if event.type == "run_item_stream_event":
-                                if event.name == "tool_called":
-
-                                    # Debug: Show the full event item content (verbose)
-                                    # print(f"🔍 DEBUG: tool_called event item: {getattr(event, 'item', 'NO_ITEM')}")
-                                    
-                                    # Extract tool name and arguments using concrete type checking
-                                    try:
-                                        tool_name = self._get_tool_name(event.item)
-                                        tool_args = self._get_tool_arguments(event.item)
-                                        print(f"🔧 Tool Called: {tool_name} (args: {tool_args})")
-                                        
-                                        # Extract call_id to map with output
-                                        tool_item = getattr(event, 'item', None)
-                                        if tool_item and hasattr(tool_item, 'raw_item'):
-                                            raw_item = tool_item.raw_item
-                                            if hasattr(raw_item, 'call_id'):
-                                                call_id = raw_item.call_id
-                                                tool_call_map[call_id] = tool_name
-                                                print(f"🔗 Mapped call_id {call_id} to tool {tool_name}")
-                                    except ValueError as e:
-                                        print(f"❌ Error extracting tool name: {e}")
-                                elif event.name == "tool_output":
-                                    # Tool output events contain the output data, not the tool name
-                                    # We can extract the call_id to match with the tool call
-                                    output_item = getattr(event, 'item', None)
-                                    if output_item and hasattr(output_item, 'raw_item'):
-                                        raw_item = output_item.raw_item
-                                        if isinstance(raw_item, dict) and 'call_id' in raw_item:
-                                            call_id = raw_item['call_id']
-                                            tool_name = tool_call_map.get(call_id, "unknown_tool")
-                                            print(f"📤 Tool Output for {tool_name} (call_id: {call_id})")
-                                        else:
-                                            print(f"📤 Tool Output received (no call_id found)")
-                                    else:
-                                        print(f"📤 Tool Output received")
-                                elif event.name == "message_output_created":
-                                    print(f"💬 Message Output Event Detected!")
-                                elif event.name == "handoff_occured":
-                                    # Track agent handoffs using concrete type checking
-                                    try:
-                                        source_agent, target_agent = self._get_agent_names(event.item)
-                                        print(f"🤝 Agent Handoff: {source_agent} → {target_agent}")
-                                        current_agent = target_agent
-                                        print(f"🤖 Current Agent: {current_agent}")
-                                    except ValueError as e:
-                                        print(f"❌ Error extracting agent names: {e}")
-                                elif event.name == "handoff_requested":
-                                    # Show when handoff is requested
-                                    print(f"❓ Handoff Requested: {current_agent}")
-                                elif event.name == "function_call":
-                                    # Handle function call events (which might be tool calls)
-                                    try:
-                                        if hasattr(event, 'item') and event.item:
-                                            # Try to extract function name from the event
-                                            if hasattr(event.item, 'name'):
-                                                func_name = event.item.name
-                                                print(f"🔧 Function Called: {func_name}")
-                                            elif hasattr(event.item, 'raw_item') and hasattr(event.item.raw_item, 'name'):
-                                                func_name = event.item.raw_item.name
-                                                print(f"🔧 Function Called: {func_name}")
-                                    except Exception as e:
-                                        print(f"❌ Error extracting function name: {e}")
-                            # Also check for other event types that might contain tool calls
-                            elif event.type == "function_call":
-                                try:
-                                    if hasattr(event, 'name'):
-                                        print(f"🔧 Function Call: {event.name}")
-                                    elif hasattr(event, 'item') and hasattr(event.item, 'name'):
-                                        print(f"🔧 Function Call: {event.item.name}")
-                                except Exception as e:
-                                    print(f"❌ Error extracting function call: {e}")
-                            elif event.type == "tool_call":
-                                try:
-                                    if hasattr(event, 'name'):
-                                        print(f"🔧 Tool Call: {event.name}")
-                                    elif hasattr(event, 'item') and hasattr(event.item, 'name'):
-                                        print(f"🔧 Tool Call: {event.item.name}")
-                                except Exception as e:
-                                    print(f"❌ Error extracting tool call: {e}")
-                            # Log any other event types we might be missing
-                            elif event.type not in ["raw_response_event"]:
-                                print(f"🔍 Other event: {event.type} - {getattr(event, 'name', 'N/A')}")
+                    final_output = await self.handle_turn(user_input)
                 except asyncio.TimeoutError:
-                    print(f"⏰ Timeout: Agent processing took too long (>10 minutes)")
+                    print(f"⏰ Timeout: Agent processing took too long (>30 minutes)")
+                    print("💾 Research progress is checkpointed: send your message again to resume where it stopped")
                     continue
+                finally:
+                    export_trace()
                 
                 # Debug: Show session memory contents
                 print(f"🔍 Session Conversation History:")
-                session_items = await AGENT_MEMORY.get_items()
+                session_items = await self.memory.get_items()
                 for i, item in enumerate(session_items[-5:]):  # Show last 5 items
                     print(f"  {i+1}. {type(item).__name__}: {str(item)[:300]}...")
                 
                 # Debug: Show agent states
                 print(f"🔍 Agent State:")
-                print(f"  has_enough_context: {AGENT_MEMORY.has_enough_context}")
-                print(f"  plan_generated: {AGENT_MEMORY.plan_generated}")
-                print(f"  plan_finalized: {AGENT_MEMORY.plan_finalized}")
-                print(f"  report_generated: {AGENT_MEMORY.report_generated}")
+                print(f"  has_enough_context: {self.memory.has_enough_context}")
+                print(f"  plan_generated: {self.memory.plan_generated}")
+                print(f"  plan_finalized: {self.memory.plan_finalized}")
+                print(f"  report_generated: {self.memory.report_generated}")
                 
                 # Debug: Show first 200 characters of stored research plan
                 print(f"🔍 Session Research Plan:")
-                research_plan = await AGENT_MEMORY.get_research_plan()
+                research_plan = await self.memory.get_research_plan()
                 print(f"  {research_plan[:200]}...")
 
                 # Debug: Show first 400 characters of stored research dump
                 print(f"🔍 Session Research Dump:")
-                research_dump = await AGENT_MEMORY.get_research_dump()
+                research_dump = await self.memory.get_research_dump()
                 research_dump_str = str(research_dump)
                 print(f"  {research_dump_str[:400]}...")
 
                 # Debug: Show first 200 characters of stored report
                 print(f"🔍 Session Report:")
-                report = await AGENT_MEMORY.get_report()
+                report = await self.memory.get_report()
                 print(f"  {report[:200]}...")
 
                 # Print the final result for completeness
-                print(f"\n✅ Final Agent Output: {result.final_output}")
+                print(f"\n✅ Final Agent Output: {final_output}")
+                
+                total = (await self.memory.get_usage()).get(())
+                if total:
+                    print(f"💰 Session usage so far: {total.total_tokens} tokens in {total.requests} model requests, estimated ${total.cost:.2f}")
 
                 
                 
             except KeyboardInterrupt:
+                await self._print_usage()
                 print("\nGoodbye!")
                 break
             except Exception as e:
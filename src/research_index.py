@@ -0,0 +1,65 @@
+from typing import List, NamedTuple, Set, Tuple
+
+from src.bm25 import BM25Index
+
+
+class ResearchSnippet(NamedTuple):
+    """One source summary from the research dump."""
+
+    research_question: str
+    title: str
+    url: str
+    summary: str
+
+
+class ResearchIndex:
+    """
+    BM25 retrieval index over the research dump.
+
+    Entries are indexed as they are added (research question, title and summary
+    together), so a search only ever returns the few snippets relevant to a query
+    instead of the whole dump.
+    """
+
+    def __init__(self):
+        self._index = BM25Index()
+        self._snippets: List[ResearchSnippet] = []
+        self._seen: Set[Tuple[str, str, str]] = set()
+
+    def __len__(self) -> int:
+        return len(self._snippets)
+
+    def add(self, research_question: str, research_data: List[Tuple[Tuple[str, str], str]]) -> None:
+        """
+        Index research results.
+
+        Args:
+            research_question: str - the research question the results answer
+            research_data: List of ((title, url), summary) tuples
+        """
+        for (title, url), summary in research_data:
+            key = (research_question, url, summary)
+            if key in self._seen:
+                continue
+            self._seen.add(key)
+            self._index.add_document(f"{research_question}\n{title}\n{summary}")
+            self._snippets.append(ResearchSnippet(research_question, title, url, summary))
+
+    def search(self, query: str, k: int) -> List[ResearchSnippet]:
+        """
+        Get the snippets most relevant to a query.
+
+        Args:
+            query: str - the search query
+            k: int - the maximum number of snippets
+
+        Returns:
+            Matching snippets, best first
+        """
+        return [self._snippets[doc_id] for doc_id, _ in self._index.search(query, k)]
+
+    def clear(self) -> None:
+        """Drop every indexed snippet."""
+        self._index = BM25Index()
+        self._snippets.clear()
+        self._seen.clear()
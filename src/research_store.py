@@ -0,0 +1,407 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, TypeVar
+
+from src.globals import RESEARCH_DB_PATH, RESEARCH_STORE_ENABLED
+
+# Research dump entries: ((title, url), summary)
+DumpEntry = Tuple[Tuple[str, str], str]
+
+T = TypeVar("T")
+
+
+class StoredSession(NamedTuple):
+    """The research state of a session, as persisted."""
+
+    research_plan: str
+    research_dump: Dict[str, List[DumpEntry]]
+    report: str
+    report_path: str
+    state: Dict[str, bool]
+    # Progress of unfinished questions: their search queries, and the sources summarized for each (query, url)
+    checkpoint_queries: Dict[str, List[str]]
+    checkpoint_sources: Dict[str, Dict[Tuple[str, str], DumpEntry]]
+
+
+class ResearchStore:
+    """
+    Durable storage for the research plan, research dump, report and workflow state of sessions.
+
+    Everything lives in one SQLite file in WAL mode, which can also hold the
+    conversation history (SQLiteSession) and the model usage of sessions. The research dump is normalized into
+    questions, sources and summaries, indexed by session and question. Writes
+    are serialized on a single worker thread, so the a* methods keep disk I/O off
+    the event loop and still apply in the order they were issued.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Initialize the store, creating the database file if needed.
+
+        Args:
+            path: Path of the SQLite database file
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="research-store")
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS research_sessions (
+                session_id TEXT PRIMARY KEY,
+                research_plan TEXT NOT NULL DEFAULT '',
+                report TEXT NOT NULL DEFAULT '',
+                report_path TEXT NOT NULL DEFAULT '',
+                state TEXT NOT NULL DEFAULT '{}',
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS research_questions (
+                id INTEGER PRIMARY KEY,
+                session_id TEXT NOT NULL REFERENCES research_sessions (session_id) ON DELETE CASCADE,
+                question TEXT NOT NULL,
+                UNIQUE (session_id, question)
+            );
+            CREATE TABLE IF NOT EXISTS research_sources (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL,
+                title TEXT NOT NULL,
+                UNIQUE (url, title)
+            );
+            CREATE TABLE IF NOT EXISTS research_summaries (
+                id INTEGER PRIMARY KEY,
+                question_id INTEGER NOT NULL REFERENCES research_questions (id) ON DELETE CASCADE,
+                source_id INTEGER NOT NULL REFERENCES research_sources (id),
+                summary TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS research_summaries_question ON research_summaries (question_id, id);
+            CREATE TABLE IF NOT EXISTS research_checkpoint_queries (
+                session_id TEXT NOT NULL REFERENCES research_sessions (session_id) ON DELETE CASCADE,
+                question TEXT NOT NULL,
+                queries TEXT NOT NULL,
+                PRIMARY KEY (session_id, question)
+            );
+            CREATE TABLE IF NOT EXISTS research_checkpoint_sources (
+                session_id TEXT NOT NULL REFERENCES research_sessions (session_id) ON DELETE CASCADE,
+                question TEXT NOT NULL,
+                query TEXT NOT NULL,
+                url TEXT NOT NULL,
+                title TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                PRIMARY KEY (session_id, question, query, url)
+            );
+            CREATE TABLE IF NOT EXISTS research_briefs (
+                session_id TEXT PRIMARY KEY REFERENCES research_sessions (session_id) ON DELETE CASCADE,
+                brief_hash TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS research_usage (
+                session_id TEXT NOT NULL REFERENCES research_sessions (session_id) ON DELETE CASCADE,
+                question TEXT NOT NULL,
+                agent TEXT NOT NULL,
+                model TEXT NOT NULL,
+                requests INTEGER NOT NULL,
+                input_tokens INTEGER NOT NULL,
+                cached_tokens INTEGER NOT NULL,
+                output_tokens INTEGER NOT NULL,
+                PRIMARY KEY (session_id, question, agent, model)
+            );
+            """
+        )
+
+    def load(self, session_id: str) -> Optional[StoredSession]:
+        """
+        Load the research state of a session.
+
+        Args:
+            session_id: The session id
+
+        Returns:
+            The stored session, or None if nothing was stored for it
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT research_plan, report, report_path, state FROM research_sessions WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+            if row is None:
+                return None
+
+            research_dump: Dict[str, List[DumpEntry]] = {}
+            for question, title, url, summary in self._conn.execute(
+                """
+                SELECT q.question, s.title, s.url, m.summary
+                FROM research_questions q
+                LEFT JOIN research_summaries m ON m.question_id = q.id
+                LEFT JOIN research_sources s ON s.id = m.source_id
+                WHERE q.session_id = ?
+                ORDER BY q.id, m.id
+                """,
+                (session_id,),
+            ):
+                entries = research_dump.setdefault(question, [])
+                if summary is not None:
+                    entries.append(((title, url), summary))
+
+            checkpoint_queries = {
+                question: json.loads(queries)
+                for question, queries in self._conn.execute(
+                    "SELECT question, queries FROM research_checkpoint_queries WHERE session_id = ?", (session_id,)
+                )
+            }
+            checkpoint_sources: Dict[str, Dict[Tuple[str, str], DumpEntry]] = {}
+            for question, query, url, title, summary in self._conn.execute(
+                "SELECT question, query, url, title, summary FROM research_checkpoint_sources WHERE session_id = ?",
+                (session_id,),
+            ):
+                checkpoint_sources.setdefault(question, {})[(query, url)] = ((title, url), summary)
+
+        return StoredSession(
+            row[0], research_dump, row[1], row[2], json.loads(row[3]), checkpoint_queries, checkpoint_sources
+        )
+
+    def save_plan(self, session_id: str, research_plan: str) -> None:
+        """Store the research plan of a session."""
+        self._upsert(session_id, research_plan=research_plan)
+
+    def save_report(self, session_id: str, report: str, report_path: str = "") -> None:
+        """Store the report of a session and the file it was saved to."""
+        self._upsert(session_id, report=report, report_path=report_path)
+
+    def save_state(self, session_id: str, state: Dict[str, bool]) -> None:
+        """Store the workflow state flags of a session."""
+        self._upsert(session_id, state=json.dumps(state))
+
+    def add_to_dump(self, session_id: str, research_question: str, entries: List[DumpEntry]) -> None:
+        """
+        Append research results of a question to a session's research dump.
+
+        Args:
+            session_id: The session id
+            research_question: The research question the results answer
+            entries: ((title, url), summary) results
+        """
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._ensure_session(session_id)
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO research_questions (session_id, question) VALUES (?, ?)",
+                    (session_id, research_question),
+                )
+                (question_id,) = self._conn.execute(
+                    "SELECT id FROM research_questions WHERE session_id = ? AND question = ?",
+                    (session_id, research_question),
+                ).fetchone()
+                for (title, url), summary in entries:
+                    self._conn.execute("INSERT OR IGNORE INTO research_sources (url, title) VALUES (?, ?)", (url, title))
+                    (source_id,) = self._conn.execute(
+                        "SELECT id FROM research_sources WHERE url = ? AND title = ?", (url, title)
+                    ).fetchone()
+                    self._conn.execute(
+                        "INSERT INTO research_summaries (question_id, source_id, summary) VALUES (?, ?, ?)",
+                        (question_id, source_id, summary),
+                    )
+                # The question's results are in the dump, so its progress is no longer needed
+                for table in ("research_checkpoint_queries", "research_checkpoint_sources"):
+                    self._conn.execute(f"DELETE FROM {table} WHERE session_id = ? AND question = ?", (session_id, research_question))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def clear_dump(self, session_id: str) -> None:
+        """Delete a session's research dump and research progress."""
+        with self._lock:
+            self._conn.execute("DELETE FROM research_questions WHERE session_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM research_checkpoint_queries WHERE session_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM research_checkpoint_sources WHERE session_id = ?", (session_id,))
+
+    def save_checkpoint_queries(self, session_id: str, research_question: str, queries: List[str]) -> None:
+        """Store the search queries of an unfinished research question."""
+        with self._lock:
+            self._ensure_session(session_id)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO research_checkpoint_queries (session_id, question, queries) VALUES (?, ?, ?)",
+                (session_id, research_question, json.dumps(queries)),
+            )
+
+    def save_checkpoint_source(self, session_id: str, research_question: str, query: str, entry: DumpEntry) -> None:
+        """Store a source summarized for a query of an unfinished research question."""
+        (title, url), summary = entry
+        with self._lock:
+            self._ensure_session(session_id)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO research_checkpoint_sources (session_id, question, query, url, title, summary) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (session_id, research_question, query, url, title, summary),
+            )
+
+    def load_brief_hash(self, session_id: str) -> Optional[str]:
+        """The hash of the brief a (batch) session researches, or None if none was stored."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT brief_hash FROM research_briefs WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def save_brief_hash(self, session_id: str, brief_hash: str) -> None:
+        """Store the hash of the brief a (batch) session researches."""
+        with self._lock:
+            self._ensure_session(session_id)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO research_briefs (session_id, brief_hash) VALUES (?, ?)",
+                (session_id, brief_hash),
+            )
+
+    def add_usage(
+        self,
+        session_id: str,
+        research_question: str,
+        agent: str,
+        model: str,
+        requests: int,
+        input_tokens: int,
+        cached_tokens: int,
+        output_tokens: int,
+    ) -> None:
+        """Add model usage of a session, attributed to a research question ("" for none), agent and model."""
+        with self._lock:
+            self._ensure_session(session_id)
+            self._conn.execute(
+                """
+                INSERT INTO research_usage
+                    (session_id, question, agent, model, requests, input_tokens, cached_tokens, output_tokens)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (session_id, question, agent, model) DO UPDATE SET
+                    requests = requests + excluded.requests,
+                    input_tokens = input_tokens + excluded.input_tokens,
+                    cached_tokens = cached_tokens + excluded.cached_tokens,
+                    output_tokens = output_tokens + excluded.output_tokens
+                """,
+                (session_id, research_question, agent, model, requests, input_tokens, cached_tokens, output_tokens),
+            )
+
+    def load_usage(self, session_id: str) -> List[Tuple[str, str, str, int, int, int, int]]:
+        """
+        Load the model usage of a session.
+
+        Args:
+            session_id: The session id
+
+        Returns:
+            (question, agent, model, requests, input tokens, cached tokens, output tokens) rows
+        """
+        with self._lock:
+            return [
+                tuple(row)
+                for row in self._conn.execute(
+                    "SELECT question, agent, model, requests, input_tokens, cached_tokens, output_tokens "
+                    "FROM research_usage WHERE session_id = ?",
+                    (session_id,),
+                )
+            ]
+
+    def has_session(self, session_id: str) -> bool:
+        """Whether anything is stored for a session."""
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM research_sessions WHERE session_id = ?", (session_id,)).fetchone()
+        return row is not None
+
+    def delete_session(self, session_id: str) -> None:
+        """Delete everything stored for a session."""
+        with self._lock:
+            self._conn.execute("DELETE FROM research_sessions WHERE session_id = ?", (session_id,))
+
+    def close(self) -> None:
+        """Wait for pending writes and close the database connection."""
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            self._conn.close()
+
+    def _ensure_session(self, session_id: str) -> None:
+        """Create the session row if needed. Caller holds the lock."""
+        self._conn.execute(
+            "INSERT OR IGNORE INTO research_sessions (session_id, updated_at) VALUES (?, ?)",
+            (session_id, time.time()),
+        )
+
+    def _upsert(self, session_id: str, **fields: str) -> None:
+        """Set columns of a session row, creating it if needed."""
+        columns = ", ".join(f"{column} = ?" for column in fields)
+        with self._lock:
+            self._ensure_session(session_id)
+            self._conn.execute(
+                f"UPDATE research_sessions SET {columns}, updated_at = ? WHERE session_id = ?",
+                (*fields.values(), time.time(), session_id),
+            )
+
+    # Async wrappers that run on the store's writer thread, in order, off the event loop
+
+    async def _run(self, function: Callable[..., T], *args: Any) -> T:
+        """Run a store operation on the writer thread."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    def submit(self, function: Callable[..., Any], *args: Any) -> None:
+        """Queue a store operation on the writer thread without waiting for it (e.g. from sync code)."""
+        self._executor.submit(function, *args)
+
+    async def aload(self, session_id: str) -> Optional[StoredSession]:
+        """Async version of load."""
+        return await self._run(self.load, session_id)
+
+    async def asave_plan(self, session_id: str, research_plan: str) -> None:
+        """Async version of save_plan."""
+        await self._run(self.save_plan, session_id, research_plan)
+
+    async def asave_report(self, session_id: str, report: str, report_path: str = "") -> None:
+        """Async version of save_report."""
+        await self._run(self.save_report, session_id, report, report_path)
+
+    async def aadd_to_dump(self, session_id: str, research_question: str, entries: List[DumpEntry]) -> None:
+        """Async version of add_to_dump."""
+        await self._run(self.add_to_dump, session_id, research_question, entries)
+
+    async def aclear_dump(self, session_id: str) -> None:
+        """Async version of clear_dump."""
+        await self._run(self.clear_dump, session_id)
+
+    async def asave_checkpoint_queries(self, session_id: str, research_question: str, queries: List[str]) -> None:
+        """Async version of save_checkpoint_queries."""
+        await self._run(self.save_checkpoint_queries, session_id, research_question, queries)
+
+    async def asave_checkpoint_source(self, session_id: str, research_question: str, query: str, entry: DumpEntry) -> None:
+        """Async version of save_checkpoint_source."""
+        await self._run(self.save_checkpoint_source, session_id, research_question, query, entry)
+
+    async def aload_brief_hash(self, session_id: str) -> Optional[str]:
+        """Async version of load_brief_hash."""
+        return await self._run(self.load_brief_hash, session_id)
+
+    async def asave_brief_hash(self, session_id: str, brief_hash: str) -> None:
+        """Async version of save_brief_hash."""
+        await self._run(self.save_brief_hash, session_id, brief_hash)
+
+    async def adelete_session(self, session_id: str) -> None:
+        """Async version of delete_session."""
+        await self._run(self.delete_session, session_id)
+
+
+_store: Optional[ResearchStore] = None
+
+
+def get_research_store() -> Optional[ResearchStore]:
+    """Get the shared research store, or None if persistence is disabled."""
+    global _store
+    if not RESEARCH_STORE_ENABLED:
+        return None
+    if _store is None:
+        _store = ResearchStore(RESEARCH_DB_PATH)
+    return _store
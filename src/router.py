@@ -0,0 +1,106 @@
+import re
+from enum import Enum
+from typing import Protocol
+
+
+class Route(Enum):
+    """Agent that handles a user turn."""
+    PLANNER = "Planner Agent"
+    RESEARCH = "Research Agent"
+    COORDINATOR = "Coordinator Agent"
+
+
+class WorkflowState(Protocol):
+    """The workflow flags the router reads (AgentMemory provides them)."""
+    def get_state(self, state: str) -> bool: ...
+
+
+# Replies that approve the research plan: "yes", "looks good", "go ahead", "let's start the research"
+_APPROVAL_RE = re.compile(
+    r"^\s*(?:yes|yep|yeah|yup|y|sure|ok|okay|approved?|confirm(?:ed)?|perfect|great|sounds good|looks good|lgtm"
+    r"|go ahead|proceed|let'?s (?:go|start|begin|proceed|do it)|(?:start|begin)(?: the)? research)\b",
+    re.IGNORECASE,
+)
+
+# Replies that ask for changes to the research plan: "no", "add pricing", "can you focus on Europe instead"
+_REVISION_RE = re.compile(
+    r"\b(?:no|nope|not|don'?t|but|change|add|remove|drop|replace|modify|update|revise|edit|instead|also|include|exclude"
+    r"|focus|more|less|rather|wait|hold on)\b",
+    re.IGNORECASE,
+)
+
+
+# Turns that are about the user's business or research: "I want to sell phone cases", "our target market is Europe"
+_CONTEXT_RE = re.compile(
+    r"\b(?:business|product|service|idea|startup|company|brand|market|customer|client|audience|niche|industry"
+    r"|sell|selling|launch|price|pricing|competitor|competition|budget|revenue|store|shop|research|plan)s?\b",
+    re.IGNORECASE,
+)
+
+# Turns that ask the Research Agent to go on: "start", "continue", "resume the research", "write the report"
+_RESEARCH_RE = re.compile(
+    r"\b(?:start|begin|continue|resume|proceed|go on|go ahead|retry|try again|research|report|results|findings"
+    r"|status|progress)\b",
+    re.IGNORECASE,
+)
+
+
+def is_plan_approval(user_input: str) -> bool:
+    """Check if a reply approves the research plan without asking for changes."""
+    return bool(_APPROVAL_RE.match(user_input)) and not _REVISION_RE.search(user_input) and "?" not in user_input
+
+
+def is_plan_revision(user_input: str) -> bool:
+    """Check if a reply asks for changes to the research plan."""
+    return bool(_REVISION_RE.search(user_input)) and not is_plan_approval(user_input)
+
+
+def is_business_context(user_input: str) -> bool:
+    """Check if a turn is about the user's business or research, as the Planner Agent's questions are."""
+    return bool(_CONTEXT_RE.search(user_input))
+
+
+def is_research_request(user_input: str) -> bool:
+    """Check if a turn asks to start or continue the research, without asking for changes to the plan."""
+    return (bool(_RESEARCH_RE.search(user_input)) or is_plan_approval(user_input)) and not is_plan_revision(user_input)
+
+
+def route_turn(user_input: str, state: WorkflowState) -> Route:
+    """
+    Pick the agent for a user turn from the workflow flags, without a model call.
+
+    Only turns that clearly belong to the current stage skip the Coordinator Agent, which handles
+    everything else (off-topic or ambiguous input, and follow-ups after the report).
+
+    Stages:
+    - Context gathering and plan writing (no plan yet): Planner Agent on business context,
+      or on an approval once there is enough context for the plan
+    - Plan review (plan generated, not finalized): Research Agent on a clear approval,
+      Planner Agent on a clear revision request
+    - Research (plan finalized, no report yet): Research Agent on a request to start or continue it
+    - After the report: Coordinator Agent
+
+    Args:
+        user_input: The user's message
+        state: The workflow flags (has_enough_context, plan_generated, plan_finalized, report_generated)
+
+    Returns:
+        The route of the turn
+    """
+    if state.get_state("report_generated"):
+        return Route.COORDINATOR
+    if state.get_state("plan_finalized"):
+        return Route.RESEARCH if is_research_request(user_input) else Route.COORDINATOR
+    if not state.get_state("plan_generated"):
+        if is_business_context(user_input):
+            return Route.PLANNER
+        if state.get_state("has_enough_context") and is_plan_approval(user_input):
+            return Route.PLANNER
+        return Route.COORDINATOR
+
+    # Plan review
+    if is_plan_approval(user_input):
+        return Route.RESEARCH
+    if is_plan_revision(user_input):
+        return Route.PLANNER
+    return Route.COORDINATOR
@@ -0,0 +1,587 @@
+"""
+HTTP service: many users research through one process.
+
+Briefs and chat turns are queued as jobs and run by a bounded pool of workers,
+each session with its own AgentMemory. Jobs of the same session run one at a
+time in submission order; jobs of different sessions run concurrently, with
+chat turns ahead of briefs in the queue. Everything the agents print while a
+job runs is published to its session as server-sent events. Sessions idle for
+a while are unloaded (a persisted session is loaded again on its next request)
+and only the most recent finished jobs are kept.
+
+Endpoints:
+    POST /briefs                    Research a brief in a new session -> {session_id, job_id}
+    POST /sessions                  Start a chat session -> {session_id}
+    POST /sessions/{id}/turns       Send a chat turn {"message": ...} -> {job_id}
+    GET  /sessions/{id}             Workflow state and jobs of a session
+    GET  /sessions/{id}/events      Progress of a session (SSE, resumes from Last-Event-ID)
+    GET  /sessions/{id}/report      The session's report (markdown)
+    GET  /jobs/{id}                 Status and output of a job
+    GET  /jobs/{id}/events          Progress of a job (SSE), until it finishes
+
+Usage:
+    python -m src.server --host 127.0.0.1 --port 8000
+"""
+
+import argparse
+import asyncio
+import contextvars
+import itertools
+import json
+import sys
+import time
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set, TextIO, Tuple
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from src.agent_memory import STATE_FLAGS, close_agent_memory, get_agent_memory
+from src.batch import research_brief
+from src.globals import (
+    REPORTS_DIR,
+    SERVICE_EVENT_HISTORY,
+    SERVICE_HOST,
+    SERVICE_JOB_HISTORY,
+    SERVICE_MAX_WORKERS,
+    SERVICE_PORT,
+    SERVICE_SESSION_IDLE_SECONDS,
+)
+from src.manager import Manager
+from src.research_store import get_research_store
+from src.tools.web_scraper.fetch_engine import close_fetch_engine
+from src.tracing import export_trace
+
+# Event: (id, event type, data)
+Event = Tuple[int, str, Dict[str, Any]]
+
+# Priority of jobs in the queue (lower runs first): a waiting user beats a background brief
+JOB_PRIORITY = {"turn": 0, "brief": 1}
+
+# Seconds between keep-alive comments on idle event streams
+HEARTBEAT_SECONDS = 15.0
+
+
+class SessionChannel:
+    """
+    Progress events of a session, kept for reconnecting clients.
+
+    Events are numbered in order, so a client that reconnects with the id of the
+    last event it saw receives only what it missed (as long as it is still kept).
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, history: int = SERVICE_EVENT_HISTORY):
+        """
+        Initialize the channel.
+
+        Args:
+            loop: Event loop the subscribers run on
+            history: Number of recent events kept
+        """
+        self._loop = loop
+        self._events: Deque[Event] = deque(maxlen=max(1, history))
+        self._next_id = 1
+        self._changed = asyncio.Event()
+        self._partial: Dict[str, str] = {}
+
+    def publish(self, event: str, data: Dict[str, Any]) -> None:
+        """Publish an event; safe to call from any thread."""
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self._append(event, data)
+        else:
+            self._loop.call_soon_threadsafe(self._append, event, data)
+
+    def write(self, job_id: str, text: str) -> None:
+        """Publish printed text of a job as "log" events, one per complete line."""
+        lines = (self._partial.pop(job_id, "") + text).split("\n")
+        if lines[-1]:
+            self._partial[job_id] = lines[-1]
+        for line in lines[:-1]:
+            if line.strip():
+                self.publish("log", {"job_id": job_id, "line": line})
+
+    def flush(self, job_id: str) -> None:
+        """Publish the unfinished last line of a job, if any."""
+        line = self._partial.pop(job_id, "")
+        if line.strip():
+            self.publish("log", {"job_id": job_id, "line": line})
+
+    def _append(self, event: str, data: Dict[str, Any]) -> None:
+        """Record an event and wake the subscribers."""
+        self._events.append((self._next_id, event, data))
+        self._next_id += 1
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def subscribe(self, after: int = 0, heartbeat: float = HEARTBEAT_SECONDS) -> AsyncIterator[Optional[Event]]:
+        """
+        Follow the channel's events.
+
+        Args:
+            after: Id of the last event already seen (0 for all kept events)
+            heartbeat: Seconds of silence after which None is yielded, so callers can keep connections alive
+
+        Yields:
+            Events with ids after `after` as they are published, or None after a quiet heartbeat
+        """
+        while True:
+            changed = self._changed
+            for event in list(self._events):
+                if event[0] > after:
+                    after = event[0]
+                    yield event
+            try:
+                await asyncio.wait_for(changed.wait(), heartbeat)
+            except asyncio.TimeoutError:
+                yield None
+
+
+# Channel and job of the job running in the current task (inherited by the tasks it starts)
+_current_job: contextvars.ContextVar[Optional[Tuple[SessionChannel, str]]] = contextvars.ContextVar(
+    "current_job", default=None
+)
+
+
+class _ProgressStdout:
+    """stdout replacement that sends what a job prints to its session, and everything else to the real stdout."""
+
+    def __init__(self, stdout: TextIO):
+        self._stdout = stdout
+
+    def write(self, text: str) -> int:
+        current = _current_job.get()
+        if current is None:
+            return self._stdout.write(text)
+        channel, job_id = current
+        channel.write(job_id, text)
+        return len(text)
+
+    def flush(self) -> None:
+        if _current_job.get() is None:
+            self._stdout.flush()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stdout, name)
+
+
+class Job:
+    """A brief or chat turn submitted to the service."""
+
+    def __init__(self, session_id: str, kind: str, payload: Any):
+        self.id = uuid.uuid4().hex
+        self.session_id = session_id
+        self.kind = kind
+        self.payload = payload
+        self.status = "queued"
+        self.output: Optional[str] = None
+        self.error: Optional[str] = None
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "session_id": self.session_id,
+            "kind": self.kind,
+            "status": self.status,
+            "output": self.output,
+            "error": self.error,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class ResearchService:
+    """
+    Job queue and worker pool that run briefs and chat turns of many sessions.
+
+    At most max_workers jobs run at once. A session has at most one job queued
+    or running at a time; its later jobs wait in the session's backlog, so they
+    neither run concurrently on the same memory nor hold up a worker while waiting.
+    Sessions without a job for session_idle_seconds are evicted with their jobs,
+    progress channel and memory, and at most job_history finished jobs are kept.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = SERVICE_MAX_WORKERS,
+        reports_dir: Path = REPORTS_DIR / "service",
+        job_history: int = SERVICE_JOB_HISTORY,
+        session_idle_seconds: float = SERVICE_SESSION_IDLE_SECONDS,
+    ):
+        """
+        Initialize the service (call start() before submitting jobs).
+
+        Args:
+            max_workers: Maximum number of jobs run at once
+            reports_dir: Directory for the reports of sessions (briefs and chat turns)
+            job_history: Maximum number of finished jobs kept
+            session_idle_seconds: Seconds of inactivity after which a session is evicted
+        """
+        self.max_workers = max(1, max_workers)
+        self.reports_dir = Path(reports_dir)
+        self.job_history = max(1, job_history)
+        self.session_idle_seconds = session_idle_seconds
+        self.jobs: Dict[str, Job] = {}
+        self._sessions: Dict[str, float] = {}  # Session id -> time of its last activity (monotonic)
+        self._finished: Deque[str] = deque()  # Ids of finished jobs, oldest first
+        self._channels: Dict[str, SessionChannel] = {}
+        self._backlogs: Dict[str, Deque[Job]] = {}
+        self._active: Set[str] = set()
+        self._order = itertools.count()
+        # Created in start(), so it belongs to the loop the service runs on
+        self._queue: Optional[asyncio.PriorityQueue[Tuple[int, int, Job]]] = None
+        self._workers: List[asyncio.Task[None]] = []
+        self._stdout: Optional[TextIO] = None
+
+    async def start(self) -> None:
+        """Start the workers and route job output to the sessions."""
+        self._queue = asyncio.PriorityQueue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_workers)]
+        self._workers.append(asyncio.create_task(self._evict_idle_sessions_periodically()))
+        self._stdout = sys.stdout
+        sys.stdout = _ProgressStdout(self._stdout)
+        print(f"🚀 Service: Started {self.max_workers} workers")
+
+    async def stop(self) -> None:
+        """Stop the workers, abandoning running jobs (their research progress is checkpointed)."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._stdout is not None:
+            sys.stdout = self._stdout
+            self._stdout = None
+        export_trace()
+
+    def open_session(self, session_id: Optional[str] = None) -> str:
+        """
+        Start serving a session, or mark a served one active.
+
+        Args:
+            session_id: Id of the session (a new session by default)
+
+        Returns:
+            The session id
+        """
+        session_id = session_id or uuid.uuid4().hex
+        self._sessions[session_id] = time.monotonic()
+        return session_id
+
+    def has_session(self, session_id: str) -> bool:
+        """Whether a session is served, or can be loaded from the research store."""
+        if session_id in self._sessions:
+            return True
+        store = get_research_store()
+        return store is not None and store.has_session(session_id)
+
+    def evict_idle_sessions(self) -> List[str]:
+        """
+        Evict the sessions without a job queued or running for session_idle_seconds.
+
+        Their jobs and progress channel are dropped and their memory closed;
+        persisted sessions are restored from the research store on their next request.
+
+        Returns:
+            The ids of the evicted sessions
+        """
+        cutoff = time.monotonic() - self.session_idle_seconds
+        idle = [
+            session_id
+            for session_id, last_active in self._sessions.items()
+            if last_active < cutoff and session_id not in self._active
+        ]
+        for session_id in idle:
+            del self._sessions[session_id]
+            self._channels.pop(session_id, None)
+            close_agent_memory(session_id)
+        if idle:
+            evicted = set(idle)
+            self.jobs = {job_id: job for job_id, job in self.jobs.items() if job.session_id not in evicted}
+            self._finished = deque(job_id for job_id in self._finished if job_id in self.jobs)
+        return idle
+
+    async def _evict_idle_sessions_periodically(self) -> None:
+        """Evict idle sessions until cancelled."""
+        while True:
+            await asyncio.sleep(max(1.0, min(60.0, self.session_idle_seconds / 4)))
+            self.evict_idle_sessions()
+
+    def channel(self, session_id: str) -> SessionChannel:
+        """Get the progress channel of a session."""
+        if session_id not in self._channels:
+            self._channels[session_id] = SessionChannel(asyncio.get_running_loop())
+        return self._channels[session_id]
+
+    def session_jobs(self, session_id: str) -> List[Job]:
+        """Get the jobs of a session, in submission order."""
+        return [job for job in self.jobs.values() if job.session_id == session_id]
+
+    def submit_brief(self, brief: Dict[str, Any]) -> Job:
+        """Queue a brief to research in a new session."""
+        return self._submit(Job(f"brief-{uuid.uuid4().hex[:12]}", "brief", brief))
+
+    def submit_turn(self, session_id: str, message: str) -> Job:
+        """Queue a chat turn of a session."""
+        return self._submit(Job(session_id, "turn", message))
+
+    def _submit(self, job: Job) -> Job:
+        """Queue a job, or hold it in its session's backlog while the session is busy."""
+        self.open_session(job.session_id)
+        self.jobs[job.id] = job
+        self.channel(job.session_id).publish("job", job.to_dict())
+        if job.session_id in self._active:
+            self._backlogs.setdefault(job.session_id, deque()).append(job)
+        else:
+            self._enqueue(job)
+        return job
+
+    def _enqueue(self, job: Job) -> None:
+        """Put a job on the queue and mark its session busy."""
+        assert self._queue is not None, "Service not started"
+        self._active.add(job.session_id)
+        self._queue.put_nowait((JOB_PRIORITY[job.kind], next(self._order), job))
+
+    def _release(self, session_id: str) -> None:
+        """Queue the session's next job, or mark it idle."""
+        backlog = self._backlogs.get(session_id)
+        if backlog:
+            self._enqueue(backlog.popleft())
+        else:
+            self._backlogs.pop(session_id, None)
+            self._active.discard(session_id)
+
+    async def _worker(self) -> None:
+        """Run queued jobs until cancelled."""
+        queue = self._queue
+        assert queue is not None, "Service not started"
+        while True:
+            _, _, job = await queue.get()
+            try:
+                await self._run_job(job)
+            finally:
+                self._release(job.session_id)
+                queue.task_done()
+
+    async def _run_job(self, job: Job) -> None:
+        """Run a job with its output published to its session."""
+        channel = self.channel(job.session_id)
+        job.status = "running"
+        job.started_at = time.time()
+        channel.publish("job", job.to_dict())
+        print(f"▶️ Service: Running {job.kind} {job.id} of session {job.session_id}")
+
+        token = _current_job.set((channel, job.id))
+        try:
+            if job.kind == "brief":
+                memory = get_agent_memory(job.session_id)
+                report_path = await research_brief(memory, job.payload, self.reports_dir / f"{job.session_id}.md")
+                job.output = str(report_path)
+            else:
+                manager = Manager(job.session_id)
+                # Reports written by the agents go next to the briefs' reports, one file per session
+                manager.memory.report_file = self.reports_dir / f"{job.session_id}.md"
+                job.output = await manager.handle_turn(job.payload)
+            job.status = "done"
+        except asyncio.CancelledError:
+            job.status, job.error = "failed", "Service stopped"
+            raise
+        except Exception as e:
+            job.status, job.error = "failed", f"{type(e).__name__}: {e}"
+        finally:
+            _current_job.reset(token)
+            channel.flush(job.id)
+            job.finished_at = time.time()
+            channel.publish("job", job.to_dict())
+            self._finish(job)
+
+        seconds = job.finished_at - job.started_at
+        if job.error:
+            print(f"❌ Service: {job.kind} {job.id} failed after {seconds:.1f}s: {job.error}")
+        else:
+            print(f"✅ Service: {job.kind} {job.id} done in {seconds:.1f}s")
+
+    def _finish(self, job: Job) -> None:
+        """Record a finished job, forgetting the oldest finished jobs beyond the job history."""
+        self.open_session(job.session_id)
+        self._finished.append(job.id)
+        while len(self._finished) > self.job_history:
+            self.jobs.pop(self._finished.popleft(), None)
+
+
+def _sse(events: AsyncIterator[Optional[Event]]) -> StreamingResponse:
+    """Stream events as server-sent events."""
+
+    async def body() -> AsyncIterator[str]:
+        async for event in events:
+            if event is None:
+                yield ": keep-alive\n\n"
+            else:
+                event_id, name, data = event
+                yield f"id: {event_id}\nevent: {name}\ndata: {json.dumps(data)}\n\n"
+
+    return StreamingResponse(body(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+def _error(status_code: int, message: str) -> JSONResponse:
+    return JSONResponse({"error": message}, status_code=status_code)
+
+
+def create_app(service: Optional[ResearchService] = None) -> Starlette:
+    """
+    Build the HTTP application around a research service.
+
+    Args:
+        service: The service to expose (a new one by default); it is started and stopped with the app
+
+    Returns:
+        The ASGI application
+    """
+    service = service or ResearchService()
+
+    async def submit_brief(request: Request) -> Response:
+        try:
+            brief = await request.json()
+        except json.JSONDecodeError:
+            return _error(400, "The body must be a JSON research brief")
+        if not isinstance(brief, dict) or not brief:
+            return _error(400, "The body must be a JSON research brief")
+        job = service.submit_brief(brief)
+        return JSONResponse({"session_id": job.session_id, "job_id": job.id}, status_code=202)
+
+    async def create_session(request: Request) -> Response:
+        session_id = service.open_session()
+        return JSONResponse({"session_id": session_id}, status_code=201)
+
+    def find_session(request: Request) -> Optional[str]:
+        """The id of the request's session if the service knows it (marking it active), otherwise None."""
+        session_id = request.path_params["session_id"]
+        if not service.has_session(session_id):
+            return None
+        return service.open_session(session_id)
+
+    async def submit_turn(request: Request) -> Response:
+        try:
+            body = await request.json()
+        except json.JSONDecodeError:
+            body = None
+        message = body.get("message") if isinstance(body, dict) else None
+        if not isinstance(message, str) or not message.strip():
+            return _error(400, 'The body must be {"message": "..."}')
+        session_id = find_session(request)
+        if session_id is None:
+            return _error(404, "Unknown session")
+        job = service.submit_turn(session_id, message.strip())
+        return JSONResponse({"session_id": job.session_id, "job_id": job.id}, status_code=202)
+
+    async def get_session(request: Request) -> Response:
+        session_id = find_session(request)
+        if session_id is None:
+            return _error(404, "Unknown session")
+        memory = get_agent_memory(session_id)
+        return JSONResponse({
+            "session_id": session_id,
+            "state": {flag: memory.get_state(flag) for flag in STATE_FLAGS},
+            "report_path": await memory.get_report_path(),
+            "jobs": [job.to_dict() for job in service.session_jobs(session_id)],
+            "usage": [
+                {"agent": agent, "model": model, **usage.to_dict()}
+                for (agent, model), usage in (await memory.get_usage(("agent", "model"))).items()
+            ],
+        })
+
+    async def session_events(request: Request) -> Response:
+        try:
+            after = int(request.headers.get("last-event-id") or request.query_params.get("after") or 0)
+        except ValueError:
+            return _error(400, "Last-Event-ID must be an event id")
+        session_id = find_session(request)
+        if session_id is None:
+            return _error(404, "Unknown session")
+        return _sse(service.channel(session_id).subscribe(after))
+
+    async def get_report(request: Request) -> Response:
+        session_id = find_session(request)
+        if session_id is None:
+            return _error(404, "Unknown session")
+        report = await get_agent_memory(session_id).get_report()
+        if not report:
+            return _error(404, "No report has been written for this session yet")
+        return PlainTextResponse(report, media_type="text/markdown")
+
+    async def get_job(request: Request) -> Response:
+        job = service.jobs.get(request.path_params["job_id"])
+        if job is None:
+            return _error(404, "Unknown job")
+        return JSONResponse(job.to_dict())
+
+    async def job_events(request: Request) -> Response:
+        job = service.jobs.get(request.path_params["job_id"])
+        if job is None:
+            return _error(404, "Unknown job")
+
+        async def events() -> AsyncIterator[Optional[Event]]:
+            async for event in service.channel(job.session_id).subscribe():
+                if event is None or event[2].get("job_id") == job.id:
+                    yield event
+                if event is not None and event[1] == "job" and event[2]["job_id"] == job.id and event[2]["status"] in ("done", "failed"):
+                    return
+
+        return _sse(events())
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette) -> AsyncIterator[None]:
+        await service.start()
+        try:
+            yield
+        finally:
+            await service.stop()
+            await close_fetch_engine()
+
+    app = Starlette(
+        routes=[
+            Route("/briefs", submit_brief, methods=["POST"]),
+            Route("/sessions", create_session, methods=["POST"]),
+            Route("/sessions/{session_id}/turns", submit_turn, methods=["POST"]),
+            Route("/sessions/{session_id}", get_session, methods=["GET"]),
+            Route("/sessions/{session_id}/events", session_events, methods=["GET"]),
+            Route("/sessions/{session_id}/report", get_report, methods=["GET"]),
+            Route("/jobs/{job_id}", get_job, methods=["GET"]),
+            Route("/jobs/{job_id}/events", job_events, methods=["GET"]),
+        ],
+        lifespan=lifespan,
+    )
+    app.state.service = service
+    return app
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Serve the HTTP API from the command line."""
+    parser = argparse.ArgumentParser(prog="python -m src.server", description="Serve deep research over HTTP.")
+    parser.add_argument("--host", default=SERVICE_HOST, help="address to listen on")
+    parser.add_argument("--port", type=int, default=SERVICE_PORT, help="port to listen on")
+    parser.add_argument("--workers", type=int, default=SERVICE_MAX_WORKERS, help="jobs run at once")
+    args = parser.parse_args(argv)
+
+    uvicorn.run(create_app(ResearchService(args.workers)), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
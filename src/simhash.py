@@ -0,0 +1,113 @@
+import hashlib
+import re
+from collections import Counter
+from typing import Dict, Generic, Hashable, List, Optional, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+FINGERPRINT_BITS = 64
+
+# Words per shingle; 3-word shingles keep word order without being brittle to small edits
+SHINGLE_SIZE = 3
+
+# Texts with fewer shingles than this get no fingerprint, since short texts collide too easily
+MIN_SHINGLES = 20
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _hash64(feature: str) -> int:
+    """Stable 64-bit hash of a feature."""
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(text: str, shingle_size: int = SHINGLE_SIZE, min_shingles: int = MIN_SHINGLES) -> Optional[int]:
+    """
+    Compute the 64-bit SimHash fingerprint of a text.
+
+    Texts that share most of their word shingles get fingerprints that differ
+    in only a few bits, so near-duplicates can be found by Hamming distance.
+
+    Args:
+        text: str - the text to fingerprint
+        shingle_size: int - number of words per shingle
+        min_shingles: int - minimum number of shingles to fingerprint a text
+
+    Returns:
+        The fingerprint, or None if the text is too short to fingerprint reliably
+    """
+    words = _WORD_RE.findall(text.lower())
+    shingles = Counter(" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1))
+    if sum(shingles.values()) < min_shingles:
+        return None
+
+    weights = [0] * FINGERPRINT_BITS
+    for shingle, count in shingles.items():
+        feature_hash = _hash64(shingle)
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += count if feature_hash >> bit & 1 else -count
+
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two fingerprints."""
+    return bin(a ^ b).count("1")
+
+
+class SimHashIndex(Generic[K]):
+    """
+    Index of SimHash fingerprints answering "is there a fingerprint within k bits?".
+
+    Fingerprints are split into k + 1 bands; two fingerprints within k bits of each
+    other must agree on at least one whole band, so only fingerprints sharing a
+    band with the query are compared instead of every indexed fingerprint.
+    """
+
+    def __init__(self, max_distance: int = 3):
+        """
+        Initialize an empty index.
+
+        Args:
+            max_distance: Largest Hamming distance still considered a near-duplicate
+        """
+        self.max_distance = max_distance
+        band_count = max_distance + 1
+        band_width = -(-FINGERPRINT_BITS // band_count)
+        self._bands: List[Tuple[int, int]] = [
+            (start, min(band_width, FINGERPRINT_BITS - start)) for start in range(0, FINGERPRINT_BITS, band_width)
+        ]
+        self._buckets: List[Dict[int, List[Tuple[int, K]]]] = [{} for _ in self._bands]
+
+    def _band_values(self, fingerprint: int) -> List[int]:
+        """Values of each band of a fingerprint."""
+        return [fingerprint >> start & ((1 << width) - 1) for start, width in self._bands]
+
+    def find(self, fingerprint: int) -> Optional[K]:
+        """
+        Find an indexed near-duplicate of a fingerprint.
+
+        Args:
+            fingerprint: The fingerprint to look up
+
+        Returns:
+            The key of the closest indexed fingerprint within max_distance, or None
+        """
+        best: Optional[Tuple[int, K]] = None
+        for buckets, value in zip(self._buckets, self._band_values(fingerprint)):
+            for candidate, key in buckets.get(value, ()):
+                distance = hamming_distance(fingerprint, candidate)
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, key)
+        return best[1] if best else None
+
+    def add(self, fingerprint: int, key: K) -> None:
+        """
+        Index a fingerprint.
+
+        Args:
+            fingerprint: The fingerprint
+            key: The key returned by find for this fingerprint
+        """
+        for buckets, value in zip(self._buckets, self._band_values(fingerprint)):
+            buckets.setdefault(value, []).append((fingerprint, key))
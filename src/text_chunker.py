@@ -0,0 +1,121 @@
+import logging
+import re
+from functools import cache
+from typing import Any, List, Optional
+
+import tiktoken
+
+logger = logging.getLogger(__name__)
+
+# Encoding used when tiktoken doesn't know the model
+DEFAULT_ENCODING = "o200k_base"
+
+# Rough characters-per-token ratio, only used if no encoding can be loaded (e.g. offline)
+FALLBACK_CHARS_PER_TOKEN = 4
+
+_PARAGRAPH_SPLIT_RE = re.compile(r"\n\s*\n|\n")
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+@cache
+def _get_encoding(model: str) -> Optional[Any]:
+    """Get the tiktoken encoding for a model, or None if no encoding can be loaded."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        pass
+    except Exception as e:
+        logger.warning(f"Could not load tiktoken encoding for {model}: {e}")
+        return None
+
+    try:
+        return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception as e:
+        logger.warning(f"Could not load tiktoken encoding {DEFAULT_ENCODING}, estimating token counts: {e}")
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4.1") -> int:
+    """
+    Count the tokens of a text for a model.
+
+    Args:
+        text: str - the text to count
+        model: str - the model whose tokenizer to use
+
+    Returns:
+        Number of tokens
+    """
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return -(-len(text) // FALLBACK_CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _split_by_tokens(text: str, max_tokens: int, model: str) -> List[str]:
+    """Hard-split a text that has no usable boundaries into pieces of at most max_tokens."""
+    encoding = _get_encoding(model)
+    if encoding is None:
+        size = max_tokens * FALLBACK_CHARS_PER_TOKEN
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+    tokens = encoding.encode(text, disallowed_special=())
+    return [encoding.decode(tokens[i:i + max_tokens]) for i in range(0, len(tokens), max_tokens)]
+
+
+def _pack(units: List[str], separator: str, max_tokens: int, model: str) -> List[str]:
+    """Greedily pack units into chunks of at most max_tokens, splitting oversized units further."""
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    separator_tokens = count_tokens(separator, model)
+
+    for unit in units:
+        unit_tokens = count_tokens(unit, model)
+
+        if unit_tokens > max_tokens:
+            # Flush what we have, then break the oversized unit down
+            if current:
+                chunks.append(separator.join(current))
+                current, current_tokens = [], 0
+            if separator == "\n":
+                sentences = [s for s in _SENTENCE_SPLIT_RE.split(unit) if s.strip()]
+                if len(sentences) > 1:
+                    chunks.extend(_pack(sentences, " ", max_tokens, model))
+                    continue
+            chunks.extend(_split_by_tokens(unit, max_tokens, model))
+            continue
+
+        added_tokens = unit_tokens + (separator_tokens if current else 0)
+        if current and current_tokens + added_tokens > max_tokens:
+            chunks.append(separator.join(current))
+            current, current_tokens = [], 0
+            added_tokens = unit_tokens
+
+        current.append(unit)
+        current_tokens += added_tokens
+
+    if current:
+        chunks.append(separator.join(current))
+
+    return chunks
+
+
+def chunk_text(text: str, max_tokens: int, model: str = "gpt-4.1") -> List[str]:
+    """
+    Split a text into chunks of at most max_tokens tokens.
+
+    Chunks are packed from whole paragraphs; a paragraph that is too long on its
+    own is split on sentence boundaries, and a sentence that is still too long is
+    split on token boundaries.
+
+    Args:
+        text: str - the text to split
+        max_tokens: int - the token budget of each chunk
+        model: str - the model whose tokenizer to use
+
+    Returns:
+        List of chunks, in order (empty if the text is blank)
+    """
+    paragraphs = [p.strip() for p in _PARAGRAPH_SPLIT_RE.split(text) if p.strip()]
+    return _pack(paragraphs, "\n", max(1, max_tokens), model)
@@ -1,13 +1,14 @@
-from agents import Agent, Runner, function_tool
+from agents import Agent, RunContextWrapper, function_tool
 
-from src.agent_memory import AGENT_MEMORY
+from src.agent_memory import AgentMemory, agent_memory_from
+from src.llm_scheduler import LLM_SCHEDULER
 
 @function_tool
-async def plan_summarizer_tool() -> str:
+async def plan_summarizer_tool(ctx: RunContextWrapper[AgentMemory]) -> str:
     """Summarize the research plan for the user to review."""
     
     # Get the research plan from the session
-    research_plan = await AGENT_MEMORY.get_research_plan()
+    research_plan = await agent_memory_from(ctx).get_research_plan()
 
     plan_summarizer = Agent(
         name="Plan Summarizer Tool-Agent",
@@ -20,6 +21,6 @@ async def plan_summarizer_tool() -> str:
         model="gpt-4.1",
     )
     
-    summary = await Runner.run(plan_summarizer, str(research_plan))
+    summary = await LLM_SCHEDULER.run(plan_summarizer, str(research_plan))
     
     return summary.final_output
\ No newline at end of file
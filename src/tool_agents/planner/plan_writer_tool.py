@@ -1,6 +1,8 @@
-from agents import Agent, Runner, function_tool
+from agents import Agent, RunContextWrapper, function_tool
 
-from src.agent_memory import AGENT_MEMORY
+from src.agent_memory import AgentMemory, agent_memory_from
+from src.llm_scheduler import LLM_SCHEDULER
+from src.tracing import TRACER
 
 PLAN_WRITER_PROMPT_SHORT_RESEARCH = """
     You are the Plan Writer, a strategic research planning assistant for the Planner Agent.
@@ -92,12 +94,18 @@ PLAN_WRITER_PROMPT = """
             - Research Questions:
     """
 
-@function_tool
-async def plan_writer_tool() -> bool:
-    """Create a research plan for the user's business idea using session conversation history."""
-
+async def write_plan(memory: AgentMemory) -> str:
+    """
+    Create a research plan from a session's conversation history and store it in the session's memory.
+    
+    Args:
+        memory: AgentMemory - memory of the session
+        
+    Returns:
+        The research plan
+    """
     # Get the conversation history from the session
-    conversation_history = await AGENT_MEMORY.get_items()
+    conversation_history = await memory.get_items()
 
     plan_writer = Agent(
         name="Plan Writer Tool-Agent",
@@ -106,10 +114,17 @@ async def plan_writer_tool() -> bool:
     )
     
     # Run the plan_writer agent and save its output to the agent memory
-    research_plan = await Runner.run(plan_writer, str(conversation_history))
-    await AGENT_MEMORY.store_research_plan(research_plan.final_output)
+    with TRACER.span("write_plan", session_id=memory.session_id):
+        research_plan = await LLM_SCHEDULER.run(plan_writer, str(conversation_history))
+    await memory.store_research_plan(research_plan.final_output)
 
     # Set the state plan_generated to True
-    AGENT_MEMORY.set_state("plan_generated", True)
+    memory.set_state("plan_generated", True)
     
+    return research_plan.final_output
+
+@function_tool
+async def plan_writer_tool(ctx: RunContextWrapper[AgentMemory]) -> bool:
+    """Create a research plan for the user's business idea using session conversation history."""
+    await write_plan(agent_memory_from(ctx))
     return True
\ No newline at end of file
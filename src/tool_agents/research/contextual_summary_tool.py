@@ -1,55 +1,98 @@
-from agents import Agent, Runner
+import asyncio
+from typing import List
 
-async def contextual_summary_tool(research_question: str, raw_text: str) -> str:
-    """Summarize a raw text chunk from a research source, contextualized to the research question.
-    
-    Args:
-        research_question: str - the research question to contextualize the summary to
-        raw_text: str - the raw text chunk to summarize
-    """
-    
-    # Truncate content if it's too long to avoid context window issues
-    # Most LLMs have context limits around 8k-32k tokens, so we'll be conservative
-    # Assuming roughly 4 characters per token, we'll limit to ~6000 tokens = ~24k characters
-    MAX_CONTENT_LENGTH = 24000
-    
-    if len(raw_text) > MAX_CONTENT_LENGTH:
-        # Truncate to the first MAX_CONTENT_LENGTH characters
-        # Try to break at a sentence boundary if possible
-        truncated_text = raw_text[:MAX_CONTENT_LENGTH]
-        
-        # Try to find the last complete sentence
-        last_period = truncated_text.rfind('.')
-        last_exclamation = truncated_text.rfind('!')
-        last_question = truncated_text.rfind('?')
-        
-        # Find the latest sentence ending
-        sentence_end = max(last_period, last_exclamation, last_question)
-        
-        if sentence_end > MAX_CONTENT_LENGTH * 0.8:  # Only use sentence boundary if it's not too early
-            truncated_text = truncated_text[:sentence_end + 1]
-        
-        raw_text = truncated_text + "\n\n[Content truncated due to length constraints]"
+from agents import Agent
 
-    contextual_summarizer = Agent(
-        name="Contextual Summary Tool-Agent",
-        instructions=f"""
+from src.globals import SUMMARY_CHUNK_TOKENS
+from src.llm_scheduler import LLM_SCHEDULER, Priority
+from src.text_chunker import chunk_text, count_tokens
+from src.tool_agents.research.summary_cache import get_summary_cache
+from src.tracing import TRACER
+
+SUMMARY_MODEL = "gpt-4.1"
+
+# Bump whenever the summary prompts or the chunking pipeline change so cached summaries aren't reused
+SUMMARY_PROMPT_VERSION = "2"
+
+CONTEXTUAL_SUMMARY_PROMPT = """
         You are a contextual summarizer, summarizing information from research sources.
         Given the following research question, summarize the raw text chunk (passed as input), contextualized to the research question.
         Make sure to include relevant statistics, data, and other information that is relevant to the research question.
         If certain statistics are cited by other sources, cite it with the url or the source name at the end of the sentence.
         The summary should be concise and to the point, and should be no more than 200 words long.
         Research question: {research_question}
-        """,
-        model="gpt-4.1",
+        """
+
+SUMMARY_REDUCE_PROMPT = """
+        You are a contextual summarizer, merging partial summaries of one long research source.
+        Given the following research question, combine the partial summaries (passed as input) into a single summary, contextualized to the research question.
+        Keep the most relevant statistics, data and citations, and remove repetition.
+        The summary should be concise and to the point, and should be no more than 200 words long.
+        Research question: {research_question}
+        """
+
+async def _summarize_chunk(research_question: str, text: str) -> str:
+    """Summarize a single chunk that fits in the per-call token budget."""
+    contextual_summarizer = Agent(
+        name="Contextual Summary Tool-Agent",
+        instructions=CONTEXTUAL_SUMMARY_PROMPT.format(research_question=research_question),
+        model=SUMMARY_MODEL,
     )
+    summary = await LLM_SCHEDULER.run(contextual_summarizer, text, priority=Priority.BACKGROUND)
+    return summary.final_output
+
+async def _reduce_summaries(research_question: str, summaries: List[str]) -> str:
+    """Merge partial summaries into one, in rounds if they don't fit in a single call."""
+    while len(summaries) > 1:
+        groups = chunk_text("\n\n".join(summaries), SUMMARY_CHUNK_TOKENS, SUMMARY_MODEL)
+        if len(groups) >= len(summaries):
+            # No packing progress possible, so merge everything in one call
+            groups = ["\n\n".join(summaries)]
+        summary_reducer = Agent(
+            name="Contextual Summary Reducer Tool-Agent",
+            instructions=SUMMARY_REDUCE_PROMPT.format(research_question=research_question),
+            model=SUMMARY_MODEL,
+        )
+        results = await asyncio.gather(*(LLM_SCHEDULER.run(summary_reducer, group, priority=Priority.BACKGROUND) for group in groups))
+        summaries = [result.final_output for result in results]
+    return summaries[0]
+
+async def contextual_summary_tool(research_question: str, raw_text: str) -> str:
+    """Summarize a raw text chunk from a research source, contextualized to the research question.
+    
+    Texts longer than SUMMARY_CHUNK_TOKENS are split on paragraph/sentence boundaries,
+    the chunks are summarized concurrently and the partial summaries are reduced into one.
     
-    try:
-        summary = await Runner.run(contextual_summarizer, raw_text)
-        return summary.final_output
-    except Exception as e:
-        # If summarization fails due to context window or other issues, return a fallback
-        if "context_length_exceeded" in str(e) or "context window" in str(e).lower():
-            return f"Content too large to summarize. Key points from the source: {raw_text[:500]}..."
+    Args:
+        research_question: str - the research question to contextualize the summary to
+        raw_text: str - the raw text chunk to summarize
+        
+    Returns:
+        The summary
+        
+    Raises:
+        Exception: If the summarizer fails (nothing is cached then, so a later run retries)
+    """
+    
+    with TRACER.span("summarize", chars=len(raw_text)) as span:
+        # Reuse a summary of the same text for the same question from an earlier run
+        summary_cache = get_summary_cache()
+        if summary_cache:
+            cached_summary = await summary_cache.get(research_question, raw_text, SUMMARY_MODEL, SUMMARY_PROMPT_VERSION)
+            span.set(cache_hit=cached_summary is not None)
+            if cached_summary is not None:
+                return cached_summary
+        
+        if count_tokens(raw_text, SUMMARY_MODEL) <= SUMMARY_CHUNK_TOKENS:
+            span.set(chunks=1)
+            summary = await _summarize_chunk(research_question, raw_text)
         else:
-            return f"Error summarizing content: {str(e)}"
\ No newline at end of file
+            # Map: summarize every chunk concurrently, then reduce the partial summaries
+            chunks = chunk_text(raw_text, SUMMARY_CHUNK_TOKENS, SUMMARY_MODEL)
+            span.set(chunks=len(chunks))
+            partial_summaries = await asyncio.gather(*(_summarize_chunk(research_question, chunk) for chunk in chunks))
+            summary = await _reduce_summaries(research_question, list(partial_summaries))
+        
+        if summary_cache:
+            await summary_cache.store(research_question, raw_text, SUMMARY_MODEL, SUMMARY_PROMPT_VERSION, summary)
+        return summary
@@ -0,0 +1,125 @@
+import re
+from typing import Dict, List, Optional
+
+# Labels the plan writer uses for the fields of a research area (other than the questions)
+AREA_FIELD_LABELS = {"sub-topics", "subtopics", "sub-areas", "subareas", "summary"}
+
+# Area headers: markdown headings ("### A. Market Analysis") or list items that are
+# entirely bold ("- **Market Analysis**", "2. **Research Areas**")
+_HEADING_RE = re.compile(r"^\s*#{1,6}\s+(?P<name>.+?)\s*#*\s*$")
+_BOLD_ITEM_RE = re.compile(r"^\s*(?:[-*+•]|\d+[.)])?\s*\*\*(?P<name>[^*]+?)\*\*\s*:?\s*$")
+
+# Field labels: "- Research Questions:", "**Research Question:** What ...?", "- Summary: ..."
+_LABEL_RE = re.compile(r"^\s*(?:[-*+•]\s*)?\**(?P<label>[A-Za-z][A-Za-z &/-]{0,40}?)\**\s*:\s*\**\s*(?P<rest>.*)$")
+
+# List items: "- ...", "• ...", "1. ...", "1) ..."
+_LIST_ITEM_RE = re.compile(r"^\s*(?:[-*+•]|\d+[.)])\s+(?P<text>.+)$")
+
+# Leading enumerators in area names: "A. ", "1. ", "IV. "
+_ENUMERATOR_RE = re.compile(r"^(?:[A-Z]|\d+|[IVX]+)[.)]\s+")
+
+
+def _clean(text: str) -> str:
+    """Strip markdown emphasis and surrounding whitespace."""
+    return text.replace("**", "").replace("__", "").strip()
+
+
+def _area_name(line: str) -> Optional[str]:
+    """Return the area name if the line is an area header, otherwise None."""
+    match = _HEADING_RE.match(line) or _BOLD_ITEM_RE.match(line)
+    if not match:
+        return None
+    name = _clean(match.group("name"))
+    if name.endswith(":") and not _HEADING_RE.match(line):
+        # A bold field label such as "**Research Questions:**", not an area
+        return None
+    return _ENUMERATOR_RE.sub("", name.rstrip(":").strip()) or None
+
+
+def _is_question_label(label: str) -> bool:
+    """Check whether a field label introduces research questions."""
+    return _clean(label).lower() in ("research question", "research questions")
+
+
+def parse_research_plan(research_plan: str) -> Dict[str, List[str]]:
+    """
+    Parse a markdown research plan into its research areas and research questions.
+
+    Understands the formats produced by PLAN_WRITER_PROMPT and its short variant:
+    areas as headings or bold list items, and questions either inline after
+    "Research Question:" or as a bulleted/numbered list under "Research Questions:".
+
+    Args:
+        research_plan: str - the markdown research plan
+
+    Returns:
+        Dict mapping each research area to its research questions, in plan order.
+        Areas without questions are omitted; an empty dict means parsing failed.
+    """
+    areas: Dict[str, List[str]] = {}
+    current_area = "General"
+    in_questions = False
+    previous_was_question = False
+
+    for line in research_plan.splitlines():
+        if not line.strip():
+            previous_was_question = False
+            continue
+
+        area = _area_name(line)
+        if area is not None:
+            current_area = area
+            in_questions = False
+            previous_was_question = False
+            continue
+
+        label_match = _LABEL_RE.match(line)
+        if label_match and _is_question_label(label_match.group("label")):
+            in_questions = True
+            previous_was_question = False
+            inline_question = _clean(label_match.group("rest"))
+            if inline_question:
+                areas.setdefault(current_area, []).append(inline_question)
+                previous_was_question = True
+            continue
+
+        if label_match and _clean(label_match.group("label")).lower() in AREA_FIELD_LABELS:
+            in_questions = False
+            previous_was_question = False
+            continue
+
+        if not in_questions:
+            continue
+
+        item_match = _LIST_ITEM_RE.match(line)
+        if item_match:
+            question = _clean(item_match.group("text"))
+            if question:
+                areas.setdefault(current_area, []).append(question)
+                previous_was_question = True
+        elif previous_was_question and line[:1].isspace():
+            # Wrapped continuation of the previous question
+            areas[current_area][-1] = f"{areas[current_area][-1]} {_clean(line)}"
+        else:
+            in_questions = False
+            previous_was_question = False
+
+    return areas
+
+
+def extract_research_questions(research_plan: str) -> List[str]:
+    """
+    Extract the research questions from a markdown research plan.
+
+    Args:
+        research_plan: str - the markdown research plan
+
+    Returns:
+        Unique research questions in plan order (empty if parsing failed)
+    """
+    questions: List[str] = []
+    for area_questions in parse_research_plan(research_plan).values():
+        for question in area_questions:
+            if question not in questions:
+                questions.append(question)
+    return questions
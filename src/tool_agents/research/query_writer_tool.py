@@ -1,6 +1,9 @@
-from agents import Agent, Runner
+from agents import Agent
 from typing import List
 
+from src.llm_scheduler import LLM_SCHEDULER
+from src.tracing import TRACER
+
 async def query_writer_tool(research_question: str) -> List[str]:
     """Given a research question, generate a list of search queries to use for web search.
     
@@ -20,7 +23,9 @@ async def query_writer_tool(research_question: str) -> List[str]:
         model="gpt-4.1",
     )
     
-    search_queries = await Runner.run(search_query_generator, research_question)
-    queries_list = search_queries.final_output.split(",")
+    with TRACER.span("write_queries", question=research_question) as span:
+        search_queries = await LLM_SCHEDULER.run(search_query_generator, research_question)
+        queries_list = search_queries.final_output.split(",")
+        span.set(queries=len(queries_list))
 
     return queries_list
\ No newline at end of file
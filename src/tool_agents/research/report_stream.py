@@ -0,0 +1,152 @@
+import re
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, TextIO
+
+from src.globals import REPORTS_DIR
+
+# Citations in report text: [1], [2, 3]
+CITATION_RE = re.compile(r"\[(\d+(?:\s*,\s*\d+)*)\]")
+
+# Longest text held back while waiting for a citation's closing bracket
+_MAX_PENDING_CITATION = 32
+
+
+def default_report_path(session_id: Optional[str] = None) -> Path:
+    """
+    Timestamped report file in REPORTS_DIR, named after the session so reports finished in the same second don't collide.
+
+    Args:
+        session_id: Optional[str] - the session writing the report (a random id if None)
+
+    Returns:
+        The path of the report file
+    """
+    name = re.sub(r"[^\w.-]", "_", session_id) if session_id else uuid.uuid4().hex[:12]
+    return Path(REPORTS_DIR) / f"report-{time.strftime('%Y%m%d-%H%M%S')}-{name}.md"
+
+
+def renumber_citations(text: str, numbers: Dict[int, int]) -> str:
+    """
+    Replace citation numbers ([2], [1, 3]) using a mapping, leaving unknown numbers as they are.
+
+    Args:
+        text: str - the text citing sources by number
+        numbers: Dict[int, int] - old citation number to new citation number
+
+    Returns:
+        The text with renumbered citations
+    """
+    def renumber(match: re.Match[str]) -> str:
+        cited = [int(number) for number in re.split(r"\s*,\s*", match.group(1))]
+        return "[" + ", ".join(str(numbers.get(number, number)) for number in cited) + "]"
+    return CITATION_RE.sub(renumber, text)
+
+
+class CitationRenumberer:
+    """
+    Renumber citations in text that arrives in arbitrary chunks.
+
+    Text after an unclosed "[" is held back until the bracket closes, so a
+    citation split across two chunks is still renumbered.
+    """
+
+    def __init__(self, numbers: Dict[int, int]):
+        self.numbers = numbers
+        self._pending = ""
+
+    def feed(self, text: str) -> str:
+        """Add a chunk and get the text that is ready to emit."""
+        self._pending += text
+        cut = self._pending.rfind("[")
+        if cut == -1 or "]" in self._pending[cut:] or len(self._pending) - cut > _MAX_PENDING_CITATION:
+            cut = len(self._pending)
+        ready, self._pending = self._pending[:cut], self._pending[cut:]
+        return renumber_citations(ready, self.numbers)
+
+    def flush(self) -> str:
+        """Get the text still held back."""
+        ready, self._pending = self._pending, ""
+        return renumber_citations(ready, self.numbers)
+
+
+class ReportStream:
+    """
+    Sink that writes a report to the console and to a markdown file as it is generated.
+
+    The report is written in parts (introduction, sections, conclusion, references)
+    that may be generated concurrently but are emitted in order: text for the
+    current part is written immediately, text for later parts is buffered until
+    every earlier part is finished.
+    """
+
+    def __init__(self, part_count: int, path: Optional[Path] = None, console: Optional[TextIO] = None):
+        """
+        Open the report stream.
+
+        Args:
+            part_count: Number of parts the report is written in
+            path: File to write the report to (a new timestamped file in REPORTS_DIR by default)
+            console: Console stream (stdout by default)
+        """
+        self.path = Path(path) if path else default_report_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._console = console or sys.stdout
+        self._buffers: List[List[str]] = [[] for _ in range(part_count)]
+        self._written: List[str] = []
+        self._finished = [False] * part_count
+        self._current = 0
+
+    def _emit(self, text: str) -> None:
+        """Write text to the console and the file."""
+        if not text:
+            return
+        self._written.append(text)
+        self._console.write(text)
+        self._console.flush()
+        self._file.write(text)
+        self._file.flush()
+
+    @property
+    def text(self) -> str:
+        """The report written so far."""
+        return "".join(self._written).strip()
+
+    def write(self, part: int, text: str) -> None:
+        """
+        Add text to a part of the report.
+
+        Args:
+            part: Index of the part
+            text: The text to add
+        """
+        if part == self._current:
+            self._emit(text)
+        else:
+            self._buffers[part].append(text)
+
+    def finish(self, part: int, separator: str = "\n\n") -> None:
+        """
+        Mark a part as complete and emit the buffered parts that are now next in line.
+
+        Args:
+            part: Index of the part
+            separator: Text written after the part
+        """
+        self.write(part, separator)
+        self._finished[part] = True
+        while self._current < len(self._finished) and self._finished[self._current]:
+            self._current += 1
+            if self._current < len(self._buffers):
+                self._emit("".join(self._buffers[self._current]))
+                self._buffers[self._current] = []
+
+    def close(self) -> None:
+        """Emit whatever is still buffered and close the file."""
+        for buffer in self._buffers[self._current:]:
+            self._emit("".join(buffer))
+        self._buffers = [[] for _ in self._buffers]
+        self._file.close()
@@ -1,8 +1,15 @@
 from ast import Str
-from agents import Agent, Runner, function_tool
-from typing import List, Tuple
+from agents import Agent, RunContextWrapper, function_tool
+from openai.types.responses import ResponseTextDeltaEvent
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
+import asyncio
 
-from src.agent_memory import AGENT_MEMORY
+from src.agent_memory import AgentMemory, agent_memory_from, get_agent_memory
+from src.llm_scheduler import LLM_SCHEDULER, Priority
+from src.tool_agents.research.plan_parser import parse_research_plan
+from src.tool_agents.research.report_stream import CitationRenumberer, ReportStream, default_report_path
+from src.tracing import TRACER
 
 REPORT_WRITER_PROMPT = """
     You are the Report Writer, in charge of generating a comprehensive research report given a research plan and a set of research insights.
@@ -19,7 +26,7 @@ REPORT_WRITER_PROMPT = """
 
     MANDATORY PROCESS:
     1. Review the research plan - the report needs to comprehensively cover all research areas
-    2. Get all of the research insights from the research dump using the get_research_dump tool
+    2. For each research area, search the research dump using the search_research_dump tool with focused queries (e.g. the area's research questions and key topics); search again with other queries if the results don't cover the area
     3. Build the research report using a professional tone and style
     4. Use the research insights to cite sources and provide evidence
     5. Ensure the report is actionable and helps the user actualize their idea
@@ -48,33 +55,283 @@ REPORT_WRITER_PROMPT = """
         - Template: 1. [Source Title]: [URL]
     """
 
+SECTION_WRITER_PROMPT = """
+    You are a Report Section Writer, writing one section of a comprehensive research report.
+
+    Research area: {area}
+
+    Given the research questions of this area and the numbered sources gathered for them (passed as input),
+    write the section of the report for this research area.
+
+    REQUIREMENTS:
+    - Start with the heading "### {area}"
+    - Answer the research questions using the sources, with relevant statistics, data and evidence
+    - Cite sources by their number in square brackets at the end of the sentence, e.g. [1] or [2, 3]
+    - Only cite the numbered sources provided; do not invent sources
+    - Use a professional tone and make the section actionable for the user
+    - Do not write an introduction, conclusion or reference list
+    """
+
+INTRODUCTION_WRITER_PROMPT = """
+    You are the Report Introduction Writer, writing the opening of a comprehensive research report.
+    Given the research plan (passed as input), write the following two sections in markdown:
+
+    1. **Information**
+        - The product information from the research plan (name, description, features & scope).
+
+    2. **Introduction**
+        - Overview of research topics covered in the report.
+
+    Do not write any other section.
+    """
+
+CONCLUSION_WRITER_PROMPT = """
+    You are the Report Conclusion Writer, closing a comprehensive research report.
+    Given the research plan and the written sections of the report (passed as input), write only the Conclusion section in markdown:
+
+    **Conclusion**
+        - Summarize the research findings.
+        - Validate the user's idea based on the research findings.
+        - Suggest next steps for the user to take.
+
+    Keep the citations of the sections (e.g. [1]) where you reuse their findings, and do not add a reference list.
+    """
+
+# Upper bound on the snippets returned by one search, so a single tool call can't flood the context
+MAX_SEARCH_RESULTS = 20
+
 @function_tool
-async def get_research_dump() -> str:
-    """Get the research dump."""
-    research_dump = await AGENT_MEMORY.get_research_dump()
-    return str(research_dump)
+async def search_research_dump(ctx: RunContextWrapper[AgentMemory], query: str, k: int = 8) -> str:
+    """Search the research dump for the source summaries most relevant to a query.
     
-@function_tool
-async def report_writer_tool() -> str:
-    """Generate a comprehensive research report from research results using the research plan and research dump content."""    
+    Args:
+        query: str - what to look for, e.g. a research question or a topic of a report section
+        k: int - the maximum number of summaries to return
+    """
+    snippets = await agent_memory_from(ctx).search_research_dump(query, max(1, min(k, MAX_SEARCH_RESULTS)))
+    if not snippets:
+        return "No research insights found for this query."
     
-    research_plan = await AGENT_MEMORY.get_research_plan()
+    return "\n\n".join(
+        f"Source: {snippet.title} ({snippet.url})\nResearch question: {snippet.research_question}\nSummary: {snippet.summary}"
+        for snippet in snippets
+    )
     
+async def _stream_agent(agent: Agent, agent_input: str, on_text: Callable[[str], None], context: Any = None) -> str:
+    """Run an agent, passing its output text to on_text as it is generated, and return the final output."""
+    result = LLM_SCHEDULER.run_streamed(agent, agent_input, priority=Priority.INTERACTIVE, context=context)
+    streamed = False
+    async for event in result.stream_events():
+        if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+            on_text(event.data.delta)
+            streamed = True
+    if not streamed and result.final_output:
+        on_text(str(result.final_output))
+    return str(result.final_output)
+
+async def _write_report_with_agent(research_plan: str, on_text: Callable[[str], None], memory: AgentMemory) -> str:
+    """Write the whole report in one Report Writer agent run that searches the research dump itself."""
     report_writer = Agent(
         name="Report Writer Tool-Agent", 
         instructions=REPORT_WRITER_PROMPT,
         model="gpt-4.1",
-        tools=[get_research_dump],
+        tools=[search_research_dump],
+    )
+    with TRACER.span("write_report.agent"):
+        return await _stream_agent(report_writer, research_plan, on_text, context=memory)
+
+async def _area_sources(memory: AgentMemory, area: str, questions: List[str]) -> List[Tuple[str, str, str]]:
+    """Get the (title, url, summary) sources gathered for a research area, one per URL."""
+    entries = []
+    for question in questions:
+        entries.extend(await memory.get_from_research_dump_by_question(question))
+    if not entries:
+        # The dump wasn't keyed by the parsed questions (e.g. LLM fallback research), so retrieve instead
+        snippets = await memory.search_research_dump(" ".join([area, *questions]), MAX_SEARCH_RESULTS)
+        entries = [((snippet.title, snippet.url), snippet.summary) for snippet in snippets]
+    
+    sources: Dict[str, Tuple[str, str, str]] = {}
+    for (title, url), summary in entries:
+        sources.setdefault(url, (title, url, summary))
+    return list(sources.values())
+
+async def _write_section(area: str, questions: List[str], sources: List[Tuple[str, str, str]], on_text: Callable[[str], None]) -> str:
+    """Write the report section of one research area from its own sources, citing them by local number."""
+    numbered_sources = "\n\n".join(
+        f"[{number}] {title} ({url})\n{summary}" for number, (title, url, summary) in enumerate(sources, 1)
+    )
+    section_input = "Research questions:\n" + "\n".join(f"- {question}" for question in questions)
+    section_input += f"\n\nSources:\n{numbered_sources or 'No sources were found for this area.'}"
+    
+    section_writer = Agent(
+        name="Report Section Writer Tool-Agent",
+        instructions=SECTION_WRITER_PROMPT.format(area=area),
+        model="gpt-4.1",
     )
+    with TRACER.span("write_report.section", area=area, sources=len(sources)):
+        return await _stream_agent(section_writer, section_input, on_text)
+
+async def _write_introduction(research_plan: str, on_text: Callable[[str], None]) -> str:
+    """Write the Information and Introduction sections from the research plan."""
+    introduction_writer = Agent(
+        name="Report Introduction Writer Tool-Agent",
+        instructions=INTRODUCTION_WRITER_PROMPT,
+        model="gpt-4.1",
+    )
+    with TRACER.span("write_report.introduction"):
+        return await _stream_agent(introduction_writer, research_plan, on_text)
+
+async def _write_conclusion(research_plan: str, sections: List[str], on_text: Callable[[str], None]) -> str:
+    """Write the Conclusion section from the research plan and the written sections."""
+    conclusion_writer = Agent(
+        name="Report Conclusion Writer Tool-Agent",
+        instructions=CONCLUSION_WRITER_PROMPT,
+        model="gpt-4.1",
+    )
+    conclusion_input = f"Research plan:\n{research_plan}\n\nReport sections:\n\n" + "\n\n".join(sections)
+    with TRACER.span("write_report.conclusion"):
+        return await _stream_agent(conclusion_writer, conclusion_input, on_text)
+
+async def write_report(
+    research_plan: str,
+    report_path: Optional[Path] = None,
+    memory: Optional[AgentMemory] = None,
+    console: Optional[TextIO] = None,
+) -> Tuple[str, Path]:
+    """Write the research report section by section, streaming it to the console and to a file.
+    
+    Every research area of the plan is written concurrently from its own slice of the
+    research dump, while the introduction is written from the plan. The conclusion is
+    then written from the finished sections, and the sections' local citations are
+    merged into one numbered reference list. Parts are streamed in report order as
+    they are generated. Plans that can't be parsed fall back to the single Report
+    Writer agent.
+    
+    Args:
+        research_plan: str - the research plan the report follows
+        report_path: Optional[Path] - file to write the report to (a timestamped file in REPORTS_DIR by default)
+        memory: Optional[AgentMemory] - memory of the session whose research dump is used (the default session by default)
+        console: Optional[TextIO] - where to stream the report besides the file (stdout by default)
+        
+    Returns:
+        (report, path) tuple with the markdown report and the file it was saved to
+    """
+    memory = memory or get_agent_memory()
+    areas = parse_research_plan(research_plan)
+    if not areas:
+        print("📝 Report Writer: Could not parse research areas, falling back to the Report Writer Tool-Agent")
+        stream = ReportStream(1, report_path, console)
+        try:
+            await _write_report_with_agent(research_plan, lambda text: stream.write(0, text), memory)
+            stream.finish(0, "\n")
+        finally:
+            stream.close()
+        return stream.text, stream.path
+    
+    # Number every source report-wide up front, so sections can be renumbered while they stream
+    area_sources = [await _area_sources(memory, area, questions) for area, questions in areas.items()]
+    references: Dict[str, Tuple[int, str]] = {}
+    renumberers = []
+    for sources in area_sources:
+        numbers = {}
+        for local_number, (title, url, _) in enumerate(sources, 1):
+            if url not in references:
+                references[url] = (len(references) + 1, title)
+            numbers[local_number] = references[url][0]
+        renumberers.append(CitationRenumberer(numbers))
+    
+    # Parts: introduction, one per area, conclusion, references
+    conclusion_part = len(areas) + 1
+    stream = ReportStream(len(areas) + 3, report_path, console)
+    section_texts: List[List[str]] = [[] for _ in areas]
+    print(f"📝 Report Writer: Writing {len(areas)} sections concurrently, streaming the report to {stream.path}\n")
+    
+    async def write_introduction() -> None:
+        try:
+            await _write_introduction(research_plan, lambda text: stream.write(0, text))
+        except Exception as e:
+            print(f"❌ Report Writer: Error writing the introduction: {e}")
+        stream.finish(0)
+    
+    async def write_section(index: int, area: str, questions: List[str]) -> None:
+        part = index + 1
+        renumberer = renumberers[index]
+        
+        def on_text(text: str) -> None:
+            text = renumberer.feed(text)
+            section_texts[index].append(text)
+            stream.write(part, text)
         
-    # Run the research report sub-agent
-    result = await Runner.run(report_writer, research_plan)
-    report_content = result.final_output
+        try:
+            await _write_section(area, questions, area_sources[index], on_text)
+        except Exception as e:
+            print(f"❌ Report Writer: Error writing section {area}: {e}")
+            on_text(f"\n\n_The {area} section could not be generated._" if section_texts[index] else f"### {area}\n\n_This section could not be generated._")
+        on_text(renumberer.flush())
+        stream.finish(part)
+    
+    try:
+        stream.write(1, "## Research Areas\n\n")
+        await asyncio.gather(
+            write_introduction(),
+            *(write_section(index, area, questions) for index, (area, questions) in enumerate(areas.items())),
+        )
+        
+        try:
+            await _write_conclusion(research_plan, ["".join(texts) for texts in section_texts], lambda text: stream.write(conclusion_part, text))
+        except Exception as e:
+            print(f"❌ Report Writer: Error writing the conclusion: {e}")
+        stream.finish(conclusion_part)
+        
+        reference_list = "\n".join(f"{number}. {title}: {url}" for url, (number, title) in references.items())
+        stream.write(conclusion_part + 1, f"## References\n\n{reference_list}")
+        stream.finish(conclusion_part + 1, "\n")
+    finally:
+        stream.close()
+    
+    return stream.text, stream.path
+
+async def generate_report(
+    memory: AgentMemory,
+    report_path: Optional[Path] = None,
+    console: Optional[TextIO] = None,
+) -> Tuple[str, Path]:
+    """
+    Write the report of a session from its research plan and research dump, and store it in the session's memory.
+    
+    Args:
+        memory: AgentMemory - memory of the session
+        report_path: Optional[Path] - file to write the report to (the session's report_file, or a timestamped file in
+            REPORTS_DIR named after the session, by default)
+        console: Optional[TextIO] - where to stream the report besides the file (stdout by default)
+        
+    Returns:
+        (report, path) tuple with the markdown report and the file it was saved to
+    """
+    research_plan = await memory.get_research_plan()
+    report_path = report_path or memory.report_file or default_report_path(memory.session_id)
+    
+    # Write the report section by section, streaming it to the user and to disk
+    with TRACER.span("write_report", session_id=memory.session_id) as span:
+        report_content, report_path = await write_report(research_plan, report_path, memory, console)
+        span.set(chars=len(report_content))
 
     # Store the report in the agent memory
-    await AGENT_MEMORY.store_report(report_content)
+    await memory.store_report(report_content, str(report_path))
 
     # Set the state report_generated to True
-    AGENT_MEMORY.set_state("report_generated", True)
+    memory.set_state("report_generated", True)
+    
+    return report_content, report_path
 
-    return report_content
\ No newline at end of file
+@function_tool
+async def report_writer_tool(ctx: RunContextWrapper[AgentMemory]) -> str:
+    """Generate a comprehensive research report from research results using the research plan and research dump content.
+    The report is streamed to the user and saved to a file as it is written; the tool returns where it was saved."""    
+    
+    report_content, report_path = await generate_report(agent_memory_from(ctx))
+
+    return (
+        f"The research report ({len(report_content.split())} words) has been streamed to the user and saved to {report_path}. "
+        "Do not repeat the report; refer the user to the saved file."
+    )
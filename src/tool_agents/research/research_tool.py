@@ -1,8 +1,15 @@
-from agents import Agent, Runner, function_tool
+from typing import Union
 
-from src.tools.researcher_tool import researcher_tool
+from agents import Agent, RunContextWrapper, function_tool
 
-from src.agent_memory import AGENT_MEMORY
+from src.tool_agents.research.plan_parser import extract_research_questions
+from src.tools.researcher_tool import researcher, researcher_tool
+from src.tools.task_scheduler import QUESTION_SCHEDULER
+from src.tools.web_scraper.url_registry import url_registry_scope
+
+from src.agent_memory import AgentMemory, agent_memory_from
+from src.llm_scheduler import LLM_SCHEDULER
+from src.tracing import TRACER
 
 RESEARCHER_PROMPT = """
     You are the Research Tool-Agent.
@@ -13,18 +20,17 @@ RESEARCHER_PROMPT = """
     
     """
 
-@function_tool
-async def research_tool() -> bool:
-    """Conduct web research using the research plan and the research tools provided."""
-    
-    researcher = Agent(
-        name="Research Tool-Agent",
-        instructions=RESEARCHER_PROMPT,
-        tools=[researcher_tool],
-        model="gpt-4.1",
-    )
+async def conduct_research(memory: AgentMemory) -> Union[bool, str]:
+    """
+    Research every question of a session's research plan into its research dump.
     
-    research_plan = await AGENT_MEMORY.get_research_plan()
+    Args:
+        memory: AgentMemory - memory of the session
+        
+    Returns:
+        True if the research is complete, otherwise an error message
+    """
+    research_plan = await memory.get_research_plan()
     
     if not research_plan or len(research_plan.strip()) < 50:
         return "Error: No valid research plan found. Cannot proceed with research."
@@ -32,12 +38,39 @@ async def research_tool() -> bool:
     print(f"🔍 Research Tool: Starting research with plan length: {len(research_plan)}")
     print(f"🔍 Research Tool: Plan preview: {research_plan[:200]}...")
 
-    result = await Runner.run(researcher, research_plan)
+    # Share scraped pages across every question of this run
+    with TRACER.span("research", session_id=memory.session_id) as span, url_registry_scope() as url_registry:
+        # Parse the questions locally and research them all in one parallel batch
+        research_questions = extract_research_questions(research_plan)
+        if research_questions:
+            print(f"🔍 Research Tool: Parsed {len(research_questions)} research questions from the plan")
+            researched = [question for question in research_questions if await memory.is_question_researched(question)]
+            if researched:
+                print(f"🔁 Research Tool: Resuming, {len(researched)}/{len(research_questions)} questions were already researched")
+            outcomes = await QUESTION_SCHEDULER.gather(researcher(question, memory) for question in research_questions)
+            completed = sum(1 for outcome in outcomes if outcome is True)
+            print(f"🔍 Research Tool: Research completed for {completed}/{len(research_questions)} questions")
+        else:
+            # Fall back to the LLM extractor when the plan doesn't follow the expected format
+            print("🔍 Research Tool: Could not parse research questions, falling back to the Research Tool-Agent")
+            research_agent = Agent(
+                name="Research Tool-Agent",
+                instructions=RESEARCHER_PROMPT,
+                tools=[researcher_tool],
+                model="gpt-4.1",
+            )
+            result = await LLM_SCHEDULER.run(research_agent, research_plan, context=memory)
+            print(f"🔍 Research Tool: Research completed with output: {result.final_output}")
+
+        pages = url_registry.stats()
+        span.set(questions=len(research_questions), **pages)
+        print(
+            f"🔍 Research Tool: Scraped {pages['fetches']} unique pages, reused {pages['reuses']} duplicates, "
+            f"skipped {pages['near_duplicates']} near-duplicates"
+        )
 
-    print(f"🔍 Research Tool: Research completed with output: {result.final_output}")
-    
     # Validate that research was actually performed
-    research_dump = await AGENT_MEMORY.get_research_dump()
+    research_dump = await memory.get_research_dump()
     print(f"🔍 Research Tool: Research dump has {len(research_dump)} entries")
     
     # Check if meaningful research was conducted
@@ -50,9 +83,18 @@ async def research_tool() -> bool:
         return f"Error: Only {question_count} research questions were processed. Expected at least 2. Research incomplete."
     
     # Check if each question has meaningful results
+    for question in research_questions:
+        if not await memory.is_question_researched(question):
+            return f"Error: No results found for question: {question}. Research incomplete."
     for question, results in research_dump.items():
         if not results or len(results) == 0:
             return f"Error: No results found for question: {question}. Research incomplete."
     
     print(f"🔍 Research Tool: Successfully researched {question_count} questions with {sum(len(results) for results in research_dump.values())} total results")
-    return True
\ No newline at end of file
+    return True
+
+@function_tool
+async def research_tool(ctx: RunContextWrapper[AgentMemory]) -> Union[bool, str]:
+    """Conduct web research using the research plan and the research tools provided.
+    Returns True if every research question was researched, or an error message saying what failed."""
+    return await conduct_research(agent_memory_from(ctx))
@@ -0,0 +1,121 @@
+import hashlib
+import re
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from src.disk_cache import DiskCache
+from src.globals import CACHE_DIR, SUMMARY_CACHE_ENABLED, SUMMARY_CACHE_MAX_BYTES, SUMMARY_CACHE_TTL
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _normalize(text: str) -> str:
+    """Collapse whitespace and case so trivially different inputs share a key."""
+    return _WHITESPACE_RE.sub(" ", text).strip().casefold()
+
+
+class SummaryCache:
+    """
+    Persistent cache of contextual summaries.
+
+    Summaries are keyed by a hash of the normalized research question, the
+    normalized source text, the model and the prompt version, so the same page
+    summarized for the same question in a later run is served from disk. Entries
+    are tagged with their prompt version, so bumping the prompt lets old summaries
+    be dropped in one call with invalidate_prompt_version.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path = CACHE_DIR,
+        max_bytes: int = SUMMARY_CACHE_MAX_BYTES,
+        ttl: Optional[float] = SUMMARY_CACHE_TTL,
+    ):
+        """
+        Initialize the summary cache.
+
+        Args:
+            cache_dir: Directory holding the cache database
+            max_bytes: Maximum size of the cache before LRU eviction
+            ttl: Seconds a summary is kept (None = until evicted)
+        """
+        self._cache = DiskCache(Path(cache_dir) / "summaries.sqlite3", max_bytes=max_bytes, default_ttl=ttl)
+
+    @staticmethod
+    def _key(research_question: str, content: str, model: str, prompt_version: str) -> str:
+        """Cache key for a summary request."""
+        digest = hashlib.sha256()
+        for part in (_normalize(research_question), _normalize(content), model, prompt_version):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x1f")
+        return digest.hexdigest()
+
+    async def get(self, research_question: str, content: str, model: str, prompt_version: str) -> Optional[str]:
+        """
+        Look up a cached summary.
+
+        Args:
+            research_question: The question the summary is contextualized to
+            content: The summarized source text
+            model: The model that wrote the summary
+            prompt_version: Version of the summarizer prompt
+
+        Returns:
+            The cached summary, or None on a miss
+        """
+        entry = await self._cache.aget(self._key(research_question, content, model, prompt_version))
+        return entry.value.decode("utf-8") if entry else None
+
+    async def store(self, research_question: str, content: str, model: str, prompt_version: str, summary: str) -> None:
+        """
+        Store a summary.
+
+        Args:
+            research_question: The question the summary is contextualized to
+            content: The summarized source text
+            model: The model that wrote the summary
+            prompt_version: Version of the summarizer prompt
+            summary: The summary to cache
+        """
+        await self._cache.aset(
+            self._key(research_question, content, model, prompt_version),
+            summary.encode("utf-8"),
+            tag=prompt_version,
+        )
+
+    def invalidate_prompt_version(self, prompt_version: Optional[str] = None, keep_version: Optional[str] = None) -> int:
+        """
+        Drop summaries written with a given prompt version, or with any version but one.
+
+        Args:
+            prompt_version: Drop summaries written with this prompt version
+            keep_version: Drop summaries written with any other prompt version
+
+        Returns:
+            Number of dropped summaries
+        """
+        if keep_version is not None:
+            return self._cache.invalidate_tag(keep_tag=keep_version)
+        return self._cache.invalidate_tag(prompt_version)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and the size of the cache."""
+        return self._cache.stats()
+
+    def clear(self) -> None:
+        """Delete every cached summary."""
+        self._cache.clear()
+
+
+# Shared summary cache so every summarizer call in the process reuses the same database
+_default_summary_cache: Optional[SummaryCache] = None
+
+
+def get_summary_cache() -> Optional[SummaryCache]:
+    """Get the process-wide summary cache, or None if summary caching is disabled."""
+    global _default_summary_cache
+    if not SUMMARY_CACHE_ENABLED:
+        return None
+    if _default_summary_cache is None:
+        _default_summary_cache = SummaryCache()
+    return _default_summary_cache
@@ -0,0 +1,54 @@
+from typing import List
+
+from src.bm25 import BM25Index
+from src.globals import PREFILTER_PASSAGE_TOKENS, PREFILTER_TOKEN_BUDGET
+from src.text_chunker import chunk_text, count_tokens
+
+
+def filter_relevant_passages(
+    text: str,
+    queries: List[str],
+    token_budget: int = PREFILTER_TOKEN_BUDGET,
+    model: str = "gpt-4.1",
+) -> str:
+    """
+    Keep only the passages of a page most relevant to the research question and search query.
+
+    Passages (paragraphs, with long paragraphs split into sentence groups) are scored
+    with BM25 against the queries, and the best ones are kept until the token budget
+    is spent. Kept passages stay in their original order. If no passage matches any
+    query term, the leading passages are kept instead.
+
+    Args:
+        text: str - the scraped page text
+        queries: List[str] - the texts to score against (research question, search query)
+        token_budget: int - maximum number of tokens to keep
+        model: str - the model whose tokenizer to use
+
+    Returns:
+        The filtered text (the original text if it already fits in the budget)
+    """
+    if count_tokens(text, model) <= token_budget:
+        return text
+
+    # Passages can't be larger than the budget, or none of them would fit
+    passages = chunk_text(text, min(PREFILTER_PASSAGE_TOKENS, token_budget), model)
+    index = BM25Index()
+    for passage in passages:
+        index.add_document(passage)
+
+    scores = index.scores(" ".join(query for query in queries if query))
+    ranked = sorted(range(len(passages)), key=lambda i: (-scores[i], i))
+    if scores and scores[ranked[0]] > 0:
+        ranked = [i for i in ranked if scores[i] > 0]
+
+    selected = []
+    used_tokens = 0
+    for i in ranked:
+        passage_tokens = count_tokens(passages[i], model)
+        if used_tokens + passage_tokens > token_budget:
+            continue
+        selected.append(i)
+        used_tokens += passage_tokens
+
+    return "\n".join(passages[i] for i in sorted(selected))
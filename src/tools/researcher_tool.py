@@ -1,45 +1,77 @@
-from agents import function_tool
+from typing import Optional
+
+from agents import RunContextWrapper, function_tool
 
 from src.tool_agents.research.query_writer_tool import query_writer_tool
+from src.tools.task_scheduler import SEARCH_SCHEDULER
 from src.tools.web_search_tool import web_search
+from src.tracing import TRACER
+from src.usage import usage_scope
 
-from src.agent_memory import AGENT_MEMORY
+from src.agent_memory import AgentMemory, agent_memory_from, get_agent_memory
 
 
-async def researcher(research_question: str) -> bool:
+async def researcher(research_question: str, memory: Optional[AgentMemory] = None) -> bool:
     """
     Conduct web research using the research plan and the research tools provided.
     
     Args:
         research_question: str - the research question to answer
+        memory: Optional[AgentMemory] - memory of the session to add the results to (the default session by default)
         
     Returns:
-        bool - True if the research was successful, False otherwise
+        bool - True if the research was successful, False otherwise (including when no results were found)
     """
-    try:
-        print(f"🔍 Researcher: Starting research for question: {research_question}")
+    memory = memory or get_agent_memory()
+    with TRACER.span("research_question", question=research_question) as span, usage_scope(question=research_question):
+        try:
+            if await memory.is_question_researched(research_question):
+                print(f"⏭️ Researcher: Already researched, skipping question: {research_question}")
+                span.set(skipped=True)
+                return True
+        
+            print(f"🔍 Researcher: Starting research for question: {research_question}")
         
-        queries = await query_writer_tool(research_question)
-        print(f"🔍 Researcher: Generated {len(queries)} queries")
+            # Reuse the queries of an interrupted run, so its checkpointed sources match
+            queries = await memory.get_checkpointed_queries(research_question)
+            if queries:
+                print(f"🔁 Researcher: Resuming with {len(queries)} checkpointed queries")
+            else:
+                queries = await query_writer_tool(research_question)
+                await memory.checkpoint_queries(research_question, queries)
+                print(f"🔍 Researcher: Generated {len(queries)} queries")
         
-        results = []
-        for i, query in enumerate(queries):
-            print(f"🔍 Researcher: Searching query {i+1}: {query}")
-            search_results = await web_search(query)
-            print(f"🔍 Researcher: Got {len(search_results)} results for query {i+1}")
-            results.extend(search_results)
-
-        print(f"🔍 Researcher: Total results collected: {len(results)}")
-        await AGENT_MEMORY.add_to_research_dump(research_question, results)
-        print(f"🔍 Researcher: Added results to research dump for question: {research_question}")
-
-        return True
-    except Exception as e:
-        print(f"❌ Researcher: Error during research: {e}")
-        return False
+            # Dispatch all queries at once; the shared scheduler bounds searches across questions
+            for i, query in enumerate(queries):
+                print(f"🔍 Researcher: Searching query {i+1}: {query}")
+            search_outcomes = await SEARCH_SCHEDULER.gather(web_search(query, research_question, memory=memory) for query in queries)
+
+            # Merge in query order so the research dump is deterministic
+            results = []
+            for i, search_results in enumerate(search_outcomes):
+                if isinstance(search_results, BaseException):
+                    print(f"❌ Researcher: Search failed for query {i+1}: {search_results}")
+                    continue
+                print(f"🔍 Researcher: Got {len(search_results)} results for query {i+1}")
+                results.extend(search_results)
+
+            print(f"🔍 Researcher: Total results collected: {len(results)}")
+            span.set(queries=len(queries), results=len(results))
+            if not results:
+                # Leave the question out of the research dump, so a resumed run retries it
+                print(f"❌ Researcher: No results found for question: {research_question}")
+                return False
+            await memory.add_to_research_dump(research_question, results)
+            print(f"🔍 Researcher: Added results to research dump for question: {research_question}")
+
+            return True
+        except Exception as e:
+            span.record_error(e)
+            print(f"❌ Researcher: Error during research: {e}")
+            return False
 
 @function_tool
-async def researcher_tool(research_question: str) -> bool:
+async def researcher_tool(ctx: RunContextWrapper[AgentMemory], research_question: str) -> bool:
     """
     Function tool wrapper for researcher functionality.
     Conduct web research using the research plan and the research tools provided.
@@ -50,4 +82,4 @@ async def researcher_tool(research_question: str) -> bool:
     Returns:
         bool - True if the research was successful, False otherwise
     """
-    return await researcher(research_question)
\ No newline at end of file
+    return await researcher(research_question, agent_memory_from(ctx))
\ No newline at end of file
@@ -0,0 +1,229 @@
+import asyncio
+import hashlib
+import json
+import re
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Union
+
+from ddgs import DDGS
+
+from src.disk_cache import DiskCache
+from src.tracing import TRACER
+from src.globals import (
+    CACHE_DIR,
+    SEARCH_BACKEND,
+    SEARCH_CACHE_ENABLED,
+    SEARCH_CACHE_MAX_BYTES,
+    SEARCH_CACHE_TTL,
+    SEARCH_FIXTURES_PATH,
+)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _normalize_query(query: str) -> str:
+    """Collapse whitespace and case so trivially different queries match."""
+    return _WHITESPACE_RE.sub(" ", query).strip().casefold()
+
+
+class SearchResult(NamedTuple):
+    """A single web search hit."""
+
+    url: str
+    title: str = ""
+    snippet: str = ""
+
+
+class SearchBackend(ABC):
+    """Async interface of a web search provider."""
+
+    # Identifies the backend in cache keys, so results of different backends never mix
+    name: str = "search"
+
+    @abstractmethod
+    async def search(self, query: str, max_results: int) -> List[SearchResult]:
+        """
+        Search the web.
+
+        Args:
+            query: The search query
+            max_results: Maximum number of results
+
+        Returns:
+            Results in rank order
+        """
+
+
+class DDGSBackend(SearchBackend):
+    """
+    DuckDuckGo search through the ddgs package.
+
+    ddgs is synchronous, so searches run in a worker thread to keep the event
+    loop free. DDGS clients aren't documented as thread-safe, so each worker
+    thread lazily creates its own client and reuses it for its searches.
+    """
+
+    name = "ddgs"
+
+    def __init__(self, client: Optional[DDGS] = None):
+        """
+        Initialize the backend.
+
+        Args:
+            client: DDGS client to use for every search (one per worker thread if not given)
+        """
+        self._client = client
+        self._local = threading.local()
+
+    def _get_client(self) -> DDGS:
+        """Get the client of the calling thread, creating it on its first search."""
+        if self._client is not None:
+            return self._client
+        client: Optional[DDGS] = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = DDGS()
+        return client
+
+    def _search_sync(self, query: str, max_results: int) -> List[SearchResult]:
+        """Run the blocking search."""
+        return [
+            SearchResult(url=r["href"], title=r.get("title", ""), snippet=r.get("body", ""))
+            for r in self._get_client().text(query, max_results=max_results)
+            if r.get("href")
+        ]
+
+    async def search(self, query: str, max_results: int) -> List[SearchResult]:
+        return await asyncio.to_thread(self._search_sync, query, max_results)
+
+
+class FixtureBackend(SearchBackend):
+    """
+    Offline stand-in that answers queries from canned results, for tests and benchmarks.
+
+    Fixtures map a query to a list of results (dicts with url/title/snippet or plain
+    URLs). Queries are matched after whitespace/case normalization; a "*" entry
+    answers every query without its own fixture.
+    """
+
+    name = "fixture"
+
+    def __init__(self, fixtures: Union[Mapping[str, List[Any]], str, Path]):
+        """
+        Initialize the backend.
+
+        Args:
+            fixtures: Mapping of query to results, or the path of a JSON file holding one
+        """
+        entries: Mapping[str, List[Any]]
+        if isinstance(fixtures, (str, Path)):
+            entries = json.loads(Path(fixtures).read_text(encoding="utf-8"))
+        else:
+            entries = fixtures
+        self._fixtures = {
+            _normalize_query(query): [self._to_result(result) for result in results]
+            for query, results in entries.items()
+        }
+
+    @staticmethod
+    def _to_result(result: Any) -> SearchResult:
+        """Convert a fixture entry to a SearchResult."""
+        if isinstance(result, str):
+            return SearchResult(url=result)
+        return SearchResult(url=result["url"], title=result.get("title", ""), snippet=result.get("snippet", ""))
+
+    async def search(self, query: str, max_results: int) -> List[SearchResult]:
+        results = self._fixtures.get(_normalize_query(query), self._fixtures.get("*", []))
+        return results[:max_results]
+
+
+class CachedSearchBackend(SearchBackend):
+    """
+    Search backend wrapper with a persistent query-result cache.
+
+    Results are keyed by the backend name, the normalized query and max_results.
+    Identical queries issued concurrently share one search, and empty results are
+    not cached since they are usually a transient provider failure.
+    """
+
+    def __init__(
+        self,
+        backend: SearchBackend,
+        cache_dir: Path = CACHE_DIR,
+        max_bytes: int = SEARCH_CACHE_MAX_BYTES,
+        ttl: float = SEARCH_CACHE_TTL,
+    ):
+        """
+        Initialize the cached backend.
+
+        Args:
+            backend: The backend to cache
+            cache_dir: Directory holding the cache database
+            max_bytes: Maximum size of the cache before LRU eviction
+            ttl: Seconds a result list is reused
+        """
+        self.backend = backend
+        self.name = backend.name
+        self._cache = DiskCache(Path(cache_dir) / "searches.sqlite3", max_bytes=max_bytes, default_ttl=ttl)
+        self._in_flight: Dict[str, asyncio.Future[List[SearchResult]]] = {}
+
+    def _key(self, query: str, max_results: int) -> str:
+        """Cache key for a search."""
+        return hashlib.sha256(f"{self.name}\x1f{_normalize_query(query)}\x1f{max_results}".encode()).hexdigest()
+
+    async def _search_and_store(self, key: str, query: str, max_results: int) -> List[SearchResult]:
+        """Run the search on the wrapped backend and cache non-empty results."""
+        results = await self.backend.search(query, max_results)
+        if results:
+            value = json.dumps([result._asdict() for result in results], separators=(",", ":"))
+            await self._cache.aset(key, value.encode(), tag=self.name)
+        return results
+
+    async def search(self, query: str, max_results: int) -> List[SearchResult]:
+        key = self._key(query, max_results)
+        entry = await self._cache.aget(key)
+        TRACER.annotate(cache_hit=entry is not None)
+        if entry is not None:
+            return [SearchResult(**result) for result in json.loads(entry.value)]
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is None or in_flight.get_loop() is not asyncio.get_running_loop():
+            in_flight = asyncio.ensure_future(self._search_and_store(key, query, max_results))
+            self._in_flight[key] = in_flight
+            in_flight.add_done_callback(lambda done: self._in_flight.pop(key) if self._in_flight.get(key) is done else None)
+        return list(await asyncio.shield(in_flight))
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and the size of the cache."""
+        return self._cache.stats()
+
+    def clear(self) -> None:
+        """Delete every cached search."""
+        self._cache.clear()
+
+
+# Shared search backend so the DDGS client and the query cache are reused across searches
+_default_search_backend: Optional[SearchBackend] = None
+
+
+def get_search_backend() -> SearchBackend:
+    """Get the process-wide search backend configured by SEARCH_BACKEND."""
+    global _default_search_backend
+    if _default_search_backend is None:
+        if SEARCH_BACKEND == "fixture":
+            if not SEARCH_FIXTURES_PATH:
+                raise ValueError("DEEP_RESEARCH_SEARCH_FIXTURES_PATH must be set to use the fixture search backend")
+            backend: SearchBackend = FixtureBackend(SEARCH_FIXTURES_PATH)
+        elif SEARCH_BACKEND == "ddgs":
+            backend = DDGSBackend()
+        else:
+            raise ValueError(f"Unknown search backend: {SEARCH_BACKEND}")
+        _default_search_backend = CachedSearchBackend(backend) if SEARCH_CACHE_ENABLED else backend
+    return _default_search_backend
+
+
+def set_search_backend(backend: Optional[SearchBackend]) -> None:
+    """Replace the process-wide search backend (None restores the configured one)."""
+    global _default_search_backend
+    _default_search_backend = backend
@@ -0,0 +1,73 @@
+import asyncio
+from typing import Any, Awaitable, Iterable, List, Optional, TypeVar
+
+from src.globals import QUESTION_MAX_CONCURRENCY, SEARCH_MAX_CONCURRENCY
+
+T = TypeVar("T")
+
+
+class TaskScheduler:
+    """
+    Process-wide concurrency cap for one kind of work (e.g. web searches).
+
+    Every coroutine submitted through the same scheduler shares one pool of slots,
+    no matter which research question or tool submitted it. Use a separate scheduler
+    for each level of nesting, since a task holding a slot while waiting on subtasks
+    from the same scheduler can deadlock.
+    """
+
+    def __init__(self, max_concurrency: int):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_concurrency: Maximum number of coroutines running at once
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Get the semaphore for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    async def run(self, awaitable: Awaitable[T]) -> T:
+        """
+        Run an awaitable once a slot is free.
+
+        Args:
+            awaitable: The coroutine to run
+
+        Returns:
+            The awaitable's result
+        """
+        async with self._get_semaphore():
+            return await awaitable
+
+    async def gather(self, awaitables: Iterable[Awaitable[Any]]) -> List[Any]:
+        """
+        Run awaitables concurrently within the scheduler's limit.
+
+        Args:
+            awaitables: The coroutines to run
+
+        Returns:
+            Results in submission order; a failed awaitable yields its exception instead
+        """
+        return list(
+            await asyncio.gather(
+                *(self.run(awaitable) for awaitable in awaitables),
+                return_exceptions=True,
+            )
+        )
+
+
+# Shared scheduler for web searches issued by every research question
+SEARCH_SCHEDULER = TaskScheduler(SEARCH_MAX_CONCURRENCY)
+
+# Shared scheduler for research questions researched in parallel
+QUESTION_SCHEDULER = TaskScheduler(QUESTION_MAX_CONCURRENCY)
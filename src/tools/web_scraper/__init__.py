@@ -2,6 +2,14 @@
 Web scraper module for extracting main text content from web pages.
 """
 
-from .web_scraper import WebScraper, scrape_url
+from .fetch_engine import FetchEngine, close_fetch_engine, get_fetch_engine
+from .page_cache import PageCache, get_page_cache
+from .url_registry import UrlRegistry, get_url_registry, url_registry_scope
+from .urls import canonicalize_url
+from .web_scraper import WebScraper, scrape_many, scrape_url
 
-__all__ = ['WebScraper', 'scrape_url'] 
\ No newline at end of file
+__all__ = [
+    'FetchEngine', 'PageCache', 'UrlRegistry', 'WebScraper',
+    'canonicalize_url', 'close_fetch_engine', 'get_fetch_engine', 'get_page_cache', 'get_url_registry',
+    'scrape_many', 'scrape_url', 'url_registry_scope',
+] 
\ No newline at end of file
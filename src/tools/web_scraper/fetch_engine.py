@@ -0,0 +1,153 @@
+import asyncio
+import logging
+from typing import Dict, Mapping, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from src.globals import (
+    FETCH_HTTP2,
+    FETCH_MAX_CONNECTIONS,
+    FETCH_MAX_CONNECTIONS_PER_HOST,
+    FETCH_TIMEOUT,
+)
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+
+class FetchEngine:
+    """
+    Asyncio-native HTTP fetch engine with a shared keep-alive connection pool.
+
+    Connections are limited globally by the pool and per host by a semaphore, so
+    many fetches can overlap without hammering a single site. HTTP/2 is negotiated
+    when the optional `h2` package is installed, which multiplexes concurrent
+    requests to the same host over one connection.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = FETCH_MAX_CONNECTIONS,
+        max_connections_per_host: int = FETCH_MAX_CONNECTIONS_PER_HOST,
+        http2: bool = FETCH_HTTP2,
+        headers: Optional[Mapping[str, str]] = None,
+    ):
+        """
+        Initialize the fetch engine.
+
+        Args:
+            max_connections: Maximum number of open connections across all hosts
+            max_connections_per_host: Maximum number of concurrent requests per host
+            http2: Whether to negotiate HTTP/2 (ignored if `h2` is not installed)
+            headers: Default headers sent with every request
+        """
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.headers = dict(headers or DEFAULT_HEADERS)
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the pooled client, creating it on first use in the running event loop."""
+        loop = asyncio.get_running_loop()
+
+        # The client and the per-host semaphores are bound to the loop they were created on
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            self._close_stale_client()
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                headers=self.headers,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+            self._loop = loop
+            self._host_limits = {}
+
+        return self._client
+
+    def _close_stale_client(self) -> None:
+        """Close the client of a previous event loop, on that loop, before it is replaced."""
+        client, loop = self._client, self._loop
+        if client is None or client.is_closed or loop is None:
+            return
+        if loop.is_running():
+            # A loop in another thread: its connections can only be closed from it
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        else:
+            # The loop has stopped (e.g. an earlier asyncio.run), taking its transports with it, and the
+            # client can't be awaited on another loop: drop it and let its sockets go when it is collected
+            logger.debug("Dropping the fetch client of a stopped event loop")
+
+    def _get_host_limit(self, url: str) -> asyncio.Semaphore:
+        """Get the semaphore limiting concurrent requests to the URL's host."""
+        host = urlparse(url).netloc.lower()
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.max_connections_per_host)
+        return self._host_limits[host]
+
+    async def fetch(
+        self,
+        url: str,
+        timeout: float = FETCH_TIMEOUT,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> httpx.Response:
+        """
+        Fetch a URL using the shared connection pool.
+
+        Args:
+            url: The URL to fetch
+            timeout: Request timeout in seconds
+            headers: Extra headers for this request
+
+        Returns:
+            The HTTP response (the body is fully read)
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        client = self._get_client()
+        async with self._get_host_limit(url):
+            return await client.get(url, timeout=timeout, headers=headers)
+
+    async def aclose(self) -> None:
+        """Close the pooled connections."""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
+        self._host_limits = {}
+
+
+# Shared engine so every scraper reuses the same connection pool
+_default_engine: Optional[FetchEngine] = None
+
+
+def get_fetch_engine() -> FetchEngine:
+    """Get the process-wide shared fetch engine."""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = FetchEngine()
+    return _default_engine
+
+
+async def close_fetch_engine() -> None:
+    """Close the shared fetch engine's connections (call on shutdown; it reopens them if used again)."""
+    if _default_engine is not None:
+        await _default_engine.aclose()
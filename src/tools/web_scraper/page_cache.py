@@ -0,0 +1,158 @@
+import hashlib
+import json
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Mapping, NamedTuple, Optional
+
+from src.disk_cache import DiskCache
+from src.globals import CACHE_DIR, PAGE_CACHE_ENABLED, PAGE_CACHE_MAX_BYTES, PAGE_CACHE_TTL
+from src.tools.web_scraper.urls import canonicalize_url
+
+
+class CachedPage(NamedTuple):
+    """A fetched page and its extracted text, as stored in the page cache."""
+
+    url: str
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    title: str
+    content: str
+    extractor_version: str
+    is_fresh: bool
+
+    def revalidation_headers(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating this page with the server."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """
+    On-disk cache of fetched pages and their extracted (title, content).
+
+    Pages are content-addressed by a hash of their canonical URL. Fresh pages are
+    served without touching the network; stale pages keep their ETag/Last-Modified
+    validators so they can be revalidated with a conditional request, and the
+    raw body is kept (compressed) so text can be re-extracted when the extractor
+    changes.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path = CACHE_DIR,
+        max_bytes: int = PAGE_CACHE_MAX_BYTES,
+        ttl: float = PAGE_CACHE_TTL,
+    ):
+        """
+        Initialize the page cache.
+
+        Args:
+            cache_dir: Directory holding the cache database
+            max_bytes: Maximum size of the cache before LRU eviction
+            ttl: Seconds a page is served without revalidation
+        """
+        self._cache = DiskCache(Path(cache_dir) / "pages.sqlite3", max_bytes=max_bytes, default_ttl=ttl)
+
+        # Conditional requests answered with 304 Not Modified
+        self.revalidations = 0
+
+    @staticmethod
+    def _key(url: str) -> str:
+        """Cache key for a URL."""
+        return hashlib.sha256(canonicalize_url(url).encode("utf-8")).hexdigest()
+
+    async def get(self, url: str) -> Optional[CachedPage]:
+        """
+        Look up a page, including stale pages that can still be revalidated.
+
+        Args:
+            url: The page URL
+
+        Returns:
+            The cached page, or None on a miss
+        """
+        entry = await self._cache.aget(self._key(url), allow_stale=True)
+        if entry is None:
+            return None
+
+        metadata, _, compressed_body = entry.value.partition(b"\n")
+        meta = json.loads(metadata)
+        return CachedPage(
+            url=meta["url"],
+            body=zlib.decompress(compressed_body),
+            etag=meta.get("etag"),
+            last_modified=meta.get("last_modified"),
+            title=meta["title"],
+            content=meta["content"],
+            extractor_version=meta["extractor_version"],
+            is_fresh=entry.is_fresh,
+        )
+
+    async def store(
+        self,
+        url: str,
+        body: bytes,
+        headers: Mapping[str, str],
+        title: str,
+        content: str,
+        extractor_version: str,
+    ) -> None:
+        """
+        Store a fetched page and its extracted text.
+
+        Args:
+            url: The page URL
+            body: Raw response body
+            headers: Response headers (for validators and Cache-Control)
+            title: Extracted page title
+            content: Extracted main content
+            extractor_version: Version of the extractor that produced title/content
+        """
+        if "no-store" in headers.get("cache-control", "").lower():
+            return
+
+        metadata = json.dumps(
+            {
+                "url": url,
+                "etag": headers.get("etag"),
+                "last_modified": headers.get("last-modified"),
+                "title": title,
+                "content": content,
+                "extractor_version": extractor_version,
+            },
+            separators=(",", ":"),
+        )
+        value = metadata.encode("utf-8") + b"\n" + zlib.compress(body)
+        await self._cache.aset(self._key(url), value)
+
+    async def mark_revalidated(self, url: str) -> None:
+        """Renew a page's TTL after the server answered 304 Not Modified."""
+        self.revalidations += 1
+        await self._cache.atouch(self._key(url))
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss/revalidation counters and the size of the cache."""
+        return {**self._cache.stats(), "revalidations": self.revalidations}
+
+    def clear(self) -> None:
+        """Delete every cached page."""
+        self._cache.clear()
+
+
+# Shared page cache so every scraper in the process reuses the same database
+_default_page_cache: Optional[PageCache] = None
+
+
+def get_page_cache() -> Optional[PageCache]:
+    """Get the process-wide page cache, or None if page caching is disabled."""
+    global _default_page_cache
+    if not PAGE_CACHE_ENABLED:
+        return None
+    if _default_page_cache is None:
+        _default_page_cache = PageCache()
+    return _default_page_cache
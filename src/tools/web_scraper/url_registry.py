@@ -0,0 +1,163 @@
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Set, Tuple
+
+from src.globals import NEAR_DUPLICATE_MAX_DISTANCE
+from src.simhash import SimHashIndex, simhash
+from src.tools.web_scraper.urls import canonicalize_url
+
+ScrapeResult = Optional[Tuple[str, str]]
+
+
+class UrlRegistry:
+    """
+    Run-scoped registry of the pages seen by every query and research question.
+
+    URLs are keyed by their canonical form, so tracking parameters, "www.",
+    trailing slashes and AMP variants of a page all share one entry. Each page
+    is scraped once per run: concurrent requests for the same page wait on the
+    first fetch, and later requests reuse its (title, content). Claims let one
+    research question use each page once, however many of its queries find it,
+    and content claims extend that to mirrors and syndicated copies of a page
+    through SimHash fingerprints of the extracted text.
+    """
+
+    def __init__(self, near_duplicate_distance: int = NEAR_DUPLICATE_MAX_DISTANCE):
+        """
+        Initialize an empty registry.
+
+        Args:
+            near_duplicate_distance: Largest fingerprint Hamming distance treated as the same content (< 0 disables it)
+        """
+        self.near_duplicate_distance = near_duplicate_distance
+        self._pages: Dict[str, asyncio.Future[ScrapeResult]] = {}
+        self._claims: Dict[str, Set[str]] = {}
+        self._fingerprints: Dict[str, Optional[int]] = {}
+        self._content_claims: Dict[str, SimHashIndex[str]] = {}
+        # Scrapes actually issued / requests answered from an earlier or in-flight scrape
+        self.fetches = 0
+        self.reuses = 0
+        # Pages skipped as near-duplicates of a page already claimed in the same scope
+        self.near_duplicates = 0
+
+    async def scrape(self, url: str, scrape: Callable[[str], Awaitable[ScrapeResult]]) -> ScrapeResult:
+        """
+        Scrape a page once per run, sharing the result with every equivalent URL.
+
+        Args:
+            url: The URL to scrape
+            scrape: The scrape function, called with the first URL seen for the page
+
+        Returns:
+            (title, content) tuple, or None if the page could not be scraped
+        """
+        key = canonicalize_url(url)
+        page = self._pages.get(key)
+        if page is None:
+            self.fetches += 1
+            page = asyncio.ensure_future(scrape(url))
+            self._pages[key] = page
+        else:
+            self.reuses += 1
+        # Shield the shared fetch so one cancelled caller doesn't cancel it for the others
+        return await asyncio.shield(page)
+
+    def claim(self, url: str, scope: str) -> bool:
+        """
+        Claim a page for a scope (e.g. a research question).
+
+        Args:
+            url: The page URL
+            scope: The scope claiming the page
+
+        Returns:
+            True the first time the page is claimed in the scope, False afterwards
+        """
+        claimed = self._claims.setdefault(scope, set())
+        key = canonicalize_url(url)
+        if key in claimed:
+            return False
+        claimed.add(key)
+        return True
+
+    async def fingerprint(self, url: str, content: str) -> Optional[int]:
+        """
+        Get the SimHash fingerprint of a page's extracted text, computed once per page.
+
+        Args:
+            url: The page URL
+            content: The page's extracted text
+
+        Returns:
+            The fingerprint, or None if the text is too short to fingerprint
+        """
+        key = canonicalize_url(url)
+        if key not in self._fingerprints:
+            self._fingerprints[key] = await asyncio.to_thread(simhash, content)
+        return self._fingerprints[key]
+
+    async def claim_content(self, url: str, content: str, scope: str) -> Optional[str]:
+        """
+        Claim a page's content for a scope, detecting mirrors and syndicated copies.
+
+        Args:
+            url: The page URL
+            content: The page's extracted text
+            scope: The scope claiming the content
+
+        Returns:
+            URL of a near-duplicate page already claimed in the scope, or None if the content is new
+        """
+        if self.near_duplicate_distance < 0:
+            return None
+        fingerprint = await self.fingerprint(url, content)
+        if fingerprint is None:
+            return None
+
+        index = self._content_claims.setdefault(scope, SimHashIndex(self.near_duplicate_distance))
+        duplicate_of = index.find(fingerprint)
+        if duplicate_of is not None:
+            self.near_duplicates += 1
+            return duplicate_of
+        index.add(fingerprint, url)
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the number of unique pages scraped and of duplicate requests and pages avoided."""
+        return {
+            "pages": len(self._pages),
+            "fetches": self.fetches,
+            "reuses": self.reuses,
+            "near_duplicates": self.near_duplicates,
+        }
+
+
+_current_registry: ContextVar[Optional[UrlRegistry]] = ContextVar("url_registry", default=None)
+
+
+def get_url_registry() -> Optional[UrlRegistry]:
+    """Get the registry of the current research run, or None outside of a run."""
+    return _current_registry.get()
+
+
+@contextmanager
+def url_registry_scope(registry: Optional[UrlRegistry] = None) -> Iterator[UrlRegistry]:
+    """
+    Make a URL registry current for a research run.
+
+    Tasks started inside the block (including those of asyncio.gather) see the
+    registry through their copied context.
+
+    Args:
+        registry: The registry to use (a new one by default)
+
+    Yields:
+        The current registry
+    """
+    registry = registry or UrlRegistry()
+    token = _current_registry.set(registry)
+    try:
+        yield registry
+    finally:
+        _current_registry.reset(token)
@@ -0,0 +1,111 @@
+import re
+from typing import Dict, FrozenSet, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+# Query parameters that only track where a click came from and never change the page
+TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid", "twclid", "igshid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "_hsenc", "_hsmi", "mkt_tok", "ref_src", "ref_url",
+    "cmpid",
+})
+TRACKING_PARAM_PREFIXES = ("utm_", "pk_", "mtm_", "hsa_")
+# Query parameters that only track clicks on some sites and may mean something else elsewhere
+SITE_TRACKING_PARAMS: Dict[str, FrozenSet[str]] = {
+    "youtube.com": frozenset({"si"}),
+    "youtu.be": frozenset({"si"}),
+    "open.spotify.com": frozenset({"si"}),
+    "aliexpress.com": frozenset({"spm"}),
+    "alibaba.com": frozenset({"spm"}),
+    "taobao.com": frozenset({"spm"}),
+    "tmall.com": frozenset({"spm"}),
+}
+# Query parameters that select a page's AMP variant: ?amp, ?amp=1, ?outputType=amp
+_AMP_PARAMS = {"amp": ("", "1", "true"), "outputtype": ("amp",)}
+
+# AMP caches wrap the original page: <domain>.cdn.ampproject.org/c/s/<host>/<path>, google.com/amp/s/<host>/<path>
+_AMP_CACHE_PATH_RE = re.compile(r"^/(?:[a-z]|amp)/(s/)?(?P<target>[^/]+\.[^/]+(?:/.*)?)$")
+# AMP variants served by the publisher itself: /article.amp, /article.amp.html, and on AMP hosts also /amp, /amp.html
+_AMP_FILE_SUFFIX_RE = re.compile(r"\.amp(?:\.html?)?/?$")
+_AMP_PATH_SUFFIX_RE = re.compile(r"/amp(?:\.html?)?/?$")
+
+
+def _site_params(host: str) -> FrozenSet[str]:
+    """The site-specific tracking parameters of a host (or of the site it is a subdomain of)."""
+    for site, params in SITE_TRACKING_PARAMS.items():
+        if host == site or host.endswith("." + site):
+            return params
+    return frozenset()
+
+
+def _is_dropped_param(name: str, value: str, site_params: FrozenSet[str]) -> bool:
+    """Whether a query parameter is a tracking parameter or selects the AMP variant of the page."""
+    name = name.lower()
+    if name in TRACKING_PARAMS or name in site_params or name.startswith(TRACKING_PARAM_PREFIXES):
+        return True
+    return value.lower() in _AMP_PARAMS.get(name, ())
+
+
+def _unwrap_amp_cache(scheme: str, host: str, path: str) -> Tuple[str, str, str]:
+    """Map a Google AMP cache URL back to the original host and path."""
+    if host.endswith(".cdn.ampproject.org") or (host in ("google.com", "www.google.com") and path.startswith("/amp/")):
+        match = _AMP_CACHE_PATH_RE.match(path)
+        if match:
+            target_host, _, target_path = match.group("target").partition("/")
+            return ("https" if match.group(1) else "http"), target_host.lower(), "/" + target_path
+    return scheme, host, path
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalize a URL so that equivalent spellings of a page map to the same key.
+
+    Lowercases the scheme and host, drops the "www." prefix, default ports, the
+    fragment and tracking parameters, sorts the remaining query parameters,
+    removes trailing slashes and maps AMP variants (amp. hosts, .amp files,
+    ?amp parameters and Google AMP cache URLs) to the regular page. A /amp
+    path suffix is only treated as AMP on amp. hosts and AMP cache URLs, where
+    it can't be a page of its own. A URL with an invalid port is returned as is.
+
+    Args:
+        url: The URL to canonicalize
+
+    Returns:
+        The canonical URL
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    path = parts.path
+
+    try:
+        port = parts.port
+    except ValueError:
+        return url.strip()
+
+    scheme, unwrapped_host, path = _unwrap_amp_cache(scheme, host, path)
+    is_amp = unwrapped_host != host
+    if is_amp:
+        port = None
+    host = unwrapped_host
+    for prefix in ("www.", "amp."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            is_amp = is_amp or prefix == "amp."
+    if port and str(port) != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+
+    path = _AMP_FILE_SUFFIX_RE.sub("", path)
+    if is_amp:
+        path = _AMP_PATH_SUFFIX_RE.sub("", path)
+    path = path.rstrip("/") or "/"
+
+    site_params = _site_params(host)
+    params = [
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_dropped_param(name, value, site_params)
+    ]
+    query = urlencode(sorted(params))
+    return urlunsplit((scheme, host, path, query, ""))
@@ -1,14 +1,48 @@
-import requests
+import asyncio
+import httpx
 from bs4 import BeautifulSoup
+from bs4.element import NavigableString, PageElement, PreformattedString, Tag
 import re
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 from urllib.parse import urlparse
 import logging
 
+from src.tools.web_scraper.fetch_engine import FetchEngine, get_fetch_engine
+from src.tools.web_scraper.page_cache import CachedPage, PageCache, get_page_cache
+from src.tracing import TRACER
+
+try:
+    import lxml  # type: ignore[import-untyped]  # noqa: F401
+
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Elements whose text is never part of the main content
+SKIPPED_TAGS = {
+    'script', 'style', 'noscript', 'template', 'svg', 'iframe',
+    'head', 'title', 'nav', 'header', 'footer', 'aside',
+}
+
+# Block-level elements that start a new line in the extracted text
+BLOCK_TAGS = {
+    'p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'div', 'section', 'article', 'main',
+    'ul', 'ol', 'li', 'dl', 'dt', 'dd', 'table', 'tr', 'blockquote', 'pre',
+    'figure', 'figcaption', 'br', 'hr', 'address', 'details', 'summary',
+}
+
+# Bump when the extraction logic changes so cached pages are re-extracted from their stored body
+EXTRACTOR_VERSION = '3'
+
+# Marker separating blocks while text is collected; cannot occur in parsed text
+BLOCK_BREAK = '\x00'
+
+WHITESPACE_RE = re.compile(r'\s+')
+
 
 class WebScraper:
     """
@@ -16,20 +50,20 @@ class WebScraper:
     and separates paragraphs/sections using HTML tags as indicators.
     """
     
-    def __init__(self, timeout: int = 10):
+    def __init__(self, timeout: int = 10, engine: Optional[FetchEngine] = None, cache: Optional[PageCache] = None):
         """
         Initialize the web scraper.
         
         Args:
             timeout: Request timeout in seconds
+            engine: Fetch engine to use (defaults to the shared connection pool)
+            cache: Page cache to serve and store pages (no caching if None)
         """
         self.timeout = timeout
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        self.engine = engine or get_fetch_engine()
+        self.cache = cache
     
-    def scrape_url(self, url: str) -> Optional[Tuple[str, str]]:
+    async def scrape_url(self, url: str) -> Optional[Tuple[str, str]]:
         """
         Scrape the main text content and title from a URL.
         
@@ -40,18 +74,98 @@ class WebScraper:
             Tuple of (title, content) where content is extracted text with paragraphs/sections separated by line breaks,
             or None if scraping fails
         """
-        try:
-            # Validate URL
-            if not self._is_valid_url(url):
-                logger.error(f"Invalid URL: {url}")
+        with TRACER.span("scrape", url=url) as span:
+            try:
+                # Validate URL
+                if not self._is_valid_url(url):
+                    logger.error(f"Invalid URL: {url}")
+                    return None
+                
+                # Serve fresh pages straight from the cache
+                cached = await self.cache.get(url) if self.cache else None
+                if cached and cached.is_fresh:
+                    span.set(cache="hit")
+                    return await self._cached_result(cached)
+                
+                # Fetch the webpage, revalidating a stale cached copy if we have one
+                headers = cached.revalidation_headers() if cached else None
+                with TRACER.span("fetch", url=url) as fetch_span:
+                    response = await self.engine.fetch(url, timeout=self.timeout, headers=headers)
+                    fetch_span.set(status=response.status_code, bytes=len(response.content), http_version=response.http_version)
+                if cached and self.cache and response.status_code == 304:
+                    span.set(cache="revalidated")
+                    await self.cache.mark_revalidated(url)
+                    return await self._cached_result(cached)
+                span.set(cache="miss" if self.cache else "off")
+                response.raise_for_status()
+                
+                # Parsing is CPU-bound, so keep it off the event loop
+                result = await asyncio.to_thread(self._parse_html, url, response.content)
+                
+                if result and self.cache:
+                    title, content = result
+                    await self.cache.store(url, response.content, response.headers, title, content, EXTRACTOR_VERSION)
+                
+                return result
+                
+            except httpx.HTTPError as e:
+                span.record_error(e)
+                logger.error(f"Request failed for URL {url}: {e}")
                 return None
+            except Exception as e:
+                span.record_error(e)
+                logger.error(f"Unexpected error scraping URL {url}: {e}")
+                return None
+    
+    async def scrape_many(self, urls: List[str]) -> List[Optional[Tuple[str, str]]]:
+        """
+        Scrape several URLs concurrently.
+        
+        Args:
+            urls: The URLs to scrape
             
-            # Fetch the webpage
-            response = self.session.get(url, timeout=self.timeout)
-            response.raise_for_status()
+        Returns:
+            List of (title, content) tuples or None for failed URLs, in the same order as urls
+        """
+        return list(await asyncio.gather(*(self.scrape_url(url) for url in urls)))
+    
+    async def _cached_result(self, cached: CachedPage) -> Optional[Tuple[str, str]]:
+        """
+        Get (title, content) for a cached page, re-extracting it if the extractor has changed.
+        
+        Args:
+            cached: The cached page
             
+        Returns:
+            Tuple of (title, content), or None if no main content was found
+        """
+        if cached.extractor_version == EXTRACTOR_VERSION:
+            return (cached.title, cached.content)
+        
+        result = await asyncio.to_thread(self._parse_html, cached.url, cached.body)
+        if result and self.cache:
+            title, content = result
+            await self.cache.store(
+                cached.url, cached.body,
+                {'etag': cached.etag or '', 'last-modified': cached.last_modified or ''},
+                title, content, EXTRACTOR_VERSION,
+            )
+        return result
+    
+    def _parse_html(self, url: str, html: bytes) -> Optional[Tuple[str, str]]:
+        """
+        Extract the title and formatted main content from a fetched page.
+        
+        Args:
+            url: The URL the page was fetched from (used for logging)
+            html: Raw HTML of the page
+            
+        Returns:
+            Tuple of (title, content), or None if no main content was found
+        """
+        with TRACER.span("parse", url=url, bytes=len(html)) as span:
             # Parse HTML
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = BeautifulSoup(html, HTML_PARSER)
             
             # Extract title
             title = self._extract_title(soup)
@@ -59,21 +173,15 @@ class WebScraper:
             # Extract main content
             content = self._extract_main_content(soup)
             
-            if not content:
-                logger.warning(f"No main content found for URL: {url}")
-                return None
-            
-            # Clean and format the content
-            formatted_content = self._format_content(content)
-            
-            return (title, formatted_content)
-            
-        except requests.RequestException as e:
-            logger.error(f"Request failed for URL {url}: {e}")
-            return None
-        except Exception as e:
-            logger.error(f"Unexpected error scraping URL {url}: {e}")
+            # Extract the text in a single pass over the main content
+            formatted_content = self._format_content(content) if content is not None else ''
+            span.set(chars=len(formatted_content))
+        
+        if not formatted_content:
+            logger.warning(f"No main content found for URL: {url}")
             return None
+        
+        return (title, formatted_content)
     
     def _extract_title(self, soup: BeautifulSoup) -> str:
         """
@@ -124,23 +232,16 @@ class WebScraper:
         except Exception:
             return False
     
-    def _extract_main_content(self, soup: BeautifulSoup) -> str:
+    def _extract_main_content(self, soup: BeautifulSoup) -> Optional[Tag]:
         """
-        Extract the main content from the HTML soup.
+        Find the element holding the main content of the page.
         
         Args:
             soup: BeautifulSoup object of the HTML
             
         Returns:
-            Extracted text content
+            The main content element, or None if the page is empty
         """
-        # Remove script and style elements
-        for script in soup(["script", "style", "nav", "header", "footer", "aside"]):
-            script.decompose()
-        
-        # Try to find main content areas
-        main_content = ""
-        
         # Look for common main content selectors
         main_selectors = [
             'main',
@@ -157,57 +258,52 @@ class WebScraper:
         for selector in main_selectors:
             element = soup.select_one(selector)
             if element:
-                main_content = str(element)
-                break
+                return element
         
         # If no main content found, use the body
-        if not main_content:
-            body = soup.find('body')
-            if body:
-                main_content = str(body)
-            else:
-                main_content = str(soup)
-        
-        return main_content
+        return soup.find('body') or soup
     
-    def _format_content(self, html_content: str) -> str:
+    def _format_content(self, element: Tag) -> str:
         """
-        Format the HTML content by separating paragraphs/sections using HTML tags.
+        Extract the text of an element in a single pass over its subtree.
+        
+        Each text node is emitted exactly once, and block-level elements
+        (paragraphs, headings, divs, list items, ...) start a new line.
+        Boilerplate elements (scripts, navigation, footers, ...) are skipped.
         
         Args:
-            html_content: Raw HTML content
+            element: The element to extract text from
             
         Returns:
             Formatted text with line breaks separating sections
         """
-        # Create a new soup object for parsing
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Get all text elements
-        text_elements = []
-        
-        for element in soup.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'div', 'span']):
-            text = element.get_text(strip=True)
-            if text:
-                # Determine if this element should trigger a line break
-                should_add_break = self._should_add_line_break(element)
-                
-                if should_add_break and text_elements:
-                    text_elements.append('\n')
-                
-                text_elements.append(text)
+        pieces: List[str] = []
         
-        # Join all text elements
-        result = ''.join(text_elements)
-        
-        # Clean up multiple line breaks
-        result = re.sub(r'\n{3,}', '\n\n', result)
+        # Iterative depth-first walk, so deeply nested pages can't hit the recursion limit.
+        # A None entry on the stack marks the end of a block-level element.
+        stack: List[Optional[PageElement]] = [element]
+        while stack:
+            node = stack.pop()
+            
+            if node is None:
+                pieces.append(BLOCK_BREAK)
+            elif isinstance(node, NavigableString):
+                # Comments, doctypes, CDATA etc. are not visible text
+                if not isinstance(node, PreformattedString):
+                    pieces.append(str(node))
+            elif isinstance(node, Tag) and node.name not in SKIPPED_TAGS:
+                if self._should_add_line_break(node):
+                    pieces.append(BLOCK_BREAK)
+                    stack.append(None)
+                stack.extend(reversed(node.contents))
         
-        return result.strip()
+        # Collapse whitespace inside each block and drop empty blocks
+        lines = (WHITESPACE_RE.sub(' ', block).strip() for block in ''.join(pieces).split(BLOCK_BREAK))
+        return '\n'.join(line for line in lines if line)
     
-    def _should_add_line_break(self, element) -> bool:
+    def _should_add_line_break(self, element: Tag) -> bool:
         """
-        Determine if a line break should be added before this element.
+        Determine if this element starts a new line (i.e. is block-level).
         
         Args:
             element: BeautifulSoup element
@@ -215,25 +311,10 @@ class WebScraper:
         Returns:
             True if line break should be added, False otherwise
         """
-        # Always add line break for headings
-        if element.name in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
-            return True
-        
-        # Add line break for paragraphs
-        if element.name == 'p':
-            return True
-        
-        # Add line break for divs that contain significant content
-        if element.name == 'div':
-            # Check if this div contains multiple paragraphs or headings
-            has_paragraphs = element.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
-            if has_paragraphs:
-                return True
-        
-        return False
+        return element.name in BLOCK_TAGS
 
 
-def scrape_url(url: str, timeout: int = 10) -> Optional[Tuple[str, str]]:
+async def scrape_url(url: str, timeout: int = 10) -> Optional[Tuple[str, str]]:
     """
     Convenience function to scrape a URL.
     
@@ -245,14 +326,29 @@ def scrape_url(url: str, timeout: int = 10) -> Optional[Tuple[str, str]]:
         Tuple of (title, content) where content is extracted text with paragraphs/sections separated by line breaks,
         or None if scraping fails
     """
-    scraper = WebScraper(timeout=timeout)
-    return scraper.scrape_url(url)
+    scraper = WebScraper(timeout=timeout, cache=get_page_cache())
+    return await scraper.scrape_url(url)
+
+
+async def scrape_many(urls: List[str], timeout: int = 10) -> List[Optional[Tuple[str, str]]]:
+    """
+    Convenience function to scrape several URLs concurrently.
+    
+    Args:
+        urls: The URLs to scrape
+        timeout: Request timeout in seconds
+        
+    Returns:
+        List of (title, content) tuples or None for failed URLs, in the same order as urls
+    """
+    scraper = WebScraper(timeout=timeout, cache=get_page_cache())
+    return await scraper.scrape_many(urls)
 
 
 if __name__ == "__main__":
     # Example usage
     test_url = "https://example.com"
-    result = scrape_url(test_url)
+    result = asyncio.run(scrape_url(test_url))
     
     if result:
         title, content = result
@@ -1,67 +1,149 @@
-from typing import Dict, List, Tuple
-from ddgs import DDGS
+from typing import List, Optional, Tuple
 import asyncio
 import logging
 
+from src.agent_memory import AgentMemory
+from src.globals import PREFILTER_ENABLED, SEARCH_MAX_RESULTS, WEB_SEARCH_MAX_CONCURRENCY
+from src.tools.relevance_filter import filter_relevant_passages
+from src.tools.search_backend import SearchBackend, get_search_backend
+from src.tools.web_scraper.url_registry import UrlRegistry, get_url_registry
 from src.tools.web_scraper.web_scraper import scrape_url
 from src.tool_agents.research.contextual_summary_tool import contextual_summary_tool
+from src.tracing import TRACER
 
 from agents import function_tool
 
-def source_finder(query: str) -> List[str]:
+async def source_finder(
+    query: str,
+    max_results: int = SEARCH_MAX_RESULTS,
+    backend: Optional[SearchBackend] = None,
+) -> List[str]:
     """
     Search the web for the most relevant URLs based on the query.
-    """
-    try:
-        ddgs = DDGS()
-        results = list(ddgs.text(query, max_results=3))
+    
+    Args:
+        query: str - the search query to use
+        max_results: int - maximum number of URLs to return
+        backend: Optional[SearchBackend] - the search backend (defaults to the configured, cached one)
         
-        urls = [r['href'] for r in results if r.get('href')]
-        return urls
-    except Exception as e:
-        logging.error(f"Error in source_finder: {str(e)}")
-        return []
+    Returns:
+        List of URLs in search rank order (empty if the search failed)
+    """
+    with TRACER.span("search", query=query) as span:
+        try:
+            results = await (backend or get_search_backend()).search(query, max_results)
+            span.set(results=len(results))
+            return [result.url for result in results]
+        except Exception as e:
+            span.record_error(e)
+            logging.error(f"Error in source_finder: {str(e)}")
+            return []
 
-async def web_search(query: str) -> List[Tuple[Tuple[str, str], str]]:
+async def _search_result_for_url(
+    query: str,
+    url: str,
+    limit: asyncio.Semaphore,
+    registry: UrlRegistry,
+    research_question: Optional[str] = None,
+    memory: Optional[AgentMemory] = None,
+) -> Optional[Tuple[Tuple[str, str], str]]:
     """
-    Search the web for the most relevant URLs based on the query and return summaries.
+    Scrape and summarize a single URL, holding a concurrency slot for the whole chain.
     
     Args:
-        query: str - the search query to use
+        query: str - the search query to contextualize the summary to
+        url: str - the URL to scrape
+        limit: asyncio.Semaphore - the concurrency cap shared by the URLs of one query
+        registry: UrlRegistry - the registry sharing scraped pages across queries and questions
+        research_question: Optional[str] - the research question behind the query, used to pre-filter the page
+        memory: Optional[AgentMemory] - session memory to checkpoint the summary in (and resume it from)
         
     Returns:
-        List of tuples containing ((Title, URL), summary) pairs
+        ((Title, URL), summary) tuple, or None if the page could not be scraped or was already used
     """
-    urls = source_finder(query)
-    results = []
+    # Skip pages another query of the same research question already covered (claimed before the first await,
+    # so that of two URLs of one query for the same page, the higher ranked one is used)
+    if not registry.claim(url, research_question or query):
+        return None
     
-    for url in urls:
-        scraped_data = scrape_url(url)
-        if scraped_data:
-            title, content = scraped_data
-            try:
-                summary = await contextual_summary_tool(query, content)
-                results.append(((title, url), summary))
-            except Exception as e:
-                logging.error(f"Error summarizing content for {url}: {str(e)}")
-                # If it's a context window issue, try with a shorter content
-                if "context_length_exceeded" in str(e) or "context window" in str(e).lower():
-                    try:
-                        # Try with just the first 5000 characters
-                        short_content = content[:5000] + "..."
-                        summary = await contextual_summary_tool(query, short_content)
-                        results.append(((title, url), summary))
-                    except Exception as e2:
-                        logging.error(f"Error summarizing shortened content for {url}: {str(e2)}")
-                        # Fallback to original content if summarization fails
-                        results.append(((title, url), content[:1000] + "..."))
-                else:
-                    # Fallback to original content if summarization fails
-                    results.append(((title, url), content[:1000] + "..."))
-        else:
+    if memory is not None and research_question is not None:
+        checkpointed = await memory.get_checkpointed_source(research_question, query, url)
+        if checkpointed:
+            return checkpointed
+    
+    async with limit:
+        scraped_data = await registry.scrape(url, scrape_url)
+        if not scraped_data:
             logging.warning(f"Failed to scrape content from {url}")
+            return None
+        
+        title, content = scraped_data
+        duplicate_of = await registry.claim_content(url, content, research_question or query)
+        if duplicate_of:
+            logging.info(f"Skipping {url}: near-duplicate of {duplicate_of}")
+            return None
+        
+        if PREFILTER_ENABLED:
+            # Only send the passages relevant to the question/query to the summarizer
+            with TRACER.span("prefilter", url=url, chars=len(content)) as span:
+                content = await asyncio.to_thread(filter_relevant_passages, content, [research_question or "", query])
+                span.set(kept_chars=len(content))
+        try:
+            summary = await contextual_summary_tool(query, content)
+        except Exception as e:
+            logging.error(f"Error summarizing content for {url}: {str(e)}")
+            # Fallback to original content if summarization fails. It isn't checkpointed: the failure is usually
+            # transient (rate limit, timeout), so a resumed run should retry the summary rather than keep the raw text
+            return ((title, url), content[:1000] + "...")
+        if memory is not None and research_question is not None:
+            await memory.checkpoint_source(research_question, query, ((title, url), summary))
+        return ((title, url), summary)
+
+async def web_search(
+    query: str,
+    research_question: Optional[str] = None,
+    max_concurrency: int = WEB_SEARCH_MAX_CONCURRENCY,
+    memory: Optional[AgentMemory] = None,
+) -> List[Tuple[Tuple[str, str], str]]:
+    """
+    Search the web for the most relevant URLs based on the query and return summaries.
     
-    return results
+    Every URL is scraped and summarized concurrently (up to max_concurrency at a time),
+    and a failure for one URL does not affect the others. Within a research run, each
+    page is scraped once and used once per research question, even when several
+    queries or questions find it under different URLs, and mirrors or syndicated
+    copies of a page already used for the question are skipped. With a session memory,
+    each summary is checkpointed as it completes, so a resumed run skips the pages it
+    already summarized.
+    
+    Args:
+        query: str - the search query to use
+        research_question: Optional[str] - the research question behind the query, used to pre-filter pages
+        max_concurrency: int - maximum number of URLs processed at once (1 = serial)
+        memory: Optional[AgentMemory] - session memory to checkpoint summaries in (requires research_question)
+        
+    Returns:
+        List of tuples containing ((Title, URL), summary) pairs, in search rank order
+    """
+    with TRACER.span("web_search", query=query) as span:
+        urls = await source_finder(query)
+        limit = asyncio.Semaphore(max(1, max_concurrency))
+        registry = get_url_registry() or UrlRegistry()
+        
+        outcomes = await asyncio.gather(
+            *(_search_result_for_url(query, url, limit, registry, research_question, memory) for url in urls),
+            return_exceptions=True,
+        )
+        
+        results = []
+        for url, outcome in zip(urls, outcomes):
+            if isinstance(outcome, BaseException):
+                logging.error(f"Error processing {url}: {str(outcome)}")
+            elif outcome is not None:
+                results.append(outcome)
+        
+        span.set(urls=len(urls), results=len(results))
+        return results
 
 @function_tool
 async def web_search_tool(query: str) -> List[Tuple[Tuple[str, str], str]]:
@@ -0,0 +1,363 @@
+"""
+Tracing spans for the stages of a run, exportable as JSON lines and Chrome trace files.
+
+Stages wrap their work in TRACER.span(name, **attributes) and record what they
+did (bytes, tokens, cache hits) on the span. Spans nest through the context, so
+work started with asyncio.gather or asyncio.to_thread is parented to the span
+that started it. Tracing is off unless DEEP_RESEARCH_TRACING_ENABLED is set,
+in which case spans cost a few microseconds each.
+
+Traces are written to TRACE_DIR as <run>.jsonl (one span per line) and
+<run>.trace.json (open in chrome://tracing or https://ui.perfetto.dev). Stage
+timings of a trace, or their change against a baseline trace, are printed with:
+
+    python -m src.tracing traces/<run>.jsonl [traces/<baseline>.jsonl]
+"""
+
+import argparse
+import asyncio
+import contextvars
+import itertools
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple, Union
+
+from src.globals import TRACE_DIR, TRACE_MAX_SPANS, TRACING_ENABLED
+
+# Attributes added up from child spans into their parents, so stages report the model tokens they used
+ROLLUP_ATTRIBUTES = ("input_tokens", "output_tokens")
+
+
+class Span:
+    """A timed stage of a run and what it did."""
+
+    __slots__ = ("name", "span_id", "parent", "track", "start", "end", "attributes", "error")
+
+    def __init__(self, name: str, span_id: int, parent: Optional["Span"], track: str, attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = span_id
+        self.parent = parent
+        self.track = track
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        """Seconds the span took (so far, if it hasn't ended)."""
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def set(self, **attributes: Any) -> None:
+        """Record attributes of the span."""
+        self.attributes.update(attributes)
+
+    def add(self, name: str, amount: Union[int, float]) -> None:
+        """Add to a numeric attribute of the span."""
+        self.attributes[name] = self.attributes.get(name, 0) + amount
+
+    def record_error(self, error: BaseException) -> None:
+        """Mark the span as failed (for errors that are handled rather than raised)."""
+        self.error = f"{type(error).__name__}: {error}"
+
+
+class _NoopSpan:
+    """Stand-in for spans while tracing is off."""
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def add(self, name: str, amount: Union[int, float]) -> None:
+        pass
+
+    def record_error(self, error: BaseException) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+def _track() -> str:
+    """Name of the task (or thread) running the caller; spans of one track nest strictly."""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    if task is not None:
+        return task.get_name()
+    return threading.current_thread().name
+
+
+class Tracer:
+    """
+    Collects the spans of a run.
+
+    Finished spans are kept in memory (the most recent max_spans of them) until
+    they are exported. Spans are timed with the monotonic clock and exported
+    relative to when the tracer started.
+    """
+
+    def __init__(self, enabled: bool = TRACING_ENABLED, max_spans: int = TRACE_MAX_SPANS):
+        """
+        Initialize the tracer.
+
+        Args:
+            enabled: Whether spans are recorded
+            max_spans: Maximum number of finished spans kept
+        """
+        self.enabled = enabled
+        self.run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        self._spans: Deque[Span] = deque(maxlen=max(1, max_spans))
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._origin_wall = time.time()
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Union[Span, _NoopSpan]]:
+        """
+        Time a stage; spans started inside it (in this task or tasks it starts) become its children.
+
+        Args:
+            name: Name of the stage (e.g. "search", "fetch", "summarize")
+            **attributes: Initial attributes of the span
+
+        Yields:
+            The span, to record attributes on (a no-op span while tracing is off)
+        """
+        if not self.enabled:
+            yield NOOP_SPAN
+            return
+        span = self._new_span(name, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span)
+
+    def start_span(self, name: str, **attributes: Any) -> Union[Span, _NoopSpan]:
+        """
+        Start a span without making it the current one (for work that doesn't fit a with block, e.g. a stream).
+
+        Args:
+            name: Name of the stage
+            **attributes: Initial attributes of the span
+
+        Returns:
+            The span; pass it to end_span when the work is done
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        return self._new_span(name, attributes)
+
+    def _new_span(self, name: str, attributes: Dict[str, Any]) -> Span:
+        """Create a span as a child of the current one."""
+        return Span(name, next(self._ids), _current_span.get(), _track(), attributes)
+
+    def end_span(self, span: Union[Span, _NoopSpan]) -> None:
+        """End a span and keep it for export."""
+        if not isinstance(span, Span) or span.end is not None:
+            return
+        span.end = time.perf_counter()
+        if span.parent is not None:
+            for name in ROLLUP_ATTRIBUTES:
+                if name in span.attributes:
+                    span.parent.add(name, span.attributes[name])
+        with self._lock:
+            self._spans.append(span)
+
+    def current(self) -> Union[Span, _NoopSpan]:
+        """The innermost span of the caller (a no-op span if there is none)."""
+        return _current_span.get() or NOOP_SPAN
+
+    def annotate(self, **attributes: Any) -> None:
+        """Record attributes on the caller's current span."""
+        self.current().set(**attributes)
+
+    def spans(self) -> List[Span]:
+        """The finished spans, in the order they ended."""
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self) -> None:
+        """Drop the finished spans."""
+        with self._lock:
+            self._spans.clear()
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """The finished spans as JSON-ready dicts, in start order; times are seconds since the tracer started."""
+        records = []
+        for span in sorted(self.spans(), key=lambda span: span.start):
+            records.append({
+                "name": span.name,
+                "span_id": span.span_id,
+                "parent_id": span.parent.span_id if span.parent else None,
+                "track": span.track,
+                "start": round(span.start - self._origin, 6),
+                "duration": round(span.duration, 6),
+                "timestamp": round(self._origin_wall + span.start - self._origin, 6),
+                "error": span.error,
+                "attributes": span.attributes,
+            })
+        return records
+
+    def write_jsonl(self, path: Path) -> Path:
+        """Write the finished spans to a JSON lines file, one span per line."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as file:
+            for record in self.to_records():
+                file.write(json.dumps(record, default=str) + "\n")
+        return path
+
+    def write_chrome_trace(self, path: Path) -> Path:
+        """Write the finished spans in Chrome trace event format, one row per task or thread."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_chrome_trace(self.to_records(), path)
+        return path
+
+    def export(self, directory: Path = TRACE_DIR) -> Tuple[Path, Path]:
+        """
+        Write the run's trace as JSON lines and Chrome trace files (rewritten on every export).
+
+        Args:
+            directory: Directory for the trace files
+
+        Returns:
+            (JSON lines path, Chrome trace path) tuple
+        """
+        directory = Path(directory)
+        return (
+            self.write_jsonl(directory / f"{self.run_id}.jsonl"),
+            self.write_chrome_trace(directory / f"{self.run_id}.trace.json"),
+        )
+
+
+def write_chrome_trace(records: List[Dict[str, Any]], path: Path) -> None:
+    """Write span records (as from Tracer.to_records or load_trace) in Chrome trace event format."""
+    tracks: Dict[str, int] = {}
+    events = []
+    for record in records:
+        if record["track"] not in tracks:
+            tracks[record["track"]] = len(tracks) + 1
+            events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tracks[record["track"]], "args": {"name": record["track"]}})
+        args = dict(record["attributes"])
+        if record["error"]:
+            args["error"] = record["error"]
+        events.append({
+            "name": record["name"],
+            "cat": record["name"].split(".")[0],
+            "ph": "X",
+            "pid": 1,
+            "tid": tracks[record["track"]],
+            "ts": round(record["start"] * 1e6, 1),
+            "dur": round(record["duration"] * 1e6, 1),
+            "args": args,
+        })
+    Path(path).write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}, default=str), encoding="utf-8")
+
+
+def load_trace(path: Path) -> List[Dict[str, Any]]:
+    """Load the span records of a JSON lines trace."""
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def stage_stats(records: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """
+    Summarize span records per stage.
+
+    Args:
+        records: Span records
+
+    Returns:
+        Stats per stage name: count, errors, total, p50, p95 and max seconds, and input/output tokens
+    """
+    by_stage: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        by_stage.setdefault(record["name"], []).append(record)
+
+    stats = {}
+    for name, stage in by_stage.items():
+        durations = sorted(record["duration"] for record in stage)
+        stats[name] = {
+            "count": len(stage),
+            "errors": sum(1 for record in stage if record["error"]),
+            "total": sum(durations),
+            "p50": statistics.median(durations),
+            "p95": durations[min(len(durations) - 1, int(0.95 * len(durations)))],
+            "max": durations[-1],
+            "input_tokens": sum(record["attributes"].get("input_tokens", 0) for record in stage),
+            "output_tokens": sum(record["attributes"].get("output_tokens", 0) for record in stage),
+        }
+    return stats
+
+
+def format_stage_stats(stats: Dict[str, Dict[str, float]], baseline: Optional[Dict[str, Dict[str, float]]] = None) -> str:
+    """Format stage stats as a table, slowest total first, with the change against a baseline if given."""
+    lines = [f"{'stage':<24}{'count':>7}{'errors':>7}{'total s':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'tokens':>10}"]
+    if baseline is not None:
+        lines[0] += f"{'Δ p50':>9}{'Δ total':>9}"
+    for name, stage in sorted(stats.items(), key=lambda item: -item[1]["total"]):
+        line = (
+            f"{name:<24}{stage['count']:>7}{stage['errors']:>7}{stage['total']:>10.2f}{stage['p50'] * 1000:>10.1f}"
+            f"{stage['p95'] * 1000:>10.1f}{stage['max'] * 1000:>10.1f}{stage['input_tokens'] + stage['output_tokens']:>10}"
+        )
+        if baseline is not None:
+            before = baseline.get(name)
+            if before:
+                line += f"{_change(stage['p50'], before['p50']):>9}{_change(stage['total'], before['total']):>9}"
+            else:
+                line += f"{'new':>9}{'new':>9}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _change(value: float, baseline: float) -> str:
+    """Relative change against a baseline, as a signed percentage."""
+    if baseline <= 0:
+        return "n/a"
+    return f"{(value - baseline) / baseline:+.0%}"
+
+
+# Process-wide tracer every stage records to
+TRACER = Tracer()
+
+
+def export_trace(directory: Path = TRACE_DIR) -> Optional[Tuple[Path, Path]]:
+    """Export the process-wide tracer's spans if tracing is on, printing where they were written."""
+    if not TRACER.enabled or not TRACER.spans():
+        return None
+    paths = TRACER.export(directory)
+    print(f"📊 Trace: Wrote {len(TRACER.spans())} spans to {paths[0]} and {paths[1]}")
+    return paths
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Print the stage timings of a trace, compared to a baseline trace if given."""
+    parser = argparse.ArgumentParser(prog="python -m src.tracing", description="Summarize a trace per stage.")
+    parser.add_argument("trace", type=Path, help="JSON lines trace to summarize")
+    parser.add_argument("baseline", type=Path, nargs="?", help="JSON lines trace to compare against")
+    args = parser.parse_args(argv)
+
+    baseline = stage_stats(load_trace(args.baseline)) if args.baseline else None
+    print(format_stage_stats(stage_stats(load_trace(args.trace)), baseline))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""
+Token and cost accounting: a ledger of the model usage of every session, research question, agent and model.
+
+Every agent run started through the LLM scheduler reports the usage of each of
+its model responses to the ledger (through run hooks). Responses are attributed
+to the session and research question of the code that started the run (see
+usage_scope) and to the agent that made them. Cost is estimated from per-model
+prices, overridable with a JSON file at DEEP_RESEARCH_MODEL_PRICES_PATH that maps
+model names to [input, cached input, output] USD per million tokens.
+"""
+
+import contextvars
+import json
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, NamedTuple, Optional, Sequence, Tuple
+
+from agents import Agent, RunContextWrapper, RunHooks
+from agents.items import ModelResponse
+
+from src.globals import MODEL_PRICES_PATH
+from src.research_store import get_research_store
+
+# USD per million tokens: (input, cached input, output)
+MODEL_PRICES: Dict[str, Tuple[float, float, float]] = {
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "o3": (2.00, 0.50, 8.00),
+    "o4-mini": (1.10, 0.275, 4.40),
+}
+if MODEL_PRICES_PATH:
+    MODEL_PRICES.update({
+        model: tuple(prices)
+        for model, prices in json.loads(Path(MODEL_PRICES_PATH).read_text(encoding="utf-8")).items()
+    })
+
+# Dimensions usage can be grouped by
+USAGE_DIMENSIONS = ("session_id", "question", "agent", "model")
+
+
+class UsageKey(NamedTuple):
+    """What a model response is attributed to ("" when unknown)."""
+
+    session_id: str
+    question: str
+    agent: str
+    model: str
+
+
+class TokenUsage:
+    """Token counts and estimated cost of one or more model responses."""
+
+    __slots__ = ("requests", "input_tokens", "cached_tokens", "output_tokens", "cost")
+
+    def __init__(self, requests: int = 0, input_tokens: int = 0, cached_tokens: int = 0, output_tokens: int = 0, cost: float = 0.0):
+        self.requests = requests
+        self.input_tokens = input_tokens
+        self.cached_tokens = cached_tokens
+        self.output_tokens = output_tokens
+        self.cost = cost
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+    def add(self, other: "TokenUsage") -> None:
+        """Add another usage to this one."""
+        self.requests += other.requests
+        self.input_tokens += other.input_tokens
+        self.cached_tokens += other.cached_tokens
+        self.output_tokens += other.output_tokens
+        self.cost += other.cost
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "input_tokens": self.input_tokens,
+            "cached_tokens": self.cached_tokens,
+            "output_tokens": self.output_tokens,
+            "total_tokens": self.total_tokens,
+            "cost": round(self.cost, 6),
+        }
+
+
+def estimate_cost(model: str, input_tokens: int, cached_tokens: int, output_tokens: int) -> float:
+    """
+    Estimate the USD cost of model usage.
+
+    Args:
+        model: Model name (dated snapshots, e.g. gpt-4.1-2025-04-14, are priced as their base model)
+        input_tokens: Prompt tokens, including cached ones
+        cached_tokens: Prompt tokens served from the provider's prompt cache
+        output_tokens: Completion tokens
+
+    Returns:
+        The estimated cost, or 0.0 for models without a known price
+    """
+    prices = MODEL_PRICES.get(model)
+    if prices is None:
+        # Fall back to the longest known model name the given one starts with
+        base = max((name for name in MODEL_PRICES if model.startswith(f"{name}-")), key=len, default=None)
+        prices = MODEL_PRICES.get(base) if base else None
+    if prices is None:
+        return 0.0
+    input_price, cached_price, output_price = prices
+    return ((input_tokens - cached_tokens) * input_price + cached_tokens * cached_price + output_tokens * output_price) / 1_000_000
+
+
+class UsageLedger:
+    """
+    Model usage aggregated per (session, research question, agent, model).
+
+    Usage of sessions is also added to the research store (when enabled), so
+    sessions restored in a later process keep their totals.
+    """
+
+    def __init__(self):
+        self._entries: Dict[UsageKey, TokenUsage] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: UsageKey, usage: TokenUsage, persist: bool = True) -> None:
+        """
+        Add model usage to the ledger.
+
+        Args:
+            key: What the usage is attributed to
+            usage: The usage
+            persist: Whether to add it to the research store too (for usage of a session)
+        """
+        with self._lock:
+            self._entries.setdefault(key, TokenUsage()).add(usage)
+        store = get_research_store() if persist and key.session_id else None
+        if store:
+            store.submit(store.add_usage, key.session_id, key.question, key.agent, key.model,
+                         usage.requests, usage.input_tokens, usage.cached_tokens, usage.output_tokens)
+
+    def load_session(self, session_id: str, rows: Sequence[Tuple[str, str, str, int, int, int, int]]) -> None:
+        """
+        Replace the ledger entries of a session with its stored usage.
+
+        Args:
+            session_id: The session id
+            rows: (question, agent, model, requests, input tokens, cached tokens, output tokens) rows
+        """
+        with self._lock:
+            for key in [key for key in self._entries if key.session_id == session_id]:
+                del self._entries[key]
+            for question, agent, model, requests, input_tokens, cached_tokens, output_tokens in rows:
+                cost = estimate_cost(model, input_tokens, cached_tokens, output_tokens)
+                self._entries[UsageKey(session_id, question, agent, model)] = TokenUsage(
+                    requests, input_tokens, cached_tokens, output_tokens, cost
+                )
+
+    def summarize(self, by: Sequence[str] = (), session_id: Optional[str] = None) -> Dict[Tuple[str, ...], TokenUsage]:
+        """
+        Aggregate the ledger.
+
+        Args:
+            by: Dimensions to group by, from USAGE_DIMENSIONS (nothing for a single total)
+            session_id: Only count the usage of this session
+
+        Returns:
+            Usage per group, keyed by the group's values of the `by` dimensions
+        """
+        unknown = set(by) - set(USAGE_DIMENSIONS)
+        if unknown:
+            raise ValueError(f"Unknown usage dimensions: {sorted(unknown)}")
+        summary: Dict[Tuple[str, ...], TokenUsage] = {}
+        with self._lock:
+            for key, usage in self._entries.items():
+                if session_id is not None and key.session_id != session_id:
+                    continue
+                group = tuple(getattr(key, dimension) for dimension in by)
+                summary.setdefault(group, TokenUsage()).add(usage)
+        return summary
+
+    def total(self, session_id: Optional[str] = None) -> TokenUsage:
+        """Total usage of the ledger, or of one session."""
+        return self.summarize((), session_id).get((), TokenUsage())
+
+    def clear(self) -> None:
+        """Drop every entry (the research store is not affected)."""
+        with self._lock:
+            self._entries.clear()
+
+
+def format_usage(summary: Dict[Tuple[str, ...], TokenUsage], by: Sequence[str]) -> str:
+    """Format a ledger summary as a table, most expensive first (then most tokens)."""
+    width = 40
+    header = "".join(f"{dimension:<{width}}" for dimension in by)
+    lines = [f"{header}{'requests':>10}{'input':>12}{'cached':>12}{'output':>12}{'cost $':>10}"]
+    for group, usage in sorted(summary.items(), key=lambda item: (-item[1].cost, -item[1].total_tokens)):
+        labels = "".join(f"{_truncate(value or '-', width - 2):<{width}}" for value in group)
+        lines.append(
+            f"{labels}{usage.requests:>10}{usage.input_tokens:>12}{usage.cached_tokens:>12}"
+            f"{usage.output_tokens:>12}{usage.cost:>10.4f}"
+        )
+    return "\n".join(lines)
+
+
+def _truncate(text: str, width: int) -> str:
+    return text if len(text) <= width else text[: width - 1] + "…"
+
+
+_scope: contextvars.ContextVar[Tuple[str, str]] = contextvars.ContextVar("usage_scope", default=("", ""))
+
+
+@contextmanager
+def usage_scope(session_id: Optional[str] = None, question: Optional[str] = None) -> Iterator[None]:
+    """
+    Attribute the model usage of the code inside (and the tasks it starts) to a session and/or research question.
+
+    Args:
+        session_id: Session the usage belongs to (unchanged if None)
+        question: Research question the usage belongs to (unchanged if None)
+    """
+    current_session, current_question = _scope.get()
+    token = _scope.set((
+        current_session if session_id is None else session_id,
+        current_question if question is None else question,
+    ))
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+class UsageHooks(RunHooks[Any]):
+    """Run hooks that add the usage of every model response of a run to a ledger."""
+
+    def __init__(self, ledger: UsageLedger):
+        self.ledger = ledger
+
+    async def on_llm_end(self, context: RunContextWrapper[Any], agent: Agent[Any], response: ModelResponse) -> None:
+        usage = response.usage
+        if usage is None or not (usage.input_tokens or usage.output_tokens):
+            return
+        session_id, question = _scope.get()
+        # Runs given a session's memory as their context belong to that session
+        session_id = getattr(context.context, "session_id", None) or session_id
+        model = agent.model if isinstance(agent.model, str) else getattr(agent.model, "model", "") or ""
+        cached_tokens = getattr(usage.input_tokens_details, "cached_tokens", 0) or 0
+        self.ledger.record(
+            UsageKey(session_id, question, agent.name, model),
+            TokenUsage(
+                max(1, usage.requests),
+                usage.input_tokens,
+                cached_tokens,
+                usage.output_tokens,
+                estimate_cost(model, usage.input_tokens, cached_tokens, usage.output_tokens),
+            ),
+        )
+
+
+# Process-wide ledger every run started through the LLM scheduler reports to
+USAGE_LEDGER = UsageLedger()
+USAGE_HOOKS = UsageHooks(USAGE_LEDGER)
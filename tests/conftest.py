@@ -19,6 +19,9 @@ project_root = Path(__file__).parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
+# Keep the suite's sessions in memory rather than in the research store (store tests use their own database)
+os.environ.setdefault("DEEP_RESEARCH_RESEARCH_STORE_ENABLED", "false")
+
 
 # Test data constants
 TEST_URLS = [
@@ -58,11 +58,34 @@ async def main():
         ("tests.tool_agents.research.test_query_writer_tool", "Query Writer Tool"),
         ("tests.tool_agents.research.test_contextual_summary_tool", "Contextual Summary Tool"),
         ("tests.tool_agents.research.test_report_writer_tool", "Report Writer Tool"),
+        ("tests.tool_agents.research.test_report_pipeline", "Report Pipeline"),
+        ("tests.tool_agents.research.test_report_stream", "Report Stream"),
+        ("tests.tool_agents.research.test_plan_parser", "Plan Parser"),
+        ("tests.tool_agents.research.test_summary_cache", "Summary Cache"),
         
         # Tools
         ("tests.tools.test_researcher", "Researcher Tool"),
         ("tests.tools.test_web_search_tool", "Web Search Tool"),
         ("tests.tools.web_scraper.test_web_scraper", "Web Scraper Tool"),
+        ("tests.tools.test_task_scheduler", "Task Scheduler"),
+        ("tests.tools.web_scraper.test_page_cache", "Page Cache"),
+        ("tests.tools.web_scraper.test_url_registry", "URL Registry"),
+        ("tests.test_disk_cache", "Disk Cache"),
+        ("tests.test_text_chunker", "Text Chunker"),
+        ("tests.tools.test_search_backend", "Search Backend"),
+        ("tests.tools.test_relevance_filter", "Relevance Filter"),
+        ("tests.test_agent_memory", "Agent Memory"),
+        ("tests.test_batch", "Batch Runner"),
+        ("tests.test_bm25", "BM25 Index"),
+        ("tests.test_simhash", "SimHash"),
+        ("tests.test_research_index", "Research Index"),
+        ("tests.test_research_store", "Research Store"),
+        ("tests.test_router", "Router"),
+        ("tests.test_server", "HTTP Service"),
+        ("tests.test_llm_scheduler", "LLM Scheduler"),
+        ("tests.test_tracing", "Tracing"),
+        ("tests.test_usage", "Usage Ledger"),
+        ("tests.test_benchmark", "Benchmark"),
     ]
     
     print("🧪 Deep Research Agent - Comprehensive Test Suite")
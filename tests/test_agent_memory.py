@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test script for session-scoped agent memory.
+"""
+
+import asyncio
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from agents.tool_context import ToolContext
+
+from src.agent_memory import AGENT_MEMORY, DEFAULT_SESSION_ID, close_agent_memory, get_agent_memory
+from src.main_agents.coordinator_agent import get_state, set_state
+from src.tool_agents.research.report_writer_tool import search_research_dump
+
+
+async def invoke(tool, context, **arguments):
+    """Invoke a function tool the way the runner does, with a run context."""
+    arguments = json.dumps(arguments)
+    return await tool.on_invoke_tool(
+        ToolContext(context=context, tool_name=tool.name, tool_call_id="call_1", tool_arguments=arguments),
+        arguments,
+    )
+
+
+@pytest.fixture
+def sessions():
+    """Two fresh session memories."""
+    memories = get_agent_memory("session-a"), get_agent_memory("session-b")
+    yield memories
+    close_agent_memory("session-a")
+    close_agent_memory("session-b")
+
+
+def test_memory_is_created_once_per_session(sessions):
+    """Test that a session id always maps to the same memory and the default session to AGENT_MEMORY."""
+    assert get_agent_memory("session-a") is sessions[0]
+    assert sessions[0] is not sessions[1]
+    assert get_agent_memory(DEFAULT_SESSION_ID) is AGENT_MEMORY
+    assert sessions[0].session_id == "session-a"
+
+
+def test_default_memory_is_created_on_first_use():
+    """Test that importing the agents creates no session memory, and every Manager gets a new session by default."""
+    code = (
+        "import src.agent_memory as agent_memory, src.manager; "
+        "assert agent_memory._memories == {}, agent_memory._memories; "
+        "assert src.manager.Manager().memory is not src.manager.Manager().memory"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).resolve().parents[1], check=True)
+
+
+async def test_sessions_are_isolated(sessions):
+    """Test that concurrent sessions keep their own plan, research dump, history and state."""
+    memory_a, memory_b = sessions
+    
+    async def fill(memory, name):
+        await memory.store_research_plan(f"Plan for {name}")
+        await memory.add_to_research_dump(f"Question {name}", [((f"Title {name}", f"https://{name}.example.com"), f"Summary {name}")])
+        await memory.add_items([{"role": "user", "content": f"Hello from {name}"}])
+    
+    await asyncio.gather(fill(memory_a, "a"), fill(memory_b, "b"))
+    memory_a.set_state("plan_finalized", True)
+    
+    assert await memory_a.get_research_plan() == "Plan for a"
+    assert await memory_b.get_research_plan() == "Plan for b"
+    assert list(await memory_b.get_research_dump()) == ["Question b"]
+    assert [item["content"] for item in await memory_a.get_items()] == ["Hello from a"]
+    assert not memory_b.plan_finalized
+
+
+async def test_tools_use_the_memory_of_their_run_context(sessions):
+    """Test that tools read and write the memory passed as the run context."""
+    memory_a, memory_b = sessions
+    await memory_b.add_to_research_dump("Market", [(("Market Report", "https://example.com/market"), "The market is growing.")])
+    
+    await invoke(set_state, memory_a, state="has_enough_context", value=True)
+    assert memory_a.has_enough_context
+    assert await invoke(get_state, memory_a, state="has_enough_context") is True
+    assert await invoke(get_state, memory_b, state="has_enough_context") is False
+    
+    assert "Market Report" in await invoke(search_research_dump, memory_b, query="market growing", k=3)
+    assert await invoke(search_research_dump, memory_a, query="market growing", k=3) == "No research insights found for this query."
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test script for the headless batch runner.
+"""
+
+import asyncio
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from src.batch import load_briefs, main, run_batch, run_brief
+from src.research_store import ResearchStore
+
+EXAMPLE_BRIEF = Path(__file__).parent.parent / "example_user_context" / "phone_case_drop-shipping.json"
+
+
+def test_load_briefs_from_directory_jsonl_and_file(tmp_path):
+    """Test that briefs load from a directory, a JSONL file and a single JSON file."""
+    (tmp_path / "briefs").mkdir()
+    (tmp_path / "briefs" / "b.json").write_text(json.dumps({"topic": "B"}))
+    (tmp_path / "briefs" / "a.json").write_text(json.dumps({"topic": "A"}))
+    assert load_briefs(tmp_path / "briefs") == [("a", {"topic": "A"}), ("b", {"topic": "B"})]
+    
+    (tmp_path / "nightly.jsonl").write_text('{"topic": "A"}\n\n{"id": "candles & co", "topic": "B"}\n')
+    assert load_briefs(tmp_path / "nightly.jsonl") == [("nightly-1", {"topic": "A"}), ("candles-co", {"id": "candles & co", "topic": "B"})]
+    
+    [(brief_id, brief)] = load_briefs(EXAMPLE_BRIEF)
+    assert brief_id == "phone_case_drop-shipping"
+    assert "topic" in brief
+    
+    (tmp_path / "duplicates.jsonl").write_text('{"id": "x"}\n{"id": "x"}\n')
+    with pytest.raises(ValueError):
+        load_briefs(tmp_path / "duplicates.jsonl")
+
+
+@pytest.fixture
+def fake_pipeline():
+    """Replace the plan, research and report steps, tracking how many briefs run at once."""
+    state = {"running": 0, "peak": 0, "plans": []}
+    
+    async def fake_write_plan(memory):
+        state["plans"].append((await memory.get_items())[0]["content"])
+        await memory.store_research_plan("The plan")
+        return "The plan"
+    
+    async def fake_conduct_research(memory):
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+        await asyncio.sleep(0.01)
+        state["running"] -= 1
+        if "fail" in await memory.get_research_plan() or "fail" in state["plans"][-1]:
+            raise RuntimeError("search is down")
+        await memory.add_to_research_dump("Question", [(("Title", "https://example.com"), "Summary")])
+        return True
+    
+    async def fake_generate_report(memory, report_path, console=None):
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.write_text("Report")
+        return "Report", report_path
+    
+    with patch("src.batch.write_plan", side_effect=fake_write_plan), \
+         patch("src.batch.conduct_research", side_effect=fake_conduct_research), \
+         patch("src.batch.generate_report", side_effect=fake_generate_report):
+        yield state
+
+
+async def test_run_batch_limits_workers_and_writes_reports(tmp_path, fake_pipeline):
+    """Test that briefs run concurrently up to the worker limit and each gets its own report."""
+    briefs = [(f"brief-{number}", {"topic": f"Idea {number}"}) for number in range(5)]
+    results = await run_batch(briefs, tmp_path, max_workers=2)
+    
+    assert fake_pipeline["peak"] == 2
+    assert [result.brief_id for result in results] == [brief_id for brief_id, _ in briefs]
+    assert all(result.error is None for result in results)
+    assert [result.report_path for result in results] == [tmp_path / f"brief-{number}.md" for number in range(5)]
+    assert all('"topic": "Idea' in plan for plan in fake_pipeline["plans"])
+
+
+async def test_failed_brief_does_not_stop_the_batch(tmp_path, fake_pipeline):
+    """Test that one failing brief is reported while the others complete, and the exit code reflects it."""
+    (tmp_path / "briefs.jsonl").write_text('{"id": "ok", "topic": "Candles"}\n{"id": "bad", "topic": "fail"}\n')
+    exit_code = await main([str(tmp_path / "briefs.jsonl"), "--output-dir", str(tmp_path / "out"), "--workers", "1"])
+    
+    assert exit_code == 1
+    assert (tmp_path / "out" / "ok.md").read_text() == "Report"
+    assert not (tmp_path / "out" / "bad.md").exists()
+
+
+async def test_changed_brief_starts_over(tmp_path, fake_pipeline):
+    """Test that a brief is resumed while unchanged, and started over when edited or run with --fresh."""
+    store = ResearchStore(tmp_path / "research.sqlite3")
+    try:
+        with patch("src.agent_memory.get_research_store", return_value=store), \
+             patch("src.batch.get_research_store", return_value=store):
+            old_research = [(("Old Report", "https://example.com/old"), "Old summary")]
+            await run_brief("candles", {"topic": "Candles"}, tmp_path / "out")
+            store.add_to_dump("batch-candles", "Old question", old_research)
+            await run_brief("candles", {"topic": "Candles"}, tmp_path / "out")
+            assert "Old question" in store.load("batch-candles").research_dump
+            
+            await run_brief("candles", {"topic": "Soy candles"}, tmp_path / "out")
+            assert "Soy candles" in fake_pipeline["plans"][-1]
+            assert list(store.load("batch-candles").research_dump) == ["Question"]
+            
+            store.add_to_dump("batch-candles", "Old question", old_research)
+            await run_brief("candles", {"topic": "Soy candles"}, tmp_path / "out", fresh=True)
+            assert list(store.load("batch-candles").research_dump) == ["Question"]
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
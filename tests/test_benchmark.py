@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test script for the offline benchmark: the fake model server, the fixture web and the harness end to end.
+"""
+
+import asyncio
+import json
+import subprocess
+import sys
+
+import httpx
+import pytest
+from openai import AsyncOpenAI
+
+from src.benchmark.fake_openai import LLMProfile, ScriptedAgents, create_app as create_llm_app
+from src.benchmark.fake_web import FixtureWebSearch, WebProfile, create_app as create_web_app, render_page
+from src.benchmark.servers import PROJECT_ROOT
+from src.tool_agents.research.plan_parser import parse_research_plan
+
+# No waiting anywhere: the tests check behavior, not timings
+INSTANT_LLM = LLMProfile(latency=0, tokens_per_second=0, research_areas=2, questions_per_area=2)
+INSTANT_WEB = WebProfile(sites=2, pages_per_site=5, latency=0, search_latency=0)
+
+
+def fake_client() -> AsyncOpenAI:
+    """OpenAI client talking to the fake model server in-process."""
+    transport = httpx.ASGITransport(app=create_llm_app(INSTANT_LLM))
+    return AsyncOpenAI(base_url="http://fake/v1", api_key="test", http_client=httpx.AsyncClient(transport=transport))
+
+
+def test_scripted_agents_follow_the_planner_script():
+    """The Planner Agent is scripted to set its state, write the plan, summarize it, then answer."""
+    agents = ScriptedAgents(INSTANT_LLM)
+    tools = ["set_state", "plan_writer_tool", "plan_summarizer_tool"]
+    items = [{"role": "user", "content": "Research my product"}]
+
+    calls = []
+    for _ in range(4):
+        reply = agents.reply("You are the Planner Agent", items, tools)
+        if not reply.tool:
+            break
+        calls.append(reply.tool)
+        items.append({"type": "function_call", "name": reply.tool, "arguments": json.dumps(reply.arguments), "call_id": reply.tool})
+        items.append({"type": "function_call_output", "call_id": reply.tool, "output": "ok"})
+
+    assert calls == ["set_state", "plan_writer_tool", "plan_summarizer_tool"]
+    assert reply.text.startswith("Here is the research plan.")
+
+
+def test_fake_model_server_writes_a_parseable_plan():
+    """The Plan Writer's reply is a plan the research flow can parse, and identical requests get identical replies."""
+
+    async def write_plan():
+        client = fake_client()
+        response = await client.responses.create(
+            model="gpt-4o", instructions="You are the Plan Writer.", input="Write the plan", stream=False
+        )
+        return response
+
+    first, second = asyncio.run(write_plan()), asyncio.run(write_plan())
+    plan = parse_research_plan(first.output_text)
+
+    assert len(plan) == INSTANT_LLM.research_areas
+    assert all(len(questions) == INSTANT_LLM.questions_per_area for questions in plan.values())
+    assert first.output_text == second.output_text
+    assert first.usage.output_tokens > 0
+
+
+def test_fake_model_server_streams_sections_with_citations():
+    """Streamed section replies arrive as several deltas and cite the sources they were given."""
+
+    async def write_section():
+        client = fake_client()
+        stream = await client.responses.create(
+            model="gpt-4o",
+            instructions="You are the Report Section Writer.\nResearch area: Market Analysis",
+            input="[1] First source\n[2] Second source",
+            stream=True,
+        )
+        deltas, completed = [], None
+        async for event in stream:
+            if event.type == "response.output_text.delta":
+                deltas.append(event.delta)
+            elif event.type == "response.completed":
+                completed = event.response
+        return deltas, completed
+
+    deltas, completed = asyncio.run(write_section())
+    text = "".join(deltas)
+
+    assert len(deltas) > 1
+    assert text == completed.output_text
+    assert text.startswith("### Market Analysis")
+    assert "[1]" in text and "[2]" in text
+    assert completed.usage.total_tokens == completed.usage.input_tokens + completed.usage.output_tokens
+
+
+def test_fixture_web_serves_stable_pages_and_search_results():
+    """Pages render the same every time, out-of-range pages are 404, and a query always finds the same pages."""
+
+    async def fetch(path):
+        transport = httpx.ASGITransport(app=create_web_app(INSTANT_WEB))
+        async with httpx.AsyncClient(transport=transport, base_url="http://fixture") as client:
+            return await client.get(path)
+
+    page = asyncio.run(fetch("/sites/1/pages/3"))
+    assert page.status_code == 200
+    assert page.text == render_page(1, 3, INSTANT_WEB)
+    assert asyncio.run(fetch("/sites/1/pages/5")).status_code == 404
+    assert asyncio.run(fetch("/sites/2/pages/0")).status_code == 404
+
+    search = FixtureWebSearch(["http://a/sites/0", "http://b/sites/1"], INSTANT_WEB)
+    results = asyncio.run(search.search("Eco  Phone Cases", 4))
+    assert len(results) == 4
+    assert len({result.url for result in results}) == 4
+    assert [result.url for result in asyncio.run(search.search("eco phone cases", 4))] == [result.url for result in results]
+
+
+def run_benchmark(*args):
+    """Run the benchmark with instant servers in its own process."""
+    command = [
+        sys.executable, "-m", "src.benchmark", "--sessions", "1", "--areas", "2", "--questions", "1",
+        "--latency", "0", "--tokens-per-second", "0", "--page-latency", "0", "--search-latency", "0", *args,
+    ]
+    return subprocess.run(command, cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=300)
+
+
+def test_benchmark_runs_the_full_flow_and_gates_on_a_baseline(tmp_path):
+    """A session goes from brief to report offline, and a much faster baseline fails the run."""
+    output = tmp_path / "results.json"
+    result = run_benchmark("--output", str(output))
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    results = json.loads(output.read_text(encoding="utf-8"))
+    assert results["failed"] == []
+    for stage in ["turn", "write_plan", "research_question", "fetch", "summarize", "write_report", "llm.stream"]:
+        assert results["stages"][stage]["count"] > 0, stage
+    assert results["agents"]["Report Section Writer Tool-Agent"]["requests"] == 2
+
+    baseline = dict(results, wall_time=results["wall_time"] / 10)
+    baseline_path = tmp_path / "baseline.json"
+    baseline_path.write_text(json.dumps(baseline), encoding="utf-8")
+    result = run_benchmark("--baseline", str(baseline_path))
+
+    assert result.returncode == 1
+    assert "wall time regressed" in result.stdout
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
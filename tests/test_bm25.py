@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Test script for the BM25 index.
+"""
+
+import pytest
+
+from src.bm25 import BM25Index, tokenize
+
+
+def test_tokenize_drops_stopwords_and_case():
+    """Test that tokenization lowercases and drops stopwords."""
+    assert tokenize("What is the Market Size of phone-cases?") == ["market", "size", "phone-cases"]
+
+
+class TestBM25Index:
+    """Test cases for the BM25Index class."""
+    
+    def test_ranks_relevant_documents_first(self):
+        """Test that documents matching the query outrank unrelated ones."""
+        index = BM25Index()
+        index.add_document("Cookie policy and newsletter signup.")
+        index.add_document("The phone case market size reached $25 billion in 2023.")
+        index.add_document("Phone case pricing varies by material.")
+        
+        results = index.search("phone case market size", k=3)
+        
+        assert [doc_id for doc_id, _ in results] == [1, 2]
+    
+    def test_rare_terms_weigh_more(self):
+        """Test that a rare query term contributes more than a common one."""
+        index = BM25Index()
+        for _ in range(5):
+            index.add_document("amazon seller fees")
+        index.add_document("amazon magsafe accessories")
+        
+        scores = index.scores("magsafe")
+        
+        assert scores[5] > 0
+        assert all(score == 0 for score in scores[:5])
+    
+    def test_incremental_add(self):
+        """Test that documents added after a query are searchable."""
+        index = BM25Index()
+        index.add_document("first document about pricing")
+        assert index.search("tariffs", k=5) == []
+        
+        doc_id = index.add_document("second document about tariffs")
+        
+        assert index.search("tariffs", k=5)[0][0] == doc_id
+        assert len(index) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
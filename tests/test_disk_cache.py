@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test script for the SQLite-backed disk cache.
+"""
+
+import time
+
+import pytest
+
+from src.disk_cache import DiskCache
+
+
+class TestDiskCache:
+    """Test cases for the DiskCache class."""
+    
+    def test_set_and_get(self, tmp_path):
+        """Test storing and reading back a value."""
+        cache = DiskCache(tmp_path / "cache.sqlite3", max_bytes=1024)
+        
+        cache.set("key", b"value", tag="v1")
+        entry = cache.get("key")
+        
+        assert entry.value == b"value"
+        assert entry.tag == "v1"
+        assert entry.is_fresh
+        assert cache.get("missing") is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+    
+    def test_persists_across_instances(self, tmp_path):
+        """Test that entries survive reopening the database."""
+        DiskCache(tmp_path / "cache.sqlite3", max_bytes=1024).set("key", b"value")
+        
+        assert DiskCache(tmp_path / "cache.sqlite3", max_bytes=1024).get("key").value == b"value"
+    
+    def test_ttl_expiry(self, tmp_path):
+        """Test that expired entries are misses unless stale entries are allowed."""
+        cache = DiskCache(tmp_path / "cache.sqlite3", max_bytes=1024)
+        cache.set("key", b"value", ttl=-1)
+        
+        assert cache.get("key") is None
+        stale = cache.get("key", allow_stale=True)
+        assert stale.value == b"value"
+        assert not stale.is_fresh
+        
+        cache.touch("key", ttl=60)
+        assert cache.get("key").is_fresh
+    
+    def test_lru_eviction(self, tmp_path):
+        """Test that the least recently used entries are evicted when the cache is full."""
+        cache = DiskCache(tmp_path / "cache.sqlite3", max_bytes=30)
+        cache.set("a", b"x" * 10)
+        time.sleep(0.01)
+        cache.set("b", b"x" * 10)
+        time.sleep(0.01)
+        cache.get("a")  # "b" is now the least recently used
+        time.sleep(0.01)
+        cache.set("c", b"x" * 15)
+        
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+        assert cache.stats()["bytes"] <= 30
+        assert cache.stats()["evictions"] == 1
+    
+    def test_invalidate_tag(self, tmp_path):
+        """Test bulk invalidation by tag."""
+        cache = DiskCache(tmp_path / "cache.sqlite3", max_bytes=1024)
+        cache.set("old", b"1", tag="v1")
+        cache.set("new", b"2", tag="v2")
+        
+        assert cache.invalidate_tag(keep_tag="v2") == 1
+        assert cache.get("old") is None
+        assert cache.get("new") is not None
+        
+        assert cache.invalidate_tag("v2") == 1
+        assert cache.get("new") is None
+    
+    async def test_async_wrappers(self, tmp_path):
+        """Test the async wrappers."""
+        cache = DiskCache(tmp_path / "cache.sqlite3", max_bytes=1024)
+        
+        await cache.aset("key", b"value")
+        
+        assert (await cache.aget("key")).value == b"value"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Test script for the global LLM scheduler.
+"""
+
+import asyncio
+import time
+from unittest.mock import Mock
+
+import httpx
+import openai
+import pytest
+
+from src.llm_scheduler import LLMScheduler, Priority, ScheduledModel, TokenBucket
+from src.tracing import TRACER
+
+
+def rate_limit_error(retry_after=None):
+    """Build the error the OpenAI client raises on a 429."""
+    headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+    request = httpx.Request("POST", "https://api.openai.com/v1/responses")
+    response = httpx.Response(429, headers=headers, request=request)
+    return openai.RateLimitError("Rate limited", response=response, body=None)
+
+
+class TestTokenBucket:
+    """Test cases for the TokenBucket class."""
+    
+    def test_delay_when_empty(self):
+        """Test that an empty bucket reports how long until it refills."""
+        bucket = TokenBucket(per_minute=60)
+        bucket.consume(60)
+        
+        assert bucket.delay(1) == pytest.approx(1.0, abs=0.05)
+    
+    def test_oversized_request_waits_for_full_bucket(self):
+        """Test that a request above the capacity is admitted on a full bucket."""
+        bucket = TokenBucket(per_minute=100)
+        
+        assert bucket.delay(500) == 0
+    
+    def test_disabled(self):
+        """Test that a non-positive rate disables the limit."""
+        bucket = TokenBucket(per_minute=0)
+        bucket.consume(1000)
+        
+        assert bucket.delay(1000) == 0
+
+
+class TestLLMScheduler:
+    """Test cases for the LLMScheduler class."""
+    
+    async def test_priority_order(self):
+        """Test that queued calls are admitted highest priority first."""
+        scheduler = LLMScheduler(max_concurrency=1, requests_per_minute=0, tokens_per_minute=0)
+        order = []
+        release = asyncio.Event()
+        
+        async def blocker():
+            await release.wait()
+        
+        async def call(name):
+            order.append(name)
+        
+        first = asyncio.create_task(scheduler.submit(blocker))
+        await asyncio.sleep(0)
+        queued = [
+            asyncio.create_task(scheduler.submit(lambda: call("background"), Priority.BACKGROUND)),
+            asyncio.create_task(scheduler.submit(lambda: call("default"), Priority.DEFAULT)),
+            asyncio.create_task(scheduler.submit(lambda: call("interactive"), Priority.INTERACTIVE)),
+        ]
+        await asyncio.sleep(0.01)
+        release.set()
+        await asyncio.gather(first, *queued)
+        
+        assert order == ["interactive", "default", "background"]
+    
+    async def test_concurrency_limit(self):
+        """Test that no more than max_concurrency calls run at once."""
+        scheduler = LLMScheduler(max_concurrency=2, requests_per_minute=0, tokens_per_minute=0)
+        running = 0
+        peak = 0
+        
+        async def call():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+        
+        await asyncio.gather(*(scheduler.submit(call) for _ in range(6)))
+        
+        assert peak == 2
+    
+    async def test_requests_per_minute(self):
+        """Test that calls beyond the request budget wait for the bucket to refill."""
+        scheduler = LLMScheduler(requests_per_minute=600, tokens_per_minute=0)
+        scheduler._requests.consume(600)
+        
+        start = time.monotonic()
+        await scheduler.submit(lambda: asyncio.sleep(0))
+        
+        assert time.monotonic() - start >= 0.09
+    
+    async def test_retries_rate_limited_call(self):
+        """Test that a 429 pauses admission, honours Retry-After and retries the call."""
+        scheduler = LLMScheduler(requests_per_minute=0, tokens_per_minute=0, max_retries=2)
+        attempts = 0
+        
+        async def call():
+            nonlocal attempts
+            attempts += 1
+            if attempts == 1:
+                raise rate_limit_error(retry_after=0.1)
+            return "ok"
+        
+        start = time.monotonic()
+        result = await scheduler.submit(call)
+        
+        assert result == "ok"
+        assert attempts == 2
+        assert time.monotonic() - start >= 0.09
+    
+    async def test_gives_up_after_max_retries(self):
+        """Test that a call that keeps getting rate limited raises."""
+        scheduler = LLMScheduler(requests_per_minute=0, tokens_per_minute=0, max_retries=1, backoff_base=0.01)
+        
+        async def call():
+            raise rate_limit_error()
+        
+        with pytest.raises(openai.RateLimitError):
+            await scheduler.submit(call)
+    
+    async def test_retries_transient_errors(self):
+        """Test that timeouts and 5xx responses are retried with backoff, without pausing other calls."""
+        scheduler = LLMScheduler(requests_per_minute=0, tokens_per_minute=0, max_retries=2, backoff_base=0.01)
+        request = httpx.Request("POST", "https://api.openai.com/v1/responses")
+        errors = [
+            openai.APITimeoutError(request=request),
+            openai.InternalServerError("Server error", response=httpx.Response(500, request=request), body=None),
+        ]
+        attempts = 0
+        
+        async def call():
+            nonlocal attempts
+            attempts += 1
+            if errors:
+                raise errors.pop(0)
+            return "ok"
+        
+        assert await scheduler.submit(call) == "ok"
+        assert attempts == 3
+        assert scheduler._paused_until == 0.0
+    
+    def test_default_client_does_not_retry(self):
+        """Test that the OpenAI client leaves retrying to the scheduler, so retries don't stack."""
+        scheduler = LLMScheduler()
+        scheduler.use_openai_client(openai.AsyncOpenAI(api_key="test", max_retries=5))
+        
+        model = scheduler.provider.get_model("gpt-4.1")
+        
+        assert model._client.max_retries == 0
+    
+    async def test_reconciles_token_usage(self):
+        """Test that the token bucket is corrected with the reported usage."""
+        scheduler = LLMScheduler(requests_per_minute=0, tokens_per_minute=1000)
+        
+        async def call():
+            return 100
+        
+        await scheduler.submit(call, estimated_tokens=500, usage_of=lambda tokens: tokens)
+        
+        assert scheduler._tokens._level == pytest.approx(900, abs=5)
+
+
+class TestScheduledModel:
+    """Test cases for the ScheduledModel wrapper."""
+    
+    async def test_get_response_goes_through_scheduler(self):
+        """Test that a wrapped model request is admitted and its usage reconciled."""
+        scheduler = LLMScheduler(requests_per_minute=10, tokens_per_minute=0)
+        response = Mock(usage=Mock(total_tokens=42))
+        inner = Mock()
+        
+        async def get_response(*args, **kwargs):
+            return response
+        
+        inner.get_response = get_response
+        model = ScheduledModel(inner, scheduler, Priority.DEFAULT)
+        
+        result = await model.get_response("instructions", "input", None, [], None, [], None, previous_response_id=None, conversation_id=None, prompt=None)
+        
+        assert result is response
+        assert scheduler._requests._level == pytest.approx(9, abs=0.01)
+    
+    async def test_stream_response_retries_before_first_event(self):
+        """Test that a stream rate limited before its first event is reopened."""
+        scheduler = LLMScheduler(requests_per_minute=0, tokens_per_minute=0, backoff_base=0.01)
+        attempts = 0
+        inner = Mock()
+        
+        async def stream_response(*args, **kwargs):
+            nonlocal attempts
+            attempts += 1
+            if attempts == 1:
+                raise rate_limit_error()
+            yield Mock(type="response.output_text.delta")
+            yield Mock(type="response.completed", response=Mock(usage=Mock(total_tokens=10)))
+        
+        inner.stream_response = stream_response
+        model = ScheduledModel(inner, scheduler, Priority.INTERACTIVE)
+        
+        events = [event async for event in model.stream_response("instructions", "input")]
+        
+        assert attempts == 2
+        assert [event.type for event in events] == ["response.output_text.delta", "response.completed"]
+    
+    async def test_model_calls_are_traced(self, monkeypatch):
+        """Test that model requests and streams record spans with their token usage and time to first token."""
+        monkeypatch.setattr(TRACER, "enabled", True)
+        TRACER.clear()
+        scheduler = LLMScheduler(requests_per_minute=0, tokens_per_minute=0)
+        usage = Mock(input_tokens=120, output_tokens=30, total_tokens=150)
+        inner = Mock()
+        
+        async def get_response(*args, **kwargs):
+            return Mock(usage=usage)
+        
+        async def stream_response(*args, **kwargs):
+            yield Mock(type="response.output_text.delta")
+            yield Mock(type="response.completed", response=Mock(usage=usage))
+        
+        inner.get_response = get_response
+        inner.stream_response = stream_response
+        model = ScheduledModel(inner, scheduler, Priority.BACKGROUND, "gpt-4.1")
+        
+        with TRACER.span("summarize"):
+            await model.get_response("instructions", "input")
+            [event async for event in model.stream_response("instructions", "input")]
+        
+        spans = {span.name: span for span in TRACER.spans()}
+        TRACER.clear()
+        assert spans["llm"].attributes["model"] == "gpt-4.1"
+        assert spans["llm"].attributes["priority"] == "BACKGROUND"
+        assert spans["llm"].attributes["queued"] >= 0
+        assert spans["llm.stream"].attributes["first_token"] >= 0
+        assert spans["llm.stream"].parent is spans["summarize"]
+        assert spans["summarize"].attributes == {"input_tokens": 240, "output_tokens": 60}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
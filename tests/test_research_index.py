@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test script for the retrieval index over the research dump.
+"""
+
+import pytest
+
+from src.agent_memory import AGENT_MEMORY
+from src.research_index import ResearchIndex, ResearchSnippet
+
+MARKET_QUESTION = "What is the market size for phone cases?"
+COST_QUESTION = "What are the costs of selling on Amazon?"
+
+MARKET_RESULTS = [
+    (("Phone Case Market Report", "https://example.com/market"), "The global phone case market reached $25 billion in 2023."),
+    (("Accessory Trends", "https://example.com/trends"), "MagSafe accessories are the fastest growing segment."),
+]
+COST_RESULTS = [
+    (("Amazon Seller Fees", "https://example.com/fees"), "FBA fulfillment fees for small items average $3.22 per unit."),
+]
+
+
+class TestResearchIndex:
+    """Test cases for the ResearchIndex class."""
+    
+    def test_search_returns_relevant_snippets(self):
+        """Test that a search returns only the snippets matching the query, best first."""
+        index = ResearchIndex()
+        index.add(MARKET_QUESTION, MARKET_RESULTS)
+        index.add(COST_QUESTION, COST_RESULTS)
+        
+        results = index.search("Amazon FBA fees", k=5)
+        
+        assert results == [ResearchSnippet(COST_QUESTION, "Amazon Seller Fees", "https://example.com/fees", COST_RESULTS[0][1])]
+    
+    def test_research_question_is_searchable(self):
+        """Test that snippets are found through the question they answer."""
+        index = ResearchIndex()
+        index.add(MARKET_QUESTION, MARKET_RESULTS)
+        
+        assert {snippet.url for snippet in index.search("market size", k=5)} == {
+            "https://example.com/market",
+            "https://example.com/trends",
+        }
+    
+    def test_duplicates_and_clear(self):
+        """Test that re-adding the same results doesn't duplicate them, and clear empties the index."""
+        index = ResearchIndex()
+        index.add(MARKET_QUESTION, MARKET_RESULTS)
+        index.add(MARKET_QUESTION, MARKET_RESULTS)
+        assert len(index) == 2
+        
+        index.clear()
+        
+        assert len(index) == 0
+        assert index.search("market", k=5) == []
+
+
+async def test_agent_memory_indexes_research_dump():
+    """Test that AgentMemory keeps the index in sync with the research dump."""
+    await AGENT_MEMORY.clear_research_dump()
+    try:
+        await AGENT_MEMORY.add_to_research_dump(MARKET_QUESTION, MARKET_RESULTS)
+        await AGENT_MEMORY.add_to_research_dump(COST_QUESTION, COST_RESULTS)
+        
+        results = await AGENT_MEMORY.search_research_dump("global phone case market", k=1)
+        assert [snippet.url for snippet in results] == ["https://example.com/market"]
+        
+        await AGENT_MEMORY.clear_research_dump()
+        assert await AGENT_MEMORY.search_research_dump("market") == []
+    finally:
+        await AGENT_MEMORY.clear_research_dump()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test script for the durable research store and restoring session memory from it.
+"""
+
+import sqlite3
+
+import pytest
+
+from src.agent_memory import AgentMemory
+from src.research_store import ResearchStore
+
+MARKET_QUESTION = "What is the market size for eco-friendly phone cases?"
+COST_QUESTION = "What are the costs of selling phone cases on Amazon?"
+
+
+@pytest.fixture
+def store(tmp_path):
+    """A research store in a temporary database."""
+    store = ResearchStore(tmp_path / "research.sqlite3")
+    yield store
+    store.close()
+
+
+def test_round_trip(store):
+    """Test that the plan, dump, report and state of a session are stored and loaded in order."""
+    assert store.load("session-a") is None
+    
+    store.save_plan("session-a", "The plan")
+    store.add_to_dump("session-a", MARKET_QUESTION, [(("Market Report", "https://example.com/market"), "$25B in 2023.")])
+    store.add_to_dump("session-a", COST_QUESTION, [(("Seller Fees", "https://example.com/fees"), "$3.22 per unit.")])
+    store.add_to_dump("session-a", MARKET_QUESTION, [(("Shared Study", "https://example.com/shared"), "12% growth.")])
+    store.add_to_dump("session-a", "Unanswered question", [])
+    store.save_report("session-a", "The report", "reports/report.md")
+    store.save_state("session-a", {"plan_generated": True})
+    
+    stored = store.load("session-a")
+    assert stored.research_plan == "The plan"
+    assert list(stored.research_dump) == [MARKET_QUESTION, COST_QUESTION, "Unanswered question"]
+    assert stored.research_dump[MARKET_QUESTION] == [
+        (("Market Report", "https://example.com/market"), "$25B in 2023."),
+        (("Shared Study", "https://example.com/shared"), "12% growth."),
+    ]
+    assert stored.research_dump["Unanswered question"] == []
+    assert (stored.report, stored.report_path) == ("The report", "reports/report.md")
+    assert stored.state == {"plan_generated": True}
+
+
+def test_sessions_share_sources_but_not_dumps(store):
+    """Test that sources are stored once across sessions while dumps stay per session."""
+    entry = (("Market Report", "https://example.com/market"), "$25B in 2023.")
+    store.add_to_dump("session-a", MARKET_QUESTION, [entry])
+    store.add_to_dump("session-b", MARKET_QUESTION, [entry])
+    store.clear_dump("session-a")
+    
+    assert store.load("session-a").research_dump == {}
+    assert store.load("session-b").research_dump == {MARKET_QUESTION: [entry]}
+    
+    with sqlite3.connect(str(store.path)) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM research_sources").fetchone() == (1,)
+        assert conn.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    
+    store.delete_session("session-b")
+    assert store.load("session-b") is None
+
+
+def test_checkpoints_until_question_is_complete(store):
+    """Test that a question's checkpoint is stored until its results are added to the dump."""
+    entry = (("Market Report", "https://example.com/market"), "$25B in 2023.")
+    store.save_checkpoint_queries("session-a", MARKET_QUESTION, ["market size", "market growth"])
+    store.save_checkpoint_source("session-a", MARKET_QUESTION, "market size", entry)
+    
+    stored = store.load("session-a")
+    assert stored.research_dump == {}
+    assert stored.checkpoint_queries == {MARKET_QUESTION: ["market size", "market growth"]}
+    assert stored.checkpoint_sources == {MARKET_QUESTION: {("market size", "https://example.com/market"): entry}}
+    
+    store.add_to_dump("session-a", MARKET_QUESTION, [entry])
+    stored = store.load("session-a")
+    assert stored.checkpoint_queries == {} and stored.checkpoint_sources == {}
+
+
+async def test_memory_survives_restart(tmp_path):
+    """Test that a session's memory is restored from the store by a new process."""
+    store = ResearchStore(tmp_path / "research.sqlite3")
+    memory = AgentMemory("session-a", store)
+    await memory.add_items([{"role": "user", "content": "I sell phone cases"}])
+    await memory.store_research_plan("The plan")
+    await memory.add_to_research_dump(MARKET_QUESTION, [(("Market Report", "https://example.com/market"), "The market reached $25B.")])
+    await memory.store_report("The report", "reports/report.md")
+    await memory.checkpoint_queries(COST_QUESTION, ["amazon fees"])
+    await memory.checkpoint_source(COST_QUESTION, "amazon fees", (("Seller Fees", "https://example.com/fees"), "$3.22 per unit."))
+    memory.set_state("plan_generated", True)
+    memory.session.close()
+    store.close()
+    
+    # A new store and memory for the same session, as after a restart
+    store = ResearchStore(tmp_path / "research.sqlite3")
+    restored = AgentMemory("session-a", store)
+    try:
+        assert restored.is_persistent
+        assert await restored.get_research_plan() == "The plan"
+        assert await restored.get_report() == "The report"
+        assert await restored.get_report_path() == "reports/report.md"
+        assert restored.plan_generated and not restored.plan_finalized
+        assert await restored.get_checkpointed_queries(COST_QUESTION) == ["amazon fees"]
+        assert await restored.get_checkpointed_source(COST_QUESTION, "amazon fees", "https://example.com/fees") is not None
+        assert not await restored.is_question_researched(COST_QUESTION)
+        assert [item["content"] for item in await restored.get_items()] == ["I sell phone cases"]
+        
+        # The retrieval index is rebuilt from the restored dump
+        snippets = await restored.search_research_dump("market size", k=1)
+        assert snippets[0].url == "https://example.com/market"
+        
+        await restored.clear_research_dump()
+        assert store.load("session-a").research_dump == {}
+    finally:
+        restored.session.close()
+        store.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
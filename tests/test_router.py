@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test script for the local router that picks the agent of each user turn.
+"""
+
+import pytest
+
+from src.agent_memory import close_agent_memory
+from src.manager import Manager
+from src.router import Route, is_plan_approval, is_plan_revision, route_turn
+
+
+class FakeState:
+    """Workflow flags for routing tests."""
+    
+    def __init__(self, **flags):
+        self.flags = flags
+    
+    def get_state(self, state: str) -> bool:
+        return self.flags.get(state, False)
+
+
+PLAN_REVIEW = FakeState(has_enough_context=True, plan_generated=True)
+
+
+def test_planner_before_plan_is_generated():
+    """Test that business context and plan writing go straight to the Planner Agent, anything else to the coordinator."""
+    assert route_turn("I want to sell eco-friendly phone cases", FakeState()) is Route.PLANNER
+    assert route_turn("yes, write the plan", FakeState(has_enough_context=True)) is Route.PLANNER
+    assert route_turn("go ahead", FakeState(has_enough_context=True)) is Route.PLANNER
+    
+    assert route_turn("What's the weather like?", FakeState()) is Route.COORDINATOR
+    assert route_turn("go ahead", FakeState()) is Route.COORDINATOR
+
+
+@pytest.mark.parametrize("reply", ["yes", "Looks good!", "go ahead", "Let's start the research", "ok proceed"])
+def test_plan_approval_goes_to_research(reply):
+    """Test that a clear approval of the plan goes to the Research Agent."""
+    assert is_plan_approval(reply)
+    assert route_turn(reply, PLAN_REVIEW) is Route.RESEARCH
+
+
+@pytest.mark.parametrize("reply", ["No, add a pricing section", "Yes, but focus on Europe instead", "Can you remove the legal research?"])
+def test_plan_revision_goes_to_planner(reply):
+    """Test that a request to change the plan goes to the Planner Agent."""
+    assert is_plan_revision(reply)
+    assert route_turn(reply, PLAN_REVIEW) is Route.PLANNER
+
+
+@pytest.mark.parametrize("reply", ["What's the weather like?", "hmm", "Is this plan any good?"])
+def test_ambiguous_plan_review_goes_to_coordinator(reply):
+    """Test that replies that neither approve nor revise the plan go to the Coordinator Agent."""
+    assert route_turn(reply, PLAN_REVIEW) is Route.COORDINATOR
+
+
+def test_research_and_follow_up_stages():
+    """Test routing once the plan is finalized and once the report is generated."""
+    finalized = FakeState(has_enough_context=True, plan_generated=True, plan_finalized=True)
+    for reply in ["start", "Continue the research", "ok"]:
+        assert route_turn(reply, finalized) is Route.RESEARCH
+    for reply in ["What's the weather like?", "Actually, add a pricing question"]:
+        assert route_turn(reply, finalized) is Route.COORDINATOR
+    
+    reported = FakeState(has_enough_context=True, plan_generated=True, plan_finalized=True, report_generated=True)
+    assert route_turn("Can you expand on the pricing?", reported) is Route.COORDINATOR
+
+
+async def test_manager_finalizes_plan_when_routing_to_research():
+    """Test that the manager makes the coordinator's transition itself when routing an approval."""
+    manager = Manager("router-test")
+    for state in ("has_enough_context", "plan_generated"):
+        manager.memory.set_state(state, True)
+    try:
+        agent = await manager._select_agent("Looks good, go ahead")
+        assert agent.name == "Research Agent"
+        assert manager.memory.plan_finalized
+    finally:
+        close_agent_memory("router-test")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
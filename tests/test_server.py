@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Test script for the HTTP service: job queue, workers, progress events and endpoints.
+"""
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from src.agent_memory import close_agent_memory
+from src.server import ResearchService, SessionChannel, create_app
+
+
+@pytest.fixture
+def fake_agents():
+    """Replace the brief pipeline and chat turns, tracking how many jobs run at once and in what order."""
+    state = {"running": 0, "peak": 0, "order": [], "report_files": {}, "release": asyncio.Event()}
+
+    async def fake_research_brief(memory, brief, report_path, console=None):
+        state["order"].append(("brief", memory.session_id))
+        print(f"🔍 Researching {brief['topic']}")
+        await memory.store_report(f"# {brief['topic']}", str(report_path))
+        memory.set_state("report_generated", True)
+        return report_path
+
+    async def fake_handle_turn(self, user_input, timeout=1800):
+        state["order"].append(("turn", user_input))
+        state["report_files"][user_input] = self.memory.report_file
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+        print(f"💬 Thinking about {user_input}")
+        await state["release"].wait()
+        state["running"] -= 1
+        if user_input == "fail":
+            raise RuntimeError("model is down")
+        return f"Answer to {user_input}"
+
+    with patch("src.server.research_brief", side_effect=fake_research_brief), \
+         patch("src.server.Manager.handle_turn", fake_handle_turn):
+        yield state
+
+
+@asynccontextmanager
+async def running_service(reports_dir, max_workers=2):
+    """Start a service and yield it with an HTTP client for its app."""
+    service = ResearchService(max_workers=max_workers, reports_dir=reports_dir)
+    await service.start()
+    try:
+        transport = httpx.ASGITransport(app=create_app(service))
+        async with httpx.AsyncClient(transport=transport, base_url="http://service") as client:
+            yield service, client
+    finally:
+        await service.stop()
+        for session_id in {job.session_id for job in service.jobs.values()}:
+            close_agent_memory(session_id)
+
+
+async def wait_for(service, job_id):
+    """Wait until a job finishes."""
+    while service.jobs[job_id].to_dict()["status"] not in ("done", "failed"):
+        await asyncio.sleep(0.01)
+
+
+def parse_sse(text):
+    """Parse a server-sent event stream into (event, data) pairs."""
+    events = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+async def test_brief_runs_and_its_report_is_served(fake_agents, tmp_path):
+    """Test that a submitted brief is researched in its own session, streams its progress and serves its report."""
+    async with running_service(tmp_path) as (service, client):
+        response = await client.post("/briefs", json={"topic": "Candles"})
+        assert response.status_code == 202
+        session_id, job_id = response.json()["session_id"], response.json()["job_id"]
+
+        events = parse_sse((await client.get(f"/jobs/{job_id}/events")).text)
+        assert [data["status"] for event, data in events if event == "job"] == ["queued", "running", "done"]
+        assert ("log", {"job_id": job_id, "line": "🔍 Researching Candles"}) in events
+
+        job = (await client.get(f"/jobs/{job_id}")).json()
+        assert job["output"] == str(tmp_path / f"{session_id}.md")
+
+        session = (await client.get(f"/sessions/{session_id}")).json()
+        assert session["state"]["report_generated"] is True
+        assert [job["job_id"] for job in session["jobs"]] == [job_id]
+
+        report = await client.get(f"/sessions/{session_id}/report")
+        assert report.status_code == 200
+        assert report.headers["content-type"].startswith("text/markdown")
+        assert report.text == "# Candles"
+
+
+async def test_turns_of_a_session_run_in_order_and_sessions_run_concurrently(tmp_path, fake_agents):
+    """Test that a session's turns run one at a time while other sessions share the workers up to the limit."""
+    async with running_service(tmp_path) as (service, client):
+        first = (await client.post("/sessions")).json()["session_id"]
+        second = (await client.post("/sessions")).json()["session_id"]
+        third = (await client.post("/sessions")).json()["session_id"]
+
+        jobs = [
+            (await client.post(f"/sessions/{session_id}/turns", json={"message": message})).json()["job_id"]
+            for session_id, message in [(first, "a1"), (first, "a2"), (second, "b1"), (third, "c1")]
+        ]
+        await asyncio.sleep(0.05)
+
+        # Two workers: the first turns of two sessions run, while a2 waits for a1 rather than holding a worker
+        assert fake_agents["order"] == [("turn", "a1"), ("turn", "b1")]
+        assert (await client.get(f"/jobs/{jobs[1]}")).json()["status"] == "queued"
+
+        fake_agents["release"].set()
+        for job_id in jobs:
+            await wait_for(service, job_id)
+
+        assert fake_agents["peak"] == 2
+        assert fake_agents["order"].index(("turn", "a2")) > fake_agents["order"].index(("turn", "a1"))
+        assert (await client.get(f"/jobs/{jobs[1]}")).json()["output"] == "Answer to a2"
+
+
+async def test_turns_are_queued_ahead_of_briefs(tmp_path, fake_agents):
+    """Test that a waiting chat turn runs before briefs that were queued earlier."""
+    async with running_service(tmp_path, max_workers=1) as (service, _):
+        fake_agents["release"].set()
+        blocker = service.submit_turn("busy", "first")
+        briefs = [service.submit_brief({"topic": f"Idea {number}"}) for number in range(2)]
+        turn = service.submit_turn("chat", "second")
+        for job in [blocker, *briefs, turn]:
+            await wait_for(service, job.id)
+
+    assert [kind for kind, _ in fake_agents["order"]] == ["turn", "turn", "brief", "brief"]
+
+
+async def test_failed_turn_is_reported(tmp_path, fake_agents):
+    """Test that a failing job is marked failed with its error, and the session keeps serving turns."""
+    async with running_service(tmp_path) as (service, client):
+        fake_agents["release"].set()
+        session_id = (await client.post("/sessions")).json()["session_id"]
+        failed = (await client.post(f"/sessions/{session_id}/turns", json={"message": "fail"})).json()["job_id"]
+        await wait_for(service, failed)
+        ok = (await client.post(f"/sessions/{session_id}/turns", json={"message": "hello"})).json()["job_id"]
+        await wait_for(service, ok)
+
+        assert (await client.get(f"/jobs/{failed}")).json()["error"] == "RuntimeError: model is down"
+        assert (await client.get(f"/jobs/{ok}")).json()["status"] == "done"
+        assert fake_agents["report_files"]["hello"] == tmp_path / f"{session_id}.md"
+
+
+async def test_bad_requests(tmp_path):
+    """Test the error responses for invalid bodies, unknown sessions and jobs, and missing reports."""
+    async with running_service(tmp_path) as (service, client):
+        assert (await client.post("/briefs", content="not json")).status_code == 400
+        assert (await client.post("/briefs", json=["a", "list"])).status_code == 400
+        assert (await client.post("/sessions/s1/turns", json={"text": "hi"})).status_code == 400
+        assert (await client.get("/jobs/missing")).status_code == 404
+        assert (await client.get("/jobs/missing/events")).status_code == 404
+        for path in ["/sessions/unknown", "/sessions/unknown/report", "/sessions/unknown/events"]:
+            assert (await client.get(path)).status_code == 404
+        assert (await client.post("/sessions/unknown/turns", json={"message": "hi"})).status_code == 404
+        assert "unknown" not in service._channels
+
+        session_id = (await client.post("/sessions")).json()["session_id"]
+        assert (await client.get(f"/sessions/{session_id}/report")).status_code == 404
+        close_agent_memory(session_id)
+
+
+async def test_idle_sessions_and_old_jobs_are_evicted(tmp_path, fake_agents):
+    """Test that only the most recent finished jobs are kept and idle sessions are unloaded with their jobs."""
+    service = ResearchService(max_workers=1, reports_dir=tmp_path, job_history=2, session_idle_seconds=0.05)
+    await service.start()
+    try:
+        fake_agents["release"].set()
+        jobs = [service.submit_turn("chat", f"turn {number}") for number in range(3)]
+        await wait_for(service, jobs[-1].id)
+        assert list(service.jobs) == [jobs[1].id, jobs[2].id]
+
+        busy = service.submit_turn("busy", "still running")
+        fake_agents["release"].clear()
+        busy_again = service.submit_turn("busy", "queued")
+        await asyncio.sleep(0.1)
+        assert service.evict_idle_sessions() == ["chat"]
+        assert not service.has_session("chat")
+        assert list(service.jobs) == [busy.id, busy_again.id]
+        assert service.has_session("busy")
+        fake_agents["release"].set()
+        await wait_for(service, busy_again.id)
+    finally:
+        await service.stop()
+        close_agent_memory("busy")
+
+
+async def test_channel_resumes_after_last_event_id():
+    """Test that subscribers get events after the last one they saw, including ones published later and from threads."""
+    channel = SessionChannel(asyncio.get_running_loop(), history=3)
+    for number in range(4):
+        channel.publish("log", {"line": str(number)})
+    channel.write("job", "partial ")
+    channel.write("job", "line\nnext")
+
+    events = channel.subscribe(after=2)
+    assert [await events.__anext__() for _ in range(2)] == [
+        (3, "log", {"line": "2"}),
+        (4, "log", {"line": "3"}),
+    ]
+    assert await events.__anext__() == (5, "log", {"job_id": "job", "line": "partial line"})
+
+    await asyncio.to_thread(channel.publish, "job", {"status": "done"})
+    assert await events.__anext__() == (6, "job", {"status": "done"})
+
+    channel.flush("job")
+    assert await events.__anext__() == (7, "log", {"job_id": "job", "line": "next"})
+
+    quiet = channel.subscribe(after=7, heartbeat=0.01)
+    assert await quiet.__anext__() is None
+    await events.aclose()
+    await quiet.aclose()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
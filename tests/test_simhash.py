@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test script for SimHash fingerprints and the near-duplicate index.
+"""
+
+import random
+
+import pytest
+
+from src.simhash import SimHashIndex, hamming_distance, simhash
+
+random.seed(7)
+ARTICLE = " ".join(f"word{random.randint(0, 3000)}" for _ in range(1500))
+
+
+class TestSimHash:
+    """Test cases for simhash."""
+    
+    def test_near_duplicates_are_close(self):
+        """Test that a syndicated copy with a different header/footer stays within a few bits."""
+        mirror = "Republished from Example News. " + ARTICLE + " All rights reserved. Subscribe for more."
+        
+        assert hamming_distance(simhash(ARTICLE), simhash(mirror)) <= 3
+    
+    def test_different_texts_are_far(self):
+        """Test that unrelated texts differ in many bits."""
+        other = " ".join(f"term{random.randint(0, 3000)}" for _ in range(1500))
+        
+        assert hamming_distance(simhash(ARTICLE), simhash(other)) > 10
+    
+    def test_short_text_has_no_fingerprint(self):
+        """Test that texts too short to fingerprint reliably return None."""
+        assert simhash("Page not found.") is None
+
+
+class TestSimHashIndex:
+    """Test cases for the SimHashIndex class."""
+    
+    def test_finds_within_distance(self):
+        """Test that fingerprints within max_distance are found and farther ones are not."""
+        index = SimHashIndex(max_distance=3)
+        fingerprint = simhash(ARTICLE)
+        index.add(fingerprint, "original")
+        
+        assert index.find(fingerprint ^ 0b101) == "original"
+        assert index.find(fingerprint ^ (1 | 1 << 20 | 1 << 40 | 1 << 60)) is None
+    
+    def test_returns_closest(self):
+        """Test that the closest indexed fingerprint wins."""
+        index = SimHashIndex(max_distance=3)
+        index.add(0b111, "far")
+        index.add(0b001, "near")
+        
+        assert index.find(0) == "near"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test script for the token-aware text chunker.
+"""
+
+import pytest
+
+from src.text_chunker import chunk_text, count_tokens
+
+
+class TestChunkText:
+    """Test cases for chunk_text."""
+    
+    def test_short_text_is_one_chunk(self):
+        """Test that a text within budget is returned unchanged."""
+        text = "First paragraph.\nSecond paragraph."
+        
+        assert chunk_text(text, max_tokens=100) == [text]
+    
+    def test_chunks_respect_budget_and_paragraphs(self):
+        """Test that chunks fit the budget and paragraphs are not split when they fit."""
+        paragraphs = [f"Paragraph {i} talks about the market for phone cases in detail." for i in range(40)]
+        text = "\n".join(paragraphs)
+        
+        chunks = chunk_text(text, max_tokens=60)
+        
+        assert len(chunks) > 1
+        assert all(count_tokens(chunk) <= 60 for chunk in chunks)
+        assert [p for chunk in chunks for p in chunk.split("\n")] == paragraphs
+    
+    def test_long_paragraph_splits_on_sentences(self):
+        """Test that an oversized paragraph is split on sentence boundaries."""
+        sentences = [f"Sentence number {i} describes one fact about pricing." for i in range(30)]
+        text = " ".join(sentences)
+        
+        chunks = chunk_text(text, max_tokens=50)
+        
+        assert len(chunks) > 1
+        assert all(count_tokens(chunk) <= 50 for chunk in chunks)
+        assert all(chunk.endswith(".") for chunk in chunks)
+        assert " ".join(chunks) == text
+    
+    def test_unbroken_text_splits_on_tokens(self):
+        """Test that text without any boundaries is still split within budget."""
+        text = "x" * 2000
+        
+        chunks = chunk_text(text, max_tokens=100)
+        
+        assert all(count_tokens(chunk) <= 100 for chunk in chunks)
+        assert "".join(chunks) == text
+    
+    def test_blank_text(self):
+        """Test that blank text yields no chunks."""
+        assert chunk_text("  \n\n ", max_tokens=10) == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test script for the tracing spans and their JSON lines and Chrome trace exports.
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from src.tools.web_scraper.web_scraper import WebScraper
+from src.tracing import NOOP_SPAN, TRACER, Tracer, format_stage_stats, load_trace, main, stage_stats
+
+
+@pytest.fixture
+def tracer():
+    """The process-wide tracer, switched on and emptied for the test."""
+    enabled = TRACER.enabled
+    TRACER.enabled = True
+    TRACER.clear()
+    yield TRACER
+    TRACER.enabled = enabled
+    TRACER.clear()
+
+
+def by_name(tracer):
+    """The finished spans of a tracer, by name."""
+    return {span.name: span for span in tracer.spans()}
+
+
+async def test_spans_nest_across_tasks_and_threads():
+    """Test that spans started by gathered tasks and worker threads are children of the span that started them."""
+    tracer = Tracer(enabled=True)
+
+    async def child(name):
+        with tracer.span(name):
+            await asyncio.sleep(0.01)
+
+    def blocking():
+        with tracer.span("thread"):
+            pass
+
+    with tracer.span("root", stage="research"):
+        await asyncio.gather(child("a"), child("b"))
+        await asyncio.to_thread(blocking)
+
+    spans = by_name(tracer)
+    assert spans["root"].parent is None
+    assert spans["root"].attributes == {"stage": "research"}
+    assert all(spans[name].parent is spans["root"] for name in ("a", "b", "thread"))
+    # Concurrent children run on their own tracks, so they render as separate rows
+    assert len({spans["root"].track, spans["a"].track, spans["b"].track}) == 3
+    assert spans["root"].duration >= spans["a"].duration >= 0.01
+
+
+async def test_tokens_roll_up_and_errors_are_recorded():
+    """Test that model tokens add up into parent spans and raised or handled errors mark their spans."""
+    tracer = Tracer(enabled=True)
+
+    with tracer.span("summarize") as stage:
+        for _ in range(2):
+            with tracer.span("llm") as llm:
+                llm.set(input_tokens=100, output_tokens=20)
+        stage.record_error(ValueError("handled"))
+
+    with pytest.raises(RuntimeError):
+        with tracer.span("fetch"):
+            raise RuntimeError("boom")
+
+    spans = by_name(tracer)
+    assert spans["summarize"].attributes == {"input_tokens": 200, "output_tokens": 40}
+    assert spans["summarize"].error == "ValueError: handled"
+    assert spans["fetch"].error == "RuntimeError: boom"
+
+
+def test_disabled_tracer_records_nothing():
+    """Test that spans are no-ops while tracing is off."""
+    tracer = Tracer(enabled=False)
+    with tracer.span("search") as span:
+        span.set(results=3)
+        span.add("input_tokens", 1)
+    assert span is NOOP_SPAN
+    assert tracer.start_span("llm.stream") is NOOP_SPAN
+    assert tracer.spans() == []
+
+
+async def test_export_jsonl_and_chrome_trace(tmp_path):
+    """Test that a trace exports as JSON lines and as Chrome trace events that can be summarized offline."""
+    tracer = Tracer(enabled=True)
+    with tracer.span("research"):
+        for url in ("https://a.example", "https://b.example"):
+            with tracer.span("fetch", url=url) as span:
+                span.set(bytes=1024)
+
+    jsonl_path, chrome_path = tracer.export(tmp_path)
+
+    records = load_trace(jsonl_path)
+    assert [record["name"] for record in records] == ["research", "fetch", "fetch"]
+    assert records[1]["parent_id"] == records[0]["span_id"]
+    assert records[1]["attributes"] == {"url": "https://a.example", "bytes": 1024}
+
+    chrome = json.loads(chrome_path.read_text())
+    complete = [event for event in chrome["traceEvents"] if event["ph"] == "X"]
+    assert [event["name"] for event in complete] == ["research", "fetch", "fetch"]
+    assert all(event["dur"] >= 0 and event["ts"] >= 0 for event in complete)
+    assert any(event["ph"] == "M" and event["name"] == "thread_name" for event in chrome["traceEvents"])
+
+    stats = stage_stats(records)
+    assert stats["fetch"]["count"] == 2
+    assert stats["research"]["total"] >= stats["fetch"]["p50"]
+
+
+def test_stage_stats_compare_against_baseline(tmp_path, capsys):
+    """Test that stage stats are compared against a baseline trace, from the command line too."""
+
+    def record(name, duration, error=None):
+        return {"name": name, "span_id": 1, "parent_id": None, "track": "main", "start": 0.0,
+                "duration": duration, "timestamp": 0.0, "error": error, "attributes": {}}
+
+    baseline = [record("fetch", 0.1), record("fetch", 0.1)]
+    current = [record("fetch", 0.2), record("fetch", 0.2, "TimeoutError: slow"), record("parse", 0.05)]
+
+    stats = stage_stats(current)
+    assert stats["fetch"]["errors"] == 1
+    table = format_stage_stats(stats, stage_stats(baseline))
+    fetch_row = next(line for line in table.splitlines() if line.startswith("fetch"))
+    assert fetch_row.split()[-2:] == ["+100%", "+100%"]
+    assert next(line for line in table.splitlines() if line.startswith("parse")).endswith("new")
+
+    for path, records in (("current.jsonl", current), ("baseline.jsonl", baseline)):
+        (tmp_path / path).write_text("\n".join(json.dumps(record) for record in records))
+    assert main([str(tmp_path / "current.jsonl"), str(tmp_path / "baseline.jsonl")]) == 0
+    assert "+100%" in capsys.readouterr().out
+
+
+class FakeEngine:
+    """Fetch engine that serves one HTML page."""
+
+    async def fetch(self, url, timeout=10, headers=None):
+        html = b"<html><head><title>Candles</title></head><body><main><p>Soy wax sells.</p></main></body></html>"
+        return httpx.Response(200, content=html, request=httpx.Request("GET", url))
+
+
+async def test_scrape_records_fetch_and_parse_spans(tracer):
+    """Test that scraping a page records its fetch and parse stages with their sizes."""
+    result = await WebScraper(engine=FakeEngine()).scrape_url("https://candles.example/guide")
+    assert result == ("Candles", "Soy wax sells.")
+
+    spans = by_name(tracer)
+    assert spans["scrape"].attributes["cache"] == "off"
+    assert spans["fetch"].parent is spans["scrape"]
+    assert spans["fetch"].attributes["status"] == 200
+    assert spans["fetch"].attributes["bytes"] > 0
+    assert spans["parse"].parent is spans["scrape"]
+    assert spans["parse"].attributes["chars"] == len("Soy wax sells.")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
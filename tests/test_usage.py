@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test script for the usage ledger: tokens and estimated cost per session, research question, agent and model.
+"""
+
+import asyncio
+
+import pytest
+from agents import Agent
+from agents.items import ModelResponse
+from agents.models.interface import Model, ModelProvider
+from agents.usage import InputTokensDetails, OutputTokensDetails, Usage
+from openai.types.responses import ResponseOutputMessage, ResponseOutputText
+
+from src.agent_memory import AgentMemory
+from src.llm_scheduler import LLMScheduler
+from src.research_store import ResearchStore
+from src.usage import USAGE_LEDGER, TokenUsage, UsageKey, UsageLedger, estimate_cost, format_usage, usage_scope
+
+
+@pytest.fixture(autouse=True)
+def ledger():
+    """The process-wide ledger, emptied for the test."""
+    USAGE_LEDGER.clear()
+    yield USAGE_LEDGER
+    USAGE_LEDGER.clear()
+
+
+class FakeModel(Model):
+    """Model that answers every request with the same text and token usage."""
+
+    async def get_response(self, *args, **kwargs):
+        message = ResponseOutputMessage(
+            id="msg", type="message", role="assistant", status="completed",
+            content=[ResponseOutputText(type="output_text", text="Done", annotations=[])],
+        )
+        usage = Usage(
+            requests=1, input_tokens=1000, output_tokens=200, total_tokens=1200,
+            input_tokens_details=InputTokensDetails(cached_tokens=400, cache_write_tokens=0),
+            output_tokens_details=OutputTokensDetails(reasoning_tokens=0),
+        )
+        return ModelResponse(output=[message], usage=usage, response_id=None)
+
+    def stream_response(self, *args, **kwargs):
+        raise NotImplementedError
+
+
+class FakeProvider(ModelProvider):
+    def get_model(self, model_name):
+        return FakeModel()
+
+
+def test_estimate_cost():
+    """Test that cost is priced per model, with cached input at its discount and snapshots priced as their base model."""
+    assert estimate_cost("gpt-4.1", 1_000_000, 0, 1_000_000) == pytest.approx(10.0)
+    assert estimate_cost("gpt-4.1", 1_000_000, 1_000_000, 0) == pytest.approx(0.5)
+    assert estimate_cost("gpt-4.1-mini-2025-04-14", 1_000_000, 0, 0) == pytest.approx(0.4)
+    assert estimate_cost("unknown-model", 1_000_000, 0, 1_000_000) == 0.0
+
+
+def test_ledger_groups_by_dimensions():
+    """Test that the ledger aggregates usage by any combination of dimensions, per session or overall."""
+    ledger = UsageLedger()
+    ledger.record(UsageKey("s1", "Market size?", "Summarizer", "gpt-4.1-mini"), TokenUsage(1, 100, 0, 10, 0.5), persist=False)
+    ledger.record(UsageKey("s1", "Market size?", "Summarizer", "gpt-4.1-mini"), TokenUsage(1, 100, 0, 10, 0.5), persist=False)
+    ledger.record(UsageKey("s1", "Costs?", "Query Writer", "gpt-4.1"), TokenUsage(1, 50, 0, 5, 2.0), persist=False)
+    ledger.record(UsageKey("s2", "", "Report Writer", "gpt-4.1"), TokenUsage(1, 10, 0, 1, 1.0), persist=False)
+
+    by_question = ledger.summarize(("question",), session_id="s1")
+    assert by_question[("Market size?",)].requests == 2
+    assert by_question[("Market size?",)].total_tokens == 220
+    assert by_question[("Costs?",)].cost == pytest.approx(2.0)
+
+    by_model = ledger.summarize(("model",))
+    assert by_model[("gpt-4.1",)].cost == pytest.approx(3.0)
+    assert ledger.total("s2").input_tokens == 10
+    assert ledger.total().requests == 4
+
+    table = format_usage(ledger.summarize(("agent", "model")), ("agent", "model")).splitlines()
+    assert table[1].startswith("Query Writer")
+    with pytest.raises(ValueError):
+        ledger.summarize(("tool",))
+
+
+async def test_runs_are_attributed_to_their_session_question_and_agent(tmp_path, monkeypatch):
+    """Test that the scheduler's runs report each model response with the session, question and agent that made it."""
+    store = ResearchStore(tmp_path / "research.sqlite3")
+    monkeypatch.setattr("src.usage.get_research_store", lambda: store)
+    scheduler = LLMScheduler(provider=FakeProvider())
+    memory = AgentMemory("session-u", store)
+    summarizer = Agent(name="Summarizer", instructions="Summarize", model="gpt-4.1-mini")
+    planner = Agent(name="Planner", instructions="Plan", model="gpt-4.1")
+
+    try:
+        # Runs inside a research question's scope, and concurrent runs started there
+        with usage_scope(session_id="session-u"), usage_scope(question="Market size?"):
+            await asyncio.gather(*(scheduler.run(summarizer, "Summarize this") for _ in range(2)))
+        # A run given the session's memory as its context
+        await scheduler.run(planner, "Write the plan", context=memory)
+
+        usage = await memory.get_usage(("question", "agent", "model"))
+        assert set(usage) == {("Market size?", "Summarizer", "gpt-4.1-mini"), ("", "Planner", "gpt-4.1")}
+        summaries = usage[("Market size?", "Summarizer", "gpt-4.1-mini")]
+        assert (summaries.requests, summaries.input_tokens, summaries.cached_tokens, summaries.output_tokens) == (2, 2000, 800, 400)
+        assert summaries.cost == pytest.approx(2 * estimate_cost("gpt-4.1-mini", 1000, 400, 200))
+
+        # The usage is stored with the session, so a restored session keeps its totals
+        total = (await memory.get_usage()).get(())
+        memory.session.close()
+        store.close()
+        USAGE_LEDGER.clear()
+
+        store = ResearchStore(tmp_path / "research.sqlite3")
+        memory = AgentMemory("session-u", store)
+        restored = (await memory.get_usage()).get(())
+        assert restored.to_dict() == total.to_dict()
+        assert restored.requests == 3
+    finally:
+        memory.session.close()
+        store.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
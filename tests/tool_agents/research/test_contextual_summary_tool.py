@@ -5,10 +5,14 @@ Test script for the contextual_summary_tool with LLM call for human validation.
 
 import asyncio
 from dotenv import load_dotenv
+from unittest.mock import Mock, patch
+
+from agents import Runner
 
 # Load environment variables from .env file
 load_dotenv()
 
+from src.tool_agents.research import contextual_summary_tool as summary_module
 from src.tool_agents.research.contextual_summary_tool import contextual_summary_tool
 
 async def test_contextual_summary_tool():
@@ -77,5 +81,33 @@ async def test_contextual_summary_tool():
         import traceback
         traceback.print_exc()
 
+async def test_contextual_summary_tool_map_reduce():
+    """Test that long content is chunked, summarized concurrently and reduced into one summary."""
+    
+    calls = []
+    
+    async def fake_run(agent, text, **kwargs):
+        calls.append((agent.name, text))
+        if agent.name == "Contextual Summary Reducer Tool-Agent":
+            return Mock(final_output="Reduced summary")
+        return Mock(final_output=f"Partial summary {len(calls)}")
+    
+    long_content = "\n".join(f"Paragraph {i}: EV sales grew again this quarter across the United States." for i in range(200))
+    
+    with patch.object(summary_module, 'SUMMARY_CHUNK_TOKENS', 500), \
+         patch.object(summary_module, 'get_summary_cache', return_value=None), \
+         patch.object(Runner, 'run', side_effect=fake_run):
+        result = await contextual_summary_tool("How fast are EV sales growing?", long_content)
+    
+    chunk_calls = [text for name, text in calls if name == "Contextual Summary Tool-Agent"]
+    reduce_calls = [text for name, text in calls if name == "Contextual Summary Reducer Tool-Agent"]
+    
+    assert result == "Reduced summary"
+    assert len(chunk_calls) > 1
+    assert len(reduce_calls) == 1
+    # Nothing is truncated: every paragraph reaches exactly one chunk summary
+    assert sum(text.count("Paragraph") for text in chunk_calls) == 200
+
 if __name__ == "__main__":
-    asyncio.run(test_contextual_summary_tool()) 
\ No newline at end of file
+    asyncio.run(test_contextual_summary_tool())
+    asyncio.run(test_contextual_summary_tool_map_reduce()) 
\ No newline at end of file
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test script for the research plan parser.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from src.tool_agents.research.plan_parser import extract_research_questions, parse_research_plan
+
+SAMPLE_OUTPUTS = Path(__file__).parent.parent.parent.parent / "src" / "sample_outputs"
+
+EXPECTED_AREAS = [
+    "Market Analysis",
+    "Business Model & Financial Research",
+    "Marketing Research",
+    "Technical & Legal Research",
+]
+
+
+class TestParseResearchPlan:
+    """Test cases for parse_research_plan."""
+    
+    @pytest.mark.parametrize("plan_file", [
+        "banana_bliss_research_plan.md",
+        "7-31-25_gpt-4.1_banana_bliss_research_plan.md",
+    ])
+    def test_sample_plans(self, plan_file):
+        """Test parsing the sample plans produced by the plan writer."""
+        plan = (SAMPLE_OUTPUTS / plan_file).read_text()
+        
+        areas = parse_research_plan(plan)
+        
+        assert list(areas.keys()) == EXPECTED_AREAS
+        assert all(len(questions) == 5 for questions in areas.values())
+        assert all(question.endswith("?") for questions in areas.values() for question in questions)
+    
+    def test_inline_research_question(self):
+        """Test the single-question format of the short plan writer prompt."""
+        plan = """
+        1. **Information**
+            - Product Name: Test Product
+            - Description: A test product
+
+        2. **Research Areas**
+            - **Market Analysis**
+                - Sub-topics: Industry Trends, Competitors
+                - Summary: Explore the market
+                - Research Question: How large is the market for test products?
+            - **Marketing Research**
+                - Sub-topics: Channels
+                - Summary: Explore channels
+                - **Research Question:** Which channels reach test product buyers?
+        """
+        
+        areas = parse_research_plan(plan)
+        
+        assert areas == {
+            "Market Analysis": ["How large is the market for test products?"],
+            "Marketing Research": ["Which channels reach test product buyers?"],
+        }
+    
+    def test_labelled_question_items(self):
+        """Test bulleted questions prefixed with their sub-topic."""
+        plan = """
+        ### Market Analysis
+        - Research Questions:
+            - Industry Trends: What trends shape the
+              market for test products?
+            - Competitors: Who are the main competitors?
+        - Summary: Not a question
+        """
+        
+        areas = parse_research_plan(plan)
+        
+        assert areas == {
+            "Market Analysis": [
+                "Industry Trends: What trends shape the market for test products?",
+                "Competitors: Who are the main competitors?",
+            ]
+        }
+    
+    def test_unparseable_plan(self):
+        """Test that free-form text yields no questions."""
+        plan = "We should look into the market and figure out pricing at some point."
+        
+        assert parse_research_plan(plan) == {}
+        assert extract_research_questions(plan) == []
+
+
+class TestExtractResearchQuestions:
+    """Test cases for extract_research_questions."""
+    
+    def test_flattens_and_deduplicates(self):
+        """Test that questions are flattened in plan order without duplicates."""
+        plan = """
+        ### Market Analysis
+        - Research Question: What is the market size?
+        ### Business Model
+        - Research Questions:
+            1. What is the market size?
+            2. What should we charge?
+        """
+        
+        assert extract_research_questions(plan) == [
+            "What is the market size?",
+            "What should we charge?",
+        ]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
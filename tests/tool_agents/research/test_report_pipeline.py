@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Test script for the per-section report pipeline of the report writer.
+"""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from agents import Runner
+from openai.types.responses import ResponseTextDeltaEvent
+
+from src.agent_memory import AGENT_MEMORY
+from src.tool_agents.research.report_writer_tool import write_report
+
+RESEARCH_PLAN = """
+1. **Information**
+- Product Name: CaseCo
+- Description: Eco-friendly phone cases
+
+2. **Research Areas**
+    - **Market Analysis**
+        - Summary: Market size and competitors
+        - Research Question: What is the market size for eco-friendly phone cases?
+    - **Business Model & Financial Research**
+        - Summary: Pricing and costs
+        - Research Question: What are the costs of selling phone cases on Amazon?
+"""
+
+MARKET_QUESTION = "What is the market size for eco-friendly phone cases?"
+COST_QUESTION = "What are the costs of selling phone cases on Amazon?"
+
+
+@pytest.fixture
+async def research_dump():
+    """Fill the research dump with results for both research questions."""
+    await AGENT_MEMORY.clear_research_dump()
+    await AGENT_MEMORY.add_to_research_dump(MARKET_QUESTION, [
+        (("Market Report", "https://example.com/market"), "The market reached $25B in 2023."),
+        (("Shared Study", "https://example.com/shared"), "Eco cases grow 12% a year."),
+    ])
+    await AGENT_MEMORY.add_to_research_dump(COST_QUESTION, [
+        (("Shared Study", "https://example.com/shared"), "Eco cases sell at a 20% premium."),
+        (("Seller Fees", "https://example.com/fees"), "FBA fees average $3.22 per unit."),
+    ])
+    yield
+    await AGENT_MEMORY.clear_research_dump()
+
+
+class FakeStreamedRun:
+    """Streaming run result that yields its output as text deltas a few characters at a time."""
+    
+    def __init__(self, output, delay=0.0, on_start=None, on_end=None):
+        self.final_output = output
+        self.delay = delay
+        self.on_start = on_start
+        self.on_end = on_end
+    
+    async def stream_events(self):
+        if self.on_start:
+            self.on_start()
+        await asyncio.sleep(self.delay)
+        for start in range(0, len(self.final_output), 3):
+            yield SimpleNamespace(
+                type="raw_response_event",
+                data=ResponseTextDeltaEvent.model_construct(
+                    type="response.output_text.delta", delta=self.final_output[start:start + 3]
+                ),
+            )
+        if self.on_end:
+            self.on_end()
+
+
+async def test_sections_written_concurrently_with_merged_references(research_dump, tmp_path, capsys):
+    """Test that areas are written in parallel from their own sources and citations are renumbered."""
+    calls = []
+    running = 0
+    peak = 0
+    
+    def started():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+    
+    def ended():
+        nonlocal running
+        running -= 1
+    
+    def fake_run_streamed(agent, input, **kwargs):
+        calls.append((agent.name, input))
+        if agent.name == "Report Introduction Writer Tool-Agent":
+            output = "**Information**\n\n**Introduction**"
+        elif agent.name == "Report Conclusion Writer Tool-Agent":
+            output = "**Conclusion**"
+        else:
+            area = agent.instructions.split("Research area: ")[1].splitlines()[0]
+            output = f"### {area}\n\nFinding [1]. Other finding [1, 2]."
+        return FakeStreamedRun(output, 0.01, started, ended)
+    
+    report_path = tmp_path / "report.md"
+    with patch.object(Runner, 'run_streamed', side_effect=fake_run_streamed):
+        report, path = await write_report(RESEARCH_PLAN, report_path)
+    
+    section_inputs = [input for name, input in calls if name == "Report Section Writer Tool-Agent"]
+    assert len(section_inputs) == 2
+    assert "https://example.com/fees" not in section_inputs[0]
+    assert "https://example.com/market" not in section_inputs[1]
+    assert peak == 3
+    assert calls[-1][0] == "Report Conclusion Writer Tool-Agent"
+    
+    # The shared source keeps one number; the second section's local [1] becomes global [2]
+    assert "### Market Analysis\n\nFinding [1]. Other finding [1, 2]." in report
+    assert "### Business Model & Financial Research\n\nFinding [2]. Other finding [2, 3]." in report
+    assert report.endswith(
+        "## References\n\n"
+        "1. Market Report: https://example.com/market\n"
+        "2. Shared Study: https://example.com/shared\n"
+        "3. Seller Fees: https://example.com/fees"
+    )
+    assert report.index("**Introduction**") < report.index("### Market Analysis") < report.index("**Conclusion**")
+    
+    # The conclusion is written from the renumbered sections
+    assert "Finding [2]. Other finding [2, 3]." in calls[-1][1]
+    
+    # The report was streamed to the console and saved to the file as written
+    assert path == report_path
+    assert report_path.read_text(encoding="utf-8").strip() == report
+    assert report in capsys.readouterr().out
+
+
+async def test_unparseable_plan_falls_back_to_single_agent(research_dump, tmp_path):
+    """Test that a plan without research areas is written by the single Report Writer agent."""
+    def fake_run_streamed(agent, input, **kwargs):
+        return FakeStreamedRun(f"Report by {agent.name}")
+    
+    with patch.object(Runner, 'run_streamed', side_effect=fake_run_streamed):
+        report, path = await write_report("Write a report about phone cases.", tmp_path / "report.md")
+    
+    assert report == "Report by Report Writer Tool-Agent"
+    assert path.read_text(encoding="utf-8").strip() == report
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
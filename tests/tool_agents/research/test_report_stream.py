@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test script for streaming the report to the console and a report file.
+"""
+
+import io
+
+import pytest
+
+from src.tool_agents.research.report_stream import (
+    CitationRenumberer,
+    ReportStream,
+    default_report_path,
+    renumber_citations,
+)
+
+
+def test_renumber_citations():
+    """Test that citation numbers are mapped and unknown numbers are left alone."""
+    text = "A [1]. B [1, 2]. C [7]. Link [text](url)."
+    assert renumber_citations(text, {1: 3, 2: 4}) == "A [3]. B [3, 4]. C [7]. Link [text](url)."
+
+
+def test_renumberer_handles_citations_split_across_chunks():
+    """Test that a citation split over several chunks is renumbered once it closes."""
+    renumberer = CitationRenumberer({1: 5, 2: 6})
+    chunks = ["Finding [", "1", ", 2", "]. Next [", "2] done"]
+    output = "".join(renumberer.feed(chunk) for chunk in chunks) + renumberer.flush()
+    assert output == "Finding [5, 6]. Next [6] done"
+
+
+def test_renumberer_does_not_hold_back_long_brackets():
+    """Test that text after a "[" that never closes is released once it is too long to be a citation."""
+    renumberer = CitationRenumberer({1: 2})
+    assert renumberer.feed("See [") == "See "
+    assert renumberer.feed("a" * 40) == "[" + "a" * 40
+    assert renumberer.flush() == ""
+
+
+def test_stream_emits_parts_in_order(tmp_path):
+    """Test that later parts are buffered until the earlier parts finish."""
+    console = io.StringIO()
+    stream = ReportStream(3, tmp_path / "report.md", console)
+    
+    stream.write(0, "Intro")
+    stream.write(2, "Second")
+    stream.write(1, "First")
+    assert console.getvalue() == "Intro"
+    
+    stream.finish(2)
+    stream.finish(0)
+    assert console.getvalue() == "Intro\n\nFirst"
+    
+    stream.write(1, " more")
+    stream.finish(1)
+    assert console.getvalue() == "Intro\n\nFirst more\n\nSecond\n\n"
+    stream.close()
+    
+    assert (tmp_path / "report.md").read_text(encoding="utf-8") == console.getvalue()
+    assert stream.text == "Intro\n\nFirst more\n\nSecond"
+
+
+def test_close_emits_unfinished_parts(tmp_path):
+    """Test that closing the stream keeps the text of parts that never finished."""
+    console = io.StringIO()
+    stream = ReportStream(2, tmp_path / "report.md", console)
+    stream.write(1, "Late")
+    stream.write(0, "Early")
+    stream.close()
+    assert (tmp_path / "report.md").read_text(encoding="utf-8") == "EarlyLate"
+
+
+def test_default_path_in_reports_dir(tmp_path, monkeypatch):
+    """Test that reports are saved to a timestamped file in the reports directory by default."""
+    monkeypatch.setattr("src.tool_agents.research.report_stream.REPORTS_DIR", tmp_path / "reports")
+    stream = ReportStream(1, console=io.StringIO())
+    stream.close()
+    assert stream.path.parent == tmp_path / "reports"
+    assert stream.path.name.startswith("report-") and stream.path.suffix == ".md"
+
+
+def test_default_paths_do_not_collide(tmp_path, monkeypatch):
+    """Test that reports of different sessions, or without one, finished in the same second get their own files."""
+    monkeypatch.setattr("src.tool_agents.research.report_stream.REPORTS_DIR", tmp_path)
+    paths = {default_report_path("session-a"), default_report_path("session-b"), default_report_path(), default_report_path()}
+    assert len(paths) == 4
+    assert default_report_path("../a/b").parent == tmp_path
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test script for the persistent summary cache.
+"""
+
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from agents import Runner
+
+from src.tool_agents.research import contextual_summary_tool as summary_module
+from src.tool_agents.research.summary_cache import SummaryCache
+
+QUESTION = "What is the market size for electric vehicles in the United States?"
+CONTENT = "In 2023, EV sales reached approximately 1.2 million units in the United States."
+
+
+class TestSummaryCache:
+    """Test cases for the SummaryCache class."""
+    
+    async def test_normalized_question_hits(self, tmp_path):
+        """Test that whitespace and case differences in the question share a cache entry."""
+        cache = SummaryCache(cache_dir=tmp_path)
+        
+        await cache.store(QUESTION, CONTENT, "gpt-4.1", "1", "EV sales hit 1.2M in 2023.")
+        
+        assert await cache.get(f"  {QUESTION.upper()} ", CONTENT, "gpt-4.1", "1") == "EV sales hit 1.2M in 2023."
+    
+    async def test_key_includes_content_model_and_prompt_version(self, tmp_path):
+        """Test that a different content, model or prompt version misses."""
+        cache = SummaryCache(cache_dir=tmp_path)
+        
+        await cache.store(QUESTION, CONTENT, "gpt-4.1", "1", "summary")
+        
+        assert await cache.get(QUESTION, CONTENT + " More text.", "gpt-4.1", "1") is None
+        assert await cache.get(QUESTION, CONTENT, "gpt-4.1-mini", "1") is None
+        assert await cache.get(QUESTION, CONTENT, "gpt-4.1", "2") is None
+    
+    async def test_invalidate_prompt_version(self, tmp_path):
+        """Test dropping every summary written with an old prompt version."""
+        cache = SummaryCache(cache_dir=tmp_path)
+        await cache.store(QUESTION, CONTENT, "gpt-4.1", "1", "old summary")
+        await cache.store(QUESTION, CONTENT, "gpt-4.1", "2", "new summary")
+        
+        assert cache.invalidate_prompt_version(keep_version="2") == 1
+        
+        assert await cache.get(QUESTION, CONTENT, "gpt-4.1", "1") is None
+        assert await cache.get(QUESTION, CONTENT, "gpt-4.1", "2") == "new summary"
+
+
+async def test_contextual_summary_tool_uses_cache(tmp_path):
+    """Test that a repeated summary request is answered from the cache without a model call."""
+    cache = SummaryCache(cache_dir=tmp_path)
+    mock_run = AsyncMock(return_value=Mock(final_output="EV sales hit 1.2M in 2023."))
+    
+    with patch.object(summary_module, 'get_summary_cache', return_value=cache), \
+         patch.object(Runner, 'run', mock_run):
+        first = await summary_module.contextual_summary_tool(QUESTION, CONTENT)
+        second = await summary_module.contextual_summary_tool(QUESTION, CONTENT)
+    
+    assert first == second == "EV sales hit 1.2M in 2023."
+    assert mock_run.await_count == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test script for the extractive relevance pre-filter.
+"""
+
+import pytest
+
+from src.globals import PREFILTER_TOKEN_BUDGET, SUMMARY_CHUNK_TOKENS
+from src.text_chunker import chunk_text, count_tokens
+from src.tools.relevance_filter import filter_relevant_passages
+
+BOILERPLATE = "Subscribe to our newsletter for weekly deals and accept our cookie policy to continue browsing."
+
+
+def make_page(relevant_lines):
+    """Build a long page where a few relevant lines are buried in boilerplate."""
+    lines = [f"{BOILERPLATE} ({i})" for i in range(200)]
+    for position, line in relevant_lines.items():
+        lines[position] = line
+    return "\n".join(lines)
+
+
+class TestFilterRelevantPassages:
+    """Test cases for filter_relevant_passages."""
+    
+    def test_short_text_is_unchanged(self):
+        """Test that a page within budget is passed through untouched."""
+        text = "A short page.\nWith two lines."
+        
+        assert filter_relevant_passages(text, ["anything"], token_budget=100) == text
+    
+    def test_keeps_relevant_passages_in_order(self):
+        """Test that relevant passages are kept, in page order, within the budget."""
+        page = make_page({
+            150: "Phone case market size reached $25 billion in 2023.",
+            20: "Amazon FBA fees for phone cases average $3.22 per unit.",
+        })
+        
+        result = filter_relevant_passages(
+            page,
+            ["What are the costs of selling phone cases on Amazon?", "phone case market size"],
+            token_budget=500,
+        )
+        
+        assert count_tokens(result) <= 500
+        assert "Amazon FBA fees" in result
+        assert "market size reached" in result
+        assert result.index("Amazon FBA fees") < result.index("market size reached")
+    
+    def test_no_match_keeps_leading_passages(self):
+        """Test that a page with no matching terms falls back to its leading passages."""
+        page = make_page({})
+        
+        result = filter_relevant_passages(page, ["quantum chromodynamics"], token_budget=100)
+        
+        assert result
+        assert result.startswith(BOILERPLATE)
+        assert count_tokens(result) <= 100
+
+    
+    def test_default_budget_leaves_long_pages_for_chunked_summaries(self):
+        """Test that with the default settings a long page is filtered to more than one summary chunk."""
+        page = "\n".join(f"{BOILERPLATE} ({i})" for i in range(1000))
+        
+        result = filter_relevant_passages(page, ["eco-friendly phone cases"])
+        
+        assert PREFILTER_TOKEN_BUDGET > SUMMARY_CHUNK_TOKENS
+        assert count_tokens(page) > PREFILTER_TOKEN_BUDGET
+        assert len(chunk_text(result, SUMMARY_CHUNK_TOKENS)) > 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
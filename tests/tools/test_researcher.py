@@ -5,11 +5,12 @@ Test script for the research tool with a single research question.
 
 import asyncio
 from dotenv import load_dotenv
+from unittest.mock import patch
 
 # Load environment variables from .env file
 load_dotenv()
 
-from src.agent_memory import AGENT_MEMORY
+from src.agent_memory import AGENT_MEMORY, AgentMemory
 from src.tools.researcher_tool import researcher
 
 async def test_researcher():
@@ -60,5 +61,118 @@ async def test_researcher():
         import traceback
         traceback.print_exc()
 
+async def test_researcher_parallel_queries_deterministic_order():
+    """Test that queries run concurrently and results are merged in query order."""
+    
+    await AGENT_MEMORY.clear_research_dump()
+    
+    test_question = "How big is the market for banana-scented candles?"
+    queries = ["query one", "query two", "query three"]
+    in_flight = 0
+    peak = 0
+    
+    async def fake_web_search(query, research_question=None, memory=None):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        # Earlier queries finish later, so the merge order must come from the query order
+        await asyncio.sleep(0.01 * (len(queries) - queries.index(query)))
+        in_flight -= 1
+        return [((f"Title for {query}", f"https://example.com/{query.replace(' ', '-')}"), f"Summary for {query}")]
+    
+    with patch('src.tools.researcher_tool.query_writer_tool', return_value=queries), \
+         patch('src.tools.researcher_tool.web_search', side_effect=fake_web_search):
+        result = await researcher(test_question)
+    
+    assert result is True
+    assert peak == len(queries)
+    
+    research_dump = await AGENT_MEMORY.get_from_research_dump_by_question(test_question)
+    assert [summary for _, summary in research_dump] == [f"Summary for {query}" for query in queries]
+    
+    await AGENT_MEMORY.clear_research_dump()
+
+async def test_researcher_resumes_from_checkpoint():
+    """Test that an interrupted question resumes with its queries and summaries and completed questions are skipped."""
+    
+    memory = AgentMemory("checkpoint-test")
+    test_question = "How big is the market for banana-scented candles?"
+    urls = ["https://example.com/fast", "https://example.com/slow"]
+    summarized = []
+    hang = True
+    
+    async def fake_summary(query, content):
+        if content == "slow page" and hang:
+            await asyncio.sleep(10)
+        summarized.append(content)
+        return f"Summary of {content}"
+    
+    async def fake_scrape(url):
+        return (url.rsplit("/", 1)[-1].title(), f"{url.rsplit('/', 1)[-1]} page")
+    
+    with patch('src.tools.researcher_tool.query_writer_tool', return_value=["candle market"]) as query_writer, \
+         patch('src.tools.web_search_tool.source_finder', return_value=urls), \
+         patch('src.tools.web_search_tool.scrape_url', side_effect=fake_scrape), \
+         patch('src.tools.web_search_tool.PREFILTER_ENABLED', False), \
+         patch('src.tools.web_search_tool.contextual_summary_tool', side_effect=fake_summary):
+        # The run times out while the slow page is being summarized
+        try:
+            await asyncio.wait_for(researcher(test_question, memory), timeout=0.2)
+        except asyncio.TimeoutError:
+            pass
+        assert not await memory.is_question_researched(test_question)
+        assert await memory.get_checkpointed_queries(test_question) == ["candle market"]
+        assert summarized == ["fast page"]
+        
+        # The resumed run reuses the queries and only summarizes the unfinished page
+        hang = False
+        assert await researcher(test_question, memory) is True
+        assert query_writer.call_count == 1
+        assert summarized == ["fast page", "slow page"]
+        research_dump = await memory.get_from_research_dump_by_question(test_question)
+        assert [summary for _, summary in research_dump] == ["Summary of fast page", "Summary of slow page"]
+        assert await memory.get_checkpointed_queries(test_question) == []
+        
+        # A completed question is skipped
+        assert await researcher(test_question, memory) is True
+        assert query_writer.call_count == 1
+    
+    memory.session.close()
+
+async def test_researcher_retries_questions_and_sources_that_failed():
+    """Test that a question without results isn't marked researched and failed summaries aren't checkpointed."""
+    
+    memory = AgentMemory("checkpoint-failure-test")
+    test_question = "How big is the market for banana-scented candles?"
+    urls = []
+    
+    async def failing_summary(query, content):
+        raise RuntimeError("rate limited")
+    
+    async def fake_scrape(url):
+        return ("Candles", "candle page")
+    
+    with patch('src.tools.researcher_tool.query_writer_tool', return_value=["candle market"]) as query_writer, \
+         patch('src.tools.web_search_tool.source_finder', side_effect=lambda query: list(urls)), \
+         patch('src.tools.web_search_tool.scrape_url', side_effect=fake_scrape), \
+         patch('src.tools.web_search_tool.PREFILTER_ENABLED', False), \
+         patch('src.tools.web_search_tool.contextual_summary_tool', side_effect=failing_summary):
+        # No search results: the question stays unresearched
+        assert await researcher(test_question, memory) is False
+        assert not await memory.is_question_researched(test_question)
+        assert await memory.get_research_dump() == {}
+        
+        # The retry finds the page; its summary fails, so the fallback is used but not checkpointed
+        urls.append("https://example.com/candles")
+        assert await researcher(test_question, memory) is True
+        assert query_writer.call_count == 1
+        assert await memory.is_question_researched(test_question)
+        assert await memory.get_checkpointed_source(test_question, "candle market", urls[0]) is None
+    
+    memory.session.close()
+
 if __name__ == "__main__":
-    asyncio.run(test_researcher()) 
\ No newline at end of file
+    asyncio.run(test_researcher())
+    asyncio.run(test_researcher_parallel_queries_deterministic_order())
+    asyncio.run(test_researcher_resumes_from_checkpoint())
+    asyncio.run(test_researcher_retries_questions_and_sources_that_failed())
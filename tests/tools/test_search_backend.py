@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Test script for the pluggable, cached search backends.
+"""
+
+import asyncio
+import json
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.tools.search_backend import (
+    CachedSearchBackend,
+    DDGSBackend,
+    FixtureBackend,
+    SearchBackend,
+    SearchResult,
+)
+
+FIXTURES = {
+    "phone case market size": [
+        {"url": "https://example.com/market", "title": "Market", "snippet": "$25B in 2023"},
+        "https://example.com/report",
+    ],
+    "*": ["https://example.com/fallback"],
+}
+
+
+class CountingBackend(SearchBackend):
+    """Backend that counts searches and can be made to return nothing."""
+    
+    name = "counting"
+    
+    def __init__(self, results):
+        self.results = results
+        self.calls = 0
+    
+    async def search(self, query, max_results):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return self.results[:max_results]
+
+
+class TestDDGSBackend:
+    """Test cases for the DDGSBackend class."""
+    
+    async def test_runs_off_loop_and_reuses_client(self):
+        """Test that searches run in a worker thread on one shared client."""
+        threads = []
+        client = MagicMock()
+        
+        def text(query, max_results):
+            threads.append(threading.current_thread())
+            return [{"href": "https://example.com", "title": "Example", "body": "Snippet"}, {"title": "No URL"}]
+        
+        client.text.side_effect = text
+        backend = DDGSBackend(client=client)
+        
+        first = await backend.search("query one", 5)
+        await backend.search("query two", 5)
+        
+        assert first == [SearchResult("https://example.com", "Example", "Snippet")]
+        assert client.text.call_count == 2
+        assert all(thread is not threading.main_thread() for thread in threads)
+    
+    async def test_one_client_per_worker_thread(self):
+        """Test that concurrent searches never share a lazily created client between threads."""
+        owners = {}
+        barrier = threading.Barrier(4)
+        
+        def make_client():
+            client = MagicMock()
+            
+            def text(query, max_results):
+                owner = owners.setdefault(id(client), threading.current_thread())
+                assert owner is threading.current_thread()
+                barrier.wait(timeout=5)
+                return []
+            
+            client.text.side_effect = text
+            return client
+        
+        backend = DDGSBackend()
+        with patch("src.tools.search_backend.DDGS", side_effect=make_client):
+            await asyncio.gather(*(backend.search(f"query {i}", 5) for i in range(4)))
+        
+        assert len(owners) == 4
+
+
+class TestFixtureBackend:
+    """Test cases for the FixtureBackend class."""
+    
+    async def test_normalized_lookup_and_fallback(self):
+        """Test query normalization, max_results and the "*" fallback."""
+        backend = FixtureBackend(FIXTURES)
+        
+        results = await backend.search("  Phone Case   MARKET size ", 1)
+        fallback = await backend.search("something else", 3)
+        
+        assert results == [SearchResult("https://example.com/market", "Market", "$25B in 2023")]
+        assert [result.url for result in fallback] == ["https://example.com/fallback"]
+    
+    async def test_loads_json_file(self, tmp_path):
+        """Test loading fixtures from a JSON file."""
+        path = tmp_path / "searches.json"
+        path.write_text(json.dumps(FIXTURES))
+        
+        results = await FixtureBackend(path).search("phone case market size", 5)
+        
+        assert [result.url for result in results] == ["https://example.com/market", "https://example.com/report"]
+
+
+class TestCachedSearchBackend:
+    """Test cases for the CachedSearchBackend class."""
+    
+    async def test_persists_across_instances(self, tmp_path):
+        """Test that a repeated query is served from disk, even by a new instance."""
+        inner = CountingBackend([SearchResult("https://example.com", "Example")])
+        
+        first = await CachedSearchBackend(inner, cache_dir=tmp_path).search("EV sales", 3)
+        second = await CachedSearchBackend(inner, cache_dir=tmp_path).search("ev   SALES", 3)
+        
+        assert first == second == [SearchResult("https://example.com", "Example")]
+        assert inner.calls == 1
+    
+    async def test_coalesces_concurrent_queries(self, tmp_path):
+        """Test that identical queries issued at once share one search."""
+        inner = CountingBackend([SearchResult("https://example.com")])
+        backend = CachedSearchBackend(inner, cache_dir=tmp_path)
+        
+        results = await asyncio.gather(*(backend.search("EV sales", 3) for _ in range(5)))
+        
+        assert inner.calls == 1
+        assert all(result == [SearchResult("https://example.com")] for result in results)
+    
+    async def test_empty_results_not_cached(self, tmp_path):
+        """Test that an empty result list is searched again next time."""
+        inner = CountingBackend([])
+        backend = CachedSearchBackend(inner, cache_dir=tmp_path)
+        
+        await backend.search("EV sales", 3)
+        await backend.search("EV sales", 3)
+        
+        assert inner.calls == 2
+    
+    async def test_max_results_in_key(self, tmp_path):
+        """Test that a different max_results is a separate cache entry."""
+        inner = CountingBackend([SearchResult(f"https://example.com/{i}") for i in range(5)])
+        backend = CachedSearchBackend(inner, cache_dir=tmp_path)
+        
+        assert len(await backend.search("EV sales", 2)) == 2
+        assert len(await backend.search("EV sales", 5)) == 5
+        assert inner.calls == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
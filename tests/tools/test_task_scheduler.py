@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared task scheduler.
+"""
+
+import asyncio
+import pytest
+
+from src.tools.task_scheduler import TaskScheduler
+
+
+class TestTaskScheduler:
+    """Test cases for the TaskScheduler class."""
+    
+    async def test_gather_respects_limit(self):
+        """Test that no more than max_concurrency coroutines run at once."""
+        scheduler = TaskScheduler(max_concurrency=2)
+        in_flight = 0
+        peak = 0
+        
+        async def work(i):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return i
+        
+        results = await scheduler.gather(work(i) for i in range(6))
+        
+        assert results == list(range(6))
+        assert peak == 2
+    
+    async def test_gather_isolates_failures(self):
+        """Test that a failing coroutine yields its exception without cancelling the others."""
+        scheduler = TaskScheduler(max_concurrency=3)
+        
+        async def work(i):
+            if i == 1:
+                raise ValueError("boom")
+            return i
+        
+        results = await scheduler.gather(work(i) for i in range(3))
+        
+        assert results[0] == 0
+        assert isinstance(results[1], ValueError)
+        assert results[2] == 2
+    
+    async def test_limit_is_shared_between_callers(self):
+        """Test that separate gather calls share the same pool of slots."""
+        scheduler = TaskScheduler(max_concurrency=1)
+        in_flight = 0
+        peak = 0
+        
+        async def work():
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+        
+        await asyncio.gather(
+            scheduler.gather(work() for _ in range(2)),
+            scheduler.gather(work() for _ in range(2)),
+        )
+        
+        assert peak == 1
+    
+    def test_minimum_concurrency(self):
+        """Test that the limit is at least one."""
+        assert TaskScheduler(max_concurrency=0).max_concurrency == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
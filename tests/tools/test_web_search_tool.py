@@ -10,6 +10,7 @@ from unittest.mock import patch, MagicMock
 # Load environment variables from .env file
 load_dotenv()
 
+from src.tools.search_backend import DDGSBackend
 from src.tools.web_search_tool import web_search_tool, web_search, source_finder
 
 async def test_web_search_tool():
@@ -52,7 +53,7 @@ async def test_web_search_tool():
         import traceback
         traceback.print_exc()
 
-def test_source_finder():
+async def test_source_finder():
     """Test the source_finder function with mock data."""
     
     print("Testing source_finder function...")
@@ -64,17 +65,16 @@ def test_source_finder():
         {'href': 'https://example3.com', 'title': 'Example 3'}
     ]
     
-    with patch('src.tools.web_search_tool.DDGS') as mock_ddgs:
-        mock_ddgs_instance = MagicMock()
-        mock_ddgs_instance.text.return_value = mock_results
-        mock_ddgs.return_value = mock_ddgs_instance
-        
-        result = source_finder("test query")
-        
-        print(f"Source finder result: {result}")
-        assert len(result) == 3
-        assert all(url.startswith('https://') for url in result)
-        print("Source finder test passed!")
+    mock_ddgs_instance = MagicMock()
+    mock_ddgs_instance.text.return_value = mock_results
+    
+    result = await source_finder("test query", backend=DDGSBackend(client=mock_ddgs_instance))
+    
+    print(f"Source finder result: {result}")
+    assert len(result) == 3
+    assert all(url.startswith('https://') for url in result)
+    mock_ddgs_instance.text.assert_called_once_with("test query", max_results=3)
+    print("Source finder test passed!")
 
 async def test_web_search_integration():
     """Test the web_search function with mock scraping."""
@@ -111,12 +111,43 @@ async def test_web_search_integration():
         
         print("Web search integration test passed!")
 
+async def test_web_search_concurrent_rank_order():
+    """Test that concurrent fan-out keeps rank order and isolates per-URL failures."""
+    
+    mock_urls = [
+        "https://slow.example.com",
+        "https://broken.example.com",
+        "https://fast.example.com",
+    ]
+    
+    async def fake_scrape(url):
+        # The first URL finishes last, so the output order must come from the rank, not completion
+        await asyncio.sleep(0.05 if "slow" in url else 0)
+        if "broken" in url:
+            raise RuntimeError("connection reset")
+        return (f"Title {url}", f"Content of {url}")
+    
+    async def fake_summary(query, content):
+        return f"Summary of: {content}"
+    
+    with patch('src.tools.web_search_tool.source_finder') as mock_source_finder, \
+         patch('src.tools.web_search_tool.scrape_url', side_effect=fake_scrape), \
+         patch('src.tools.web_search_tool.contextual_summary_tool', side_effect=fake_summary):
+        
+        mock_source_finder.return_value = mock_urls
+        
+        result = await web_search("test query", max_concurrency=2)
+        
+        assert [url for (_, url), _ in result] == ["https://slow.example.com", "https://fast.example.com"]
+        assert result[0][1] == "Summary of: Content of https://slow.example.com"
+
 if __name__ == "__main__":
     # Run unit tests first
-    test_source_finder()
+    asyncio.run(test_source_finder())
     
     # Run integration test
     asyncio.run(test_web_search_integration())
+    asyncio.run(test_web_search_concurrent_rank_order())
     
     # Run main test with real LLM calls
     asyncio.run(test_web_search_tool()) 
\ No newline at end of file
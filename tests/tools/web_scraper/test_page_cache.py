@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test script for the on-disk page cache and its use by the web scraper.
+"""
+
+from unittest.mock import AsyncMock, Mock
+
+import httpx
+import pytest
+
+from src.tools.web_scraper import FetchEngine, PageCache, WebScraper
+from src.tools.web_scraper.urls import canonicalize_url
+
+TEST_HTML = b"<html><head><title>Cached Page</title></head><body><p>Cached content.</p></body></html>"
+
+
+def make_response(status_code=200, content=TEST_HTML, headers=None):
+    """Build a mock HTTP response."""
+    response = Mock()
+    response.status_code = status_code
+    response.content = content
+    response.headers = httpx.Headers(headers or {})
+    response.raise_for_status.return_value = None
+    return response
+
+
+class TestCanonicalizeUrl:
+    """Test cases for canonicalize_url."""
+    
+    def test_equivalent_urls(self):
+        """Test that equivalent spellings share one canonical form."""
+        assert canonicalize_url("HTTPS://Example.COM:443?b=2&a=1#section") == "https://example.com/?a=1&b=2"
+        assert canonicalize_url("http://example.com:8080/path") == "http://example.com:8080/path"
+
+
+class TestPageCache:
+    """Test cases for the PageCache class."""
+    
+    async def test_store_and_get(self, tmp_path):
+        """Test storing a page and reading it back under an equivalent URL."""
+        cache = PageCache(cache_dir=tmp_path, ttl=60)
+        
+        await cache.store(
+            "https://example.com/page?b=2&a=1", TEST_HTML,
+            {"etag": '"abc"', "last-modified": "Mon, 01 Jan 2024 00:00:00 GMT"},
+            "Cached Page", "Cached content.", "1",
+        )
+        page = await cache.get("https://EXAMPLE.com/page?a=1&b=2#top")
+        
+        assert page.body == TEST_HTML
+        assert page.title == "Cached Page"
+        assert page.is_fresh
+        assert page.revalidation_headers() == {
+            "If-None-Match": '"abc"',
+            "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT",
+        }
+    
+    async def test_no_store(self, tmp_path):
+        """Test that pages marked no-store are not cached."""
+        cache = PageCache(cache_dir=tmp_path)
+        
+        await cache.store("https://example.com", TEST_HTML, {"cache-control": "private, no-store"}, "t", "c", "1")
+        
+        assert await cache.get("https://example.com") is None
+
+
+class TestWebScraperCaching:
+    """Test cases for the scraper's use of the page cache."""
+    
+    async def test_fresh_hit_skips_network(self, tmp_path):
+        """Test that a fresh cached page is served without fetching."""
+        engine = FetchEngine()
+        engine.fetch = AsyncMock(return_value=make_response())
+        scraper = WebScraper(engine=engine, cache=PageCache(cache_dir=tmp_path, ttl=60))
+        
+        first = await scraper.scrape_url("https://example.com/page")
+        second = await scraper.scrape_url("https://example.com/page")
+        
+        assert first == second == ("Cached Page", "Cached content.")
+        assert engine.fetch.await_count == 1
+        assert scraper.cache.stats()["hits"] == 1
+    
+    async def test_stale_page_is_revalidated(self, tmp_path):
+        """Test that a stale page is revalidated with a conditional request."""
+        engine = FetchEngine()
+        engine.fetch = AsyncMock(side_effect=[
+            make_response(headers={"ETag": '"v1"'}),
+            make_response(status_code=304, content=b""),
+        ])
+        scraper = WebScraper(engine=engine, cache=PageCache(cache_dir=tmp_path, ttl=-1))
+        
+        await scraper.scrape_url("https://example.com/page")
+        result = await scraper.scrape_url("https://example.com/page")
+        
+        assert result == ("Cached Page", "Cached content.")
+        assert engine.fetch.await_args_list[1].kwargs["headers"] == {"If-None-Match": '"v1"'}
+        assert scraper.cache.stats()["revalidations"] == 1
+    
+    async def test_outdated_extraction_is_redone_from_body(self, tmp_path):
+        """Test that pages cached by an older extractor are re-extracted without fetching."""
+        engine = FetchEngine()
+        engine.fetch = AsyncMock()
+        cache = PageCache(cache_dir=tmp_path, ttl=60)
+        await cache.store("https://example.com/page", TEST_HTML, {}, "Old title", "Old content", "0")
+        scraper = WebScraper(engine=engine, cache=cache)
+        
+        result = await scraper.scrape_url("https://example.com/page")
+        
+        assert result == ("Cached Page", "Cached content.")
+        engine.fetch.assert_not_called()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Test script for URL canonicalization and the run-scoped URL registry.
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from src.tools.web_scraper.url_registry import UrlRegistry, get_url_registry, url_registry_scope
+from src.tools.web_scraper.urls import canonicalize_url
+from src.tools.web_search_tool import web_search
+
+
+class TestCanonicalizeUrl:
+    """Test cases for the duplicate-collapsing rules of canonicalize_url."""
+    
+    def test_tracking_params_www_and_trailing_slash(self):
+        """Test that tracking parameters, www. and trailing slashes are dropped."""
+        assert canonicalize_url("https://www.example.com/news/story/?utm_source=x&id=3&fbclid=1") == "https://example.com/news/story?id=3"
+    
+    def test_amp_variants(self):
+        """Test that publisher and cache AMP variants map to the regular page."""
+        expected = "https://example.com/news/story"
+        assert canonicalize_url("https://amp.example.com/news/story") == expected
+        assert canonicalize_url("https://amp.example.com/news/story/amp/") == expected
+        assert canonicalize_url("https://example.com/news/story.amp.html") == expected
+        assert canonicalize_url("https://example.com/news/story?amp=1") == expected
+        assert canonicalize_url("https://example.com/news/story?outputType=amp") == expected
+        assert canonicalize_url("https://example-com.cdn.ampproject.org/c/s/example.com/news/story/amp") == expected
+        assert canonicalize_url("https://www.google.com/amp/s/www.example.com/news/story") == expected
+    
+    def test_meaningful_urls_unchanged(self):
+        """Test that content-bearing paths and parameters are kept."""
+        assert canonicalize_url("https://example.com/blog/amplify") == "https://example.com/blog/amplify"
+        assert canonicalize_url("https://github.com/org/repo?ref=main") == "https://github.com/org/repo?ref=main"
+        assert canonicalize_url("https://example.com/gear/amp") == "https://example.com/gear/amp"
+        assert canonicalize_url("https://example.com/news/story?outputType=html") == "https://example.com/news/story?outputType=html"
+        assert canonicalize_url("https://example.com/search?si=2&spm=a") == "https://example.com/search?si=2&spm=a"
+        assert canonicalize_url("https://www.youtube.com/watch?v=abc&si=xyz") == "https://youtube.com/watch?v=abc"
+    
+    def test_invalid_port(self):
+        """Test that a URL with an invalid port is kept as is rather than raising."""
+        assert canonicalize_url(" https://example.com:99999/page ") == "https://example.com:99999/page"
+
+
+class TestUrlRegistry:
+    """Test cases for the UrlRegistry class."""
+    
+    async def test_coalesces_equivalent_urls(self):
+        """Test that concurrent requests for one page under different URLs share one scrape."""
+        registry = UrlRegistry()
+        scraped = []
+        
+        async def fake_scrape(url):
+            scraped.append(url)
+            await asyncio.sleep(0.01)
+            return ("Title", f"Content of {url}")
+        
+        results = await asyncio.gather(
+            registry.scrape("https://www.example.com/page/?utm_source=a", fake_scrape),
+            registry.scrape("https://example.com/page", fake_scrape),
+        )
+        later = await registry.scrape("https://example.com/page?amp", fake_scrape)
+        
+        assert scraped == ["https://www.example.com/page/?utm_source=a"]
+        assert results[0] == results[1] == later
+        assert registry.stats() == {"pages": 1, "fetches": 1, "reuses": 2, "near_duplicates": 0}
+    
+    def test_claims_are_per_scope(self):
+        """Test that a page is claimed once per scope."""
+        registry = UrlRegistry()
+        
+        assert registry.claim("https://example.com/page", "question 1")
+        assert not registry.claim("https://www.example.com/page/", "question 1")
+        assert registry.claim("https://example.com/page", "question 2")
+    
+    async def test_scope_visible_to_child_tasks(self):
+        """Test that tasks started inside a scope see its registry."""
+        async def current():
+            return get_url_registry()
+        
+        with url_registry_scope() as registry:
+            seen = await asyncio.gather(current(), current())
+        
+        assert seen == [registry, registry]
+        assert get_url_registry() is None
+
+
+async def test_web_search_dedupes_across_queries():
+    """Test that one research question scrapes and summarizes a page once across its queries."""
+    search_results = {
+        "query one": ["https://example.com/report?utm_source=ddg", "https://example.com/other"],
+        "query two": ["https://www.example.com/report/"],
+    }
+    scraped = []
+    
+    async def fake_source_finder(query):
+        return search_results[query]
+    
+    async def fake_scrape(url):
+        scraped.append(url)
+        return (f"Title {url}", f"Content of {url}")
+    
+    async def fake_summary(query, content):
+        return f"Summary of: {content}"
+    
+    with patch('src.tools.web_search_tool.source_finder', side_effect=fake_source_finder), \
+         patch('src.tools.web_search_tool.scrape_url', side_effect=fake_scrape), \
+         patch('src.tools.web_search_tool.contextual_summary_tool', side_effect=fake_summary), \
+         url_registry_scope():
+        first = await web_search("query one", "What is the market size?")
+        second = await web_search("query two", "What is the market size?")
+        other_question = await web_search("query two", "Who are the competitors?")
+    
+    assert len(first) == 2
+    assert second == []
+    assert len(other_question) == 1
+    assert len(scraped) == 2
+
+
+async def test_web_search_skips_near_duplicates():
+    """Test that a mirror of a page already used for the question is not summarized again."""
+    article = " ".join(f"Sentence {i} about the phone case market and its growth." for i in range(60))
+    pages = {
+        "https://news.example.com/story": article,
+        "https://mirror.example.org/copy": "Syndicated from Example News. " + article,
+        "https://other.example.net/analysis": " ".join(f"Unrelated line {i} on shipping tariffs." for i in range(60)),
+    }
+    summarized = []
+    
+    async def fake_source_finder(query):
+        return list(pages)
+    
+    async def fake_scrape(url):
+        return (f"Title {url}", pages[url])
+    
+    async def fake_summary(query, content):
+        summarized.append(content)
+        return "Summary"
+    
+    with patch('src.tools.web_search_tool.source_finder', side_effect=fake_source_finder), \
+         patch('src.tools.web_search_tool.scrape_url', side_effect=fake_scrape), \
+         patch('src.tools.web_search_tool.contextual_summary_tool', side_effect=fake_summary), \
+         patch('src.tools.web_search_tool.PREFILTER_ENABLED', False), \
+         url_registry_scope() as registry:
+        result = await web_search("phone case market", "What is the market size?", max_concurrency=1)
+    
+    assert [url for (_, url), _ in result] == ["https://news.example.com/story", "https://other.example.net/analysis"]
+    assert len(summarized) == 2
+    assert registry.stats()["near_duplicates"] == 1
+
+
+
+async def test_web_search_survives_an_invalid_result_url():
+    """Test that a search result with an invalid port does not fail the other results of the query."""
+    async def fake_source_finder(query):
+        return ["https://example.com:bad/page", "https://example.com/report"]
+    
+    async def fake_scrape(url):
+        if url == "https://example.com:bad/page":
+            raise ValueError("Port could not be cast to integer value")
+        return (f"Title {url}", f"Content of {url}")
+    
+    async def fake_summary(query, content):
+        return f"Summary of: {content}"
+    
+    with patch('src.tools.web_search_tool.source_finder', side_effect=fake_source_finder), \
+         patch('src.tools.web_search_tool.scrape_url', side_effect=fake_scrape), \
+         patch('src.tools.web_search_tool.contextual_summary_tool', side_effect=fake_summary), \
+         url_registry_scope():
+        results = await web_search("query", "What is the market size?")
+    
+    assert [url for (_, url), _ in results] == ["https://example.com/report"]
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -3,12 +3,14 @@
 Test script for the web scraper tool.
 """
 
+import asyncio
+import threading
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import AsyncMock, Mock, patch, MagicMock
 from bs4 import BeautifulSoup
-import requests
+import httpx
 
-from src.tools.web_scraper import WebScraper, scrape_url
+from src.tools.web_scraper import FetchEngine, WebScraper, close_fetch_engine, get_fetch_engine, scrape_url
 
 
 class TestWebScraper:
@@ -45,8 +47,15 @@ class TestWebScraper:
         """Test WebScraper initialization."""
         scraper = WebScraper(timeout=15)
         assert scraper.timeout == 15
-        assert scraper.session is not None
-        assert 'User-Agent' in scraper.session.headers
+        assert scraper.engine is not None
+        assert 'User-Agent' in scraper.engine.headers
+    
+    def test_init_shares_fetch_engine(self):
+        """Test that scrapers share the pooled fetch engine by default."""
+        assert WebScraper().engine is WebScraper(timeout=5).engine
+        
+        engine = FetchEngine(max_connections=4)
+        assert WebScraper(engine=engine).engine is engine
     
     def test_is_valid_url_valid(self):
         """Test URL validation with valid URLs."""
@@ -88,9 +97,11 @@ class TestWebScraper:
         """
         soup = BeautifulSoup(html, 'html.parser')
         
-        content = self.scraper._extract_main_content(soup)
+        element = self.scraper._extract_main_content(soup)
+        content = self.scraper._format_content(element)
         
         # Should contain main content but not nav or aside
+        assert element.name == 'main'
         assert "Main Content" in content
         assert "This is the main content" in content
         assert "Navigation" not in content
@@ -110,12 +121,44 @@ class TestWebScraper:
         """
         soup = BeautifulSoup(html, 'html.parser')
         
-        content = self.scraper._extract_main_content(soup)
+        content = self.scraper._format_content(self.scraper._extract_main_content(soup))
         
-        # Should fall back to body content
+        # Should fall back to the .content element
         assert "Content" in content
         assert "This is the content" in content
     
+    def test_extract_main_content_skips_boilerplate_in_body(self):
+        """Test that navigation and scripts are skipped when falling back to the body."""
+        html = """
+        <html>
+        <head><title>Page</title></head>
+        <body>
+            <header>Site header</header>
+            <script>var tracking = true;</script>
+            <p>Body paragraph.</p>
+            <!-- a comment -->
+            <footer>Footer</footer>
+        </body>
+        </html>
+        """
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        content = self.scraper._format_content(self.scraper._extract_main_content(soup))
+        
+        assert content == "Body paragraph."
+    
+    def test_extract_main_content_of_body_wrapped_in_form(self):
+        """Test that a page wrapping its whole body in a form (ASP.NET WebForms) keeps its content."""
+        html = """
+        <html>
+        <body><form method="post"><div><h1>Market report</h1><p>Sales grew 12%.</p></div></form></body>
+        </html>
+        """
+        
+        result = self.scraper._parse_html("https://example.com/report.aspx", html.encode())
+        
+        assert result == ("Market report", "Market report\nSales grew 12%.")
+    
     def test_format_content_with_headings_and_paragraphs(self):
         """Test content formatting with headings and paragraphs."""
         html = """
@@ -127,17 +170,30 @@ class TestWebScraper:
         </div>
         """
         
-        result = self.scraper._format_content(html)
+        result = self.scraper._format_content(BeautifulSoup(html, 'html.parser'))
+        
+        # Should have one line per heading/paragraph
+        assert result.split('\n') == ["Title", "First paragraph", "Subtitle", "Second paragraph"]
+    
+    def test_format_content_emits_nested_text_once(self):
+        """Test that text inside nested divs and spans is not duplicated."""
+        html = """
+        <div><div><div>
+            <p>Deep <span>nested <b>text</b></span> here.</p>
+            <span>Inline tail</span>
+        </div></div></div>
+        """
+        
+        result = self.scraper._format_content(BeautifulSoup(html, 'html.parser'))
         
-        # Should have line breaks between sections
-        assert "Title" in result
-        assert "First paragraph" in result
-        assert "Subtitle" in result
-        assert "Second paragraph" in result
+        assert result == "Deep nested text here.\nInline tail"
+    
+    def test_format_content_deeply_nested(self):
+        """Test that very deep nesting does not hit the recursion limit."""
+        depth = 5000
+        element = BeautifulSoup("<div>" * depth + "<p>Bottom</p>" + "</div>" * depth, 'html.parser')
         
-        # Check that line breaks are present
-        lines = result.split('\n')
-        assert len(lines) >= 4  # Should have multiple lines
+        assert self.scraper._format_content(element) == "Bottom"
     
     def test_should_add_line_break_headings(self):
         """Test line break logic for headings."""
@@ -167,56 +223,152 @@ class TestWebScraper:
         
         assert self.scraper._should_add_line_break(span_element) is False
     
-    @patch('requests.Session.get')
-    def test_scrape_url_success(self, mock_get):
+    async def test_scrape_url_success(self):
         """Test successful URL scraping."""
         # Mock the response
         mock_response = Mock()
         mock_response.content = self.test_html.encode()
         mock_response.raise_for_status.return_value = None
-        mock_get.return_value = mock_response
         
-        result = self.scraper.scrape_url(self.test_url)
+        with patch.object(FetchEngine, 'fetch', new=AsyncMock(return_value=mock_response)):
+            result = await self.scraper.scrape_url(self.test_url)
         
         assert result is not None
-        assert "Main Title" in result
-        assert "first paragraph" in result
-        assert "Subtitle" in result
-        assert "second paragraph" in result
+        title, content = result
+        assert title == "Test Page"
+        assert "Main Title" in content
+        assert "first paragraph" in content
+        assert "Subtitle" in content
+        assert "second paragraph" in content
     
-    @patch('requests.Session.get')
-    def test_scrape_url_request_exception(self, mock_get):
+    async def test_scrape_url_request_exception(self):
         """Test URL scraping with request exception."""
-        mock_get.side_effect = requests.RequestException("Connection error")
+        mock_fetch = AsyncMock(side_effect=httpx.ConnectError("Connection error"))
         
-        result = self.scraper.scrape_url(self.test_url)
+        with patch.object(FetchEngine, 'fetch', new=mock_fetch):
+            result = await self.scraper.scrape_url(self.test_url)
         
         assert result is None
     
-    @patch('requests.Session.get')
-    def test_scrape_url_invalid_url(self, mock_get):
+    async def test_scrape_url_invalid_url(self):
         """Test URL scraping with invalid URL."""
-        result = self.scraper.scrape_url("not-a-url")
+        mock_fetch = AsyncMock()
+        
+        with patch.object(FetchEngine, 'fetch', new=mock_fetch):
+            result = await self.scraper.scrape_url("not-a-url")
         
         assert result is None
-        mock_get.assert_not_called()
+        mock_fetch.assert_not_called()
+    
+    async def test_scrape_many_preserves_order(self):
+        """Test that scrape_many returns results in input order and isolates failures."""
+        async def fake_fetch(engine, url, timeout=None, headers=None):
+            if url.endswith("/broken"):
+                raise httpx.ConnectError("Connection error")
+            response = Mock()
+            response.content = f"<html><head><title>{url}</title></head><body><p>Body of {url}</p></body></html>".encode()
+            response.raise_for_status.return_value = None
+            return response
+        
+        urls = ["https://a.example.com/1", "https://b.example.com/broken", "https://c.example.com/3"]
+        with patch.object(FetchEngine, 'fetch', new=fake_fetch):
+            results = await self.scraper.scrape_many(urls)
+        
+        assert len(results) == 3
+        assert results[0][0] == urls[0]
+        assert results[1] is None
+        assert results[2][0] == urls[2]
+
+
+class TestFetchEngine:
+    """Test cases for the pooled fetch engine."""
+    
+    async def test_per_host_limit(self):
+        """Test that concurrent requests to one host are capped."""
+        engine = FetchEngine(max_connections_per_host=2)
+        in_flight = 0
+        peak = 0
+        
+        async def handler(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(200, text="ok")
+        
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        with patch.object(engine, '_get_client', return_value=client):
+            responses = await asyncio.gather(*(engine.fetch(f"https://example.com/{i}") for i in range(6)))
+        await client.aclose()
+        
+        assert all(response.status_code == 200 for response in responses)
+        assert peak <= 2
+    
+    async def test_client_is_reused(self):
+        """Test that the pooled client is reused within one event loop."""
+        engine = FetchEngine()
+        first = engine._get_client()
+        second = engine._get_client()
+        
+        assert first is second
+        await engine.aclose()
+        assert engine._client is None
+    
+    async def test_client_of_another_loop_is_closed(self):
+        """Test that the client of a loop still running in another thread is closed there when replaced."""
+        engine = FetchEngine()
+        other_loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=other_loop.run_forever)
+        thread.start()
+        
+        async def get_client():
+            return engine._get_client()
+        
+        try:
+            old = asyncio.run_coroutine_threadsafe(get_client(), other_loop).result(timeout=5)
+            new = engine._get_client()
+            for _ in range(100):
+                if old.is_closed:
+                    break
+                await asyncio.sleep(0.01)
+            
+            assert new is not old
+            assert old.is_closed
+            assert not new.is_closed
+        finally:
+            await engine.aclose()
+            other_loop.call_soon_threadsafe(other_loop.stop)
+            thread.join()
+            other_loop.close()
+    
+    async def test_close_shared_engine(self):
+        """Test that closing the shared engine closes its client, and that it reconnects when used again."""
+        engine = get_fetch_engine()
+        client = engine._get_client()
+        await close_fetch_engine()
+        
+        assert client.is_closed
+        assert engine._get_client() is not client
+        await close_fetch_engine()
 
 
 class TestScrapeUrlFunction:
     """Test cases for the convenience scrape_url function."""
     
+    @patch('src.tools.web_scraper.web_scraper.get_page_cache', return_value=None)
     @patch('src.tools.web_scraper.web_scraper.WebScraper')
-    def test_scrape_url_function(self, mock_scraper_class):
+    async def test_scrape_url_function(self, mock_scraper_class, mock_get_page_cache):
         """Test the convenience scrape_url function."""
         # Mock the scraper instance
         mock_scraper = Mock()
         mock_scraper_class.return_value = mock_scraper
-        mock_scraper.scrape_url.return_value = "Test content"
+        mock_scraper.scrape_url = AsyncMock(return_value="Test content")
         
-        result = scrape_url("https://example.com", timeout=15)
+        result = await scrape_url("https://example.com", timeout=15)
         
         # Verify the scraper was created with correct timeout
-        mock_scraper_class.assert_called_once_with(timeout=15)
+        mock_scraper_class.assert_called_once_with(timeout=15, cache=None)
         
         # Verify scrape_url was called
         mock_scraper.scrape_url.assert_called_once_with("https://example.com")
@@ -228,12 +380,12 @@ class TestWebScraperIntegration:
     """Integration tests for the web scraper."""
     
     @pytest.mark.integration
-    def test_scrape_real_website(self):
+    async def test_scrape_real_website(self):
         """Test scraping a real website (marked as integration test)."""
         scraper = WebScraper(timeout=10)
         
         # Use a reliable test website
-        result = scraper.scrape_url("https://httpbin.org/html")
+        result = await scraper.scrape_url("https://httpbin.org/html")
         
         # Should get some content
         assert result is not None
@@ -243,9 +395,9 @@ class TestWebScraperIntegration:
         assert "Herman Melville" in result or "Moby Dick" in result
     
     @pytest.mark.integration
-    def test_scrape_url_function_real_website(self):
+    async def test_scrape_url_function_real_website(self):
         """Test the convenience function with a real website."""
-        result = scrape_url("https://httpbin.org/html", timeout=10)
+        result = await scrape_url("https://httpbin.org/html", timeout=10)
         
         assert result is not None
         assert len(result) > 0